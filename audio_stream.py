@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import AsyncIterator
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Whisper models expect 16kHz float32 mono audio
+SAMPLE_RATE = 16000
+FFMPEG_BINARY = "ffmpeg"
+READ_CHUNK_SIZE = 64 * 1024
+# Keep only the tail of ffmpeg's stderr for error messages
+STDERR_TAIL_BYTES = 4096
+
+class PCMBuffer:
+    """
+    Growable float32 buffer for raw little-endian PCM bytes.
+    Preallocated from the expected duration so typical clips are decoded without reallocation;
+    partial 4-byte samples split across reads are carried over to the next append.
+    """
+
+    def __init__(self, expected_samples: int = 0):
+        self._data = np.empty(max(expected_samples, SAMPLE_RATE), dtype=np.float32)
+        self._length = 0
+        self._remainder = b""
+
+    def append(self, chunk: bytes):
+        if self._remainder:
+            chunk = self._remainder + chunk
+        usable = len(chunk) - len(chunk) % 4
+        self._remainder = chunk[usable:]
+        if not usable:
+            return
+        samples = np.frombuffer(chunk, dtype="<f4", count=usable // 4)
+        end = self._length + len(samples)
+        if end > len(self._data):
+            grown = np.empty(max(end, len(self._data) * 2), dtype=np.float32)
+            grown[:self._length] = self._data[:self._length]
+            self._data = grown
+        self._data[self._length:end] = samples
+        self._length = end
+
+    def array(self) -> np.ndarray:
+        """Returns the decoded samples (a view, no copy)."""
+        return self._data[:self._length]
+
+    def __len__(self):
+        return self._length
+
+async def decode_audio_stream(
+    chunks: AsyncIterator[bytes] | None = None,
+    source_path: str | Path | None = None,
+    expected_seconds: float | None = None,
+    archive_path: str | Path | None = None,
+    digest=None
+) -> np.ndarray:
+    """
+    Decodes audio to 16kHz mono float32 with an asyncio ffmpeg subprocess.
+    Input is either streamed from `chunks` into ffmpeg's stdin (optionally copied to
+    `archive_path` and fed to a hashlib `digest` as it passes through) or read by ffmpeg
+    from `source_path`. Output is read incrementally into a buffer sized from `expected_seconds`.
+    """
+    command = [
+        FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", "pipe:0" if chunks is not None else str(source_path),
+        "-f", "f32le", "-acodec", "pcm_f32le",
+        "-ar", str(SAMPLE_RATE), "-ac", "1", "pipe:1"
+    ]
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.PIPE if chunks is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    expected_samples = int(expected_seconds * SAMPLE_RATE * 1.05) if expected_seconds else 0
+    buffer = PCMBuffer(expected_samples)
+    stderr_tail = bytearray()
+
+    async def feed():
+        archive = await asyncio.to_thread(open, archive_path, "wb") if archive_path else None
+        # Archive writes run in a worker thread, one at a time, overlapped with piping the next chunk
+        writing = None
+        piping = True
+        try:
+            async for chunk in chunks:
+                if archive:
+                    if writing:
+                        await writing
+                    writing = asyncio.ensure_future(asyncio.to_thread(archive.write, chunk))
+                if digest is not None:
+                    digest.update(chunk)
+                if not piping:
+                    continue
+                try:
+                    process.stdin.write(chunk)
+                    await process.stdin.drain()
+                except (BrokenPipeError, ConnectionResetError):
+                    # ffmpeg exited early; its exit code and stderr explain why. Finish the
+                    # archive copy so the caller can retry from the file.
+                    if not archive:
+                        break
+                    piping = False
+        finally:
+            if not process.stdin.is_closing():
+                process.stdin.close()
+            if archive:
+                try:
+                    if writing:
+                        await writing
+                finally:
+                    await asyncio.to_thread(archive.close)
+
+    async def read_output():
+        while chunk := await process.stdout.read(READ_CHUNK_SIZE):
+            buffer.append(chunk)
+
+    async def read_errors():
+        while chunk := await process.stderr.read(READ_CHUNK_SIZE):
+            stderr_tail.extend(chunk)
+            del stderr_tail[:-STDERR_TAIL_BYTES]
+
+    tasks = [read_output(), read_errors()]
+    if chunks is not None:
+        tasks.append(feed())
+    try:
+        await asyncio.gather(*tasks)
+        returncode = await process.wait()
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {stderr_tail.decode(errors='replace').strip()}")
+    return buffer.array()
@@ -2,12 +2,13 @@ import asyncio
 import logging
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
-from config import BOT_TOKEN, AUDIO_CLEANUP_DAYS
+from config import BOT_TOKEN, AUDIO_CLEANUP_DAYS, WHISPER_PRELOAD, CAMERA_PRELOAD
 from handlers import start, help, time, top, photo, group, auto_reply, weather, forecast, inline, log, audio, circle, camera, rate, mygroups, webcams
 from tools.cleanup_audio import cleanup_old_audio
-from database import init_db
-from middlewares.command_logging import InteractionLoggingMiddleware
-from middlewares.auth import AdminMiddleware
+from database import init_db, close_connections, load_sharing_user_ids
+from http_client import init_http_session, close_http_session
+from middlewares.command_logging import InteractionLoggingMiddleware, InteractionLogSink
+from middlewares.auth import AdminMiddleware, authorized_users
 from middlewares.circle_location import CircleLocationMiddleware
 
 async def main():
@@ -18,26 +19,36 @@ async def main():
 
     # Initialize database
     init_db()
+    load_sharing_user_ids()
 
     # Run cleanup on startup if enabled
     if AUDIO_CLEANUP_DAYS > 0:
         logging.info(f"Running startup cleanup for old audio files (period: {AUDIO_CLEANUP_DAYS} days)...")
         cleanup_old_audio()
 
+    # Shared, pooled HTTP session for outbound API calls
+    await init_http_session()
+
     bot = Bot(
         token=BOT_TOKEN,
         default=DefaultBotProperties(parse_mode="HTML")
     )
     dp = Dispatcher()
 
+    # Batched background writer for interaction logs
+    log_sink = InteractionLogSink()
+    log_sink.start()
+
     # Register middlewares
-    interaction_logger = InteractionLoggingMiddleware()
+    interaction_logger = InteractionLoggingMiddleware(sink=log_sink)
     dp.message.middleware(interaction_logger)
     dp.inline_query.middleware(interaction_logger)
 
     # Circle of Friends location tracking
-    dp.message.middleware(CircleLocationMiddleware())
+    circle_location = CircleLocationMiddleware()
+    dp.message.middleware(circle_location)
 
+    authorized_users.reload()
     admin_middleware = AdminMiddleware()
     log.router.message.middleware(admin_middleware)
     photo.router.message.middleware(admin_middleware)
@@ -63,6 +74,13 @@ async def main():
     dp.include_router(mygroups.router)
     dp.include_router(auto_reply.router)
 
+    # Load the Whisper model in the background once polling has started
+    if WHISPER_PRELOAD:
+        dp.startup.register(audio.start_warm_up)
+    # Resolve the camera's ONVIF URIs in the background as well
+    if CAMERA_PRELOAD:
+        dp.startup.register(camera.start_warm_up)
+
     # Start polling
     try:
         # Resolve used update types from all registered handlers
@@ -70,6 +88,12 @@ async def main():
         await dp.start_polling(bot, allowed_updates=allowed_updates)
     finally:
         await bot.session.close()
+        await close_http_session()
+        await log_sink.stop()
+        await circle_location.flush()
+        await audio.transcriber.stop()
+        await camera.close_camera_clients()
+        close_connections()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,121 @@
+import time
+import asyncio
+import logging
+import functools
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Bounded in-memory cache with per-entry TTL and LRU eviction.
+    All operations are synchronous and never await, so they are atomic with respect
+    to other coroutines running on the same event loop.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value or `default` if it is missing or expired."""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= self._timer():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Stores a value, evicting the least recently used entries beyond `maxsize`."""
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (self._timer() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """Drops all entries and resets the counters."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+    def __len__(self):
+        return len(self._data)
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into a single in-flight task.
+    Callers arriving while a call is running await its result instead of repeating it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """Runs `func(*args, **kwargs)` unless an identical call is already in flight."""
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            self.coalesced += 1
+            logger.debug(f"[{self.name}] Coalesced call for {key}")
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        # Shield so that a cancelled caller does not cancel the shared call for everyone else
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def coalesce(self, key_func: Callable[..., Hashable]):
+        """Decorator that routes calls through `do`, keyed by `key_func(*args, **kwargs)`."""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = key_func(*args, **kwargs)
+                if key is None:
+                    return await func(*args, **kwargs)
+                return await self.do(key, func, *args, **kwargs)
+            return wrapper
+        return decorator
+
+    def stats(self) -> dict:
+        """Returns the number of upstream calls made and calls that were coalesced."""
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
+
+def location_cache_key(city_name: str = None, lat: float = None, lon: float = None, decimals: int = 2):
+    """
+    Builds a cache key from a city name (case- and whitespace-insensitive) or from
+    coordinates rounded to a grid cell (2 decimals is roughly 1 km).
+    """
+    if city_name:
+        return ("city", " ".join(city_name.casefold().split()))
+    if lat is not None and lon is not None:
+        return ("coord", round(lat, decimals), round(lon, decimals))
+    return None
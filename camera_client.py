@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import httpx
+from http_client import close_on_owner_loop
+
+logger = logging.getLogger(__name__)
+
+class CameraHTTPClient:
+    """
+    Async HTTP client for camera snapshot URLs.
+    Keeps one keep-alive connection pool for the camera, reuses the same auth objects so a
+    Digest challenge is answered up front on later requests (one round-trip instead of two),
+    and remembers which auth scheme the camera accepted. Responses are streamed into memory
+    and abandoned once they exceed `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        user: str,
+        password: str,
+        timeout: float = 10.0,
+        max_bytes: int = 16 * 1024 * 1024,
+        keepalive_expiry: float = 60.0,
+        transport: httpx.AsyncBaseTransport | None = None
+    ):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.keepalive_expiry = keepalive_expiry
+        self._transport = transport
+        # Tried in this order until one is accepted; the working scheme is moved to the front
+        self._auths: dict[str, httpx.Auth] = {
+            "digest": httpx.DigestAuth(user, password),
+            "basic": httpx.BasicAuth(user, password),
+        }
+        self.auth_scheme: str | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+        self.requests = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Returns the pooled client, recreating it if it was closed or belongs to another event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            if self._client is not None and not self._client.is_closed:
+                close_on_owner_loop(self._client.aclose, self._client_loop, "camera HTTP client")
+            self._client = httpx.AsyncClient(
+                # Cameras commonly use self-signed certificates
+                verify=False,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2, keepalive_expiry=self.keepalive_expiry),
+                transport=self._transport
+            )
+            self._client_loop = loop
+        return self._client
+
+    def _scheme_order(self) -> list[str]:
+        if self.auth_scheme is None:
+            return list(self._auths)
+        return [self.auth_scheme] + [scheme for scheme in self._auths if scheme != self.auth_scheme]
+
+    async def fetch(self, url: str) -> bytes | None:
+        """Downloads the image at `url`. Returns None on errors, non-200 responses or oversized bodies."""
+        client = self._get_client()
+        for scheme in self._scheme_order():
+            try:
+                status, content = await self._get(client, url, self._auths[scheme])
+            except Exception as e:
+                logger.warning(f"Snapshot download failed: {e}")
+                return None
+            if status == 401:
+                continue
+            if status == 200 and content:
+                if self.auth_scheme != scheme:
+                    logger.info(f"Camera accepted {scheme} auth for snapshots")
+                    self.auth_scheme = scheme
+                return content
+            logger.warning(f"Snapshot download returned HTTP {status}")
+            return None
+        logger.warning("Camera rejected all auth schemes for the snapshot URI")
+        self.auth_scheme = None
+        return None
+
+    async def _get(self, client: httpx.AsyncClient, url: str, auth: httpx.Auth) -> tuple[int, bytes | None]:
+        self.requests += 1
+        async with client.stream("GET", url, auth=auth) as response:
+            if response.status_code != 200:
+                return response.status_code, None
+            length = response.headers.get("content-length")
+            if length and length.isdigit() and int(length) > self.max_bytes:
+                raise ValueError(f"snapshot is {int(length)} bytes, limit is {self.max_bytes}")
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) > self.max_bytes:
+                    raise ValueError(f"snapshot exceeds {self.max_bytes} bytes")
+            return response.status_code, bytes(body)
+
+    async def close(self):
+        """Closes pooled connections."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
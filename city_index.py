@@ -0,0 +1,57 @@
+import heapq
+import logging
+import unicodedata
+from bisect import bisect_left
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+def fold(text: str) -> str:
+    """Case-folds text and strips diacritics, so that "Zürich" and "zurich" compare equal."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+class CityIndex:
+    """
+    Sorted, case-folded prefix index over city names.
+    Built once at load; lookups are a binary search plus a top-k selection by population.
+    """
+
+    def __init__(self, cities: list[tuple[str, int]]):
+        entries = sorted((fold(name), name, population) for name, population in cities)
+        self._keys = [key for key, _, _ in entries]
+        self._entries = [(name, population) for _, name, population in entries]
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "CityIndex":
+        """
+        Loads a cities file with one `Name, CC` per line and an optional tab-separated population.
+        Returns an empty index if the file does not exist.
+        """
+        cities = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    name, _, population = line.partition("\t")
+                    cities.append((name, int(population) if population.isdigit() else 0))
+        except FileNotFoundError:
+            logger.warning(f"{path} not found. Autocompletion will be disabled.")
+        return cls(cities)
+
+    def search(self, query: str, limit: int = 5) -> list[str]:
+        """Returns up to `limit` city names starting with `query`, most populous first."""
+        prefix = fold(query.strip())
+        if not prefix:
+            return []
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + "\U0010ffff", lo)
+        if lo == hi:
+            return []
+        top = heapq.nlargest(limit, range(lo, hi), key=lambda i: self._entries[i][1])
+        return [self._entries[i][0] for i in top]
+
+    def __len__(self):
+        return len(self._keys)
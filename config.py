@@ -35,14 +35,97 @@ TOP_NUM_LINES = int(os.getenv("TOP_NUM_LINES", "10"))
 LOG_NUM_LINES = int(os.getenv("LOG_NUM_LINES", "10"))
 AUDIO_FOLDER = Path(os.getenv("AUDIO_FOLDER", "audio"))
 AUDIO_CLEANUP_DAYS = int(os.getenv("AUDIO_CLEANUP_DAYS", "30"))
+# Keep a copy of each voice/audio file under AUDIO_FOLDER while it is streamed to ffmpeg (when off, a
+# temporary copy is kept only until decoding finishes, for formats that cannot be decoded from a pipe)
+AUDIO_ARCHIVE = os.getenv("AUDIO_ARCHIVE", "true").lower() in ("1", "true", "yes")
+AUDIO_DOWNLOAD_TIMEOUT = int(os.getenv("AUDIO_DOWNLOAD_TIMEOUT", "60"))
+# Whisper model: size (tiny/base/small) and weight precision (int8/fp16/int4) select the
+# OpenVINO/whisper-{size}-{precision}-ov checkpoint; WHISPER_MODEL_ID overrides both
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+WHISPER_PRECISION = os.getenv("WHISPER_PRECISION", "int8")
+WHISPER_MODEL_ID = os.getenv("WHISPER_MODEL_ID", "")
+# OpenVINO devices tried in order, e.g. "GPU,CPU", "CPU" or "AUTO"
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "GPU,CPU")
+# OpenVINO performance hint (LATENCY or THROUGHPUT) and number of inference streams (empty = device default)
+WHISPER_PERFORMANCE_HINT = os.getenv("WHISPER_PERFORMANCE_HINT", "LATENCY")
+WHISPER_NUM_STREAMS = os.getenv("WHISPER_NUM_STREAMS", "")
+# Whisper inference worker: voice messages arriving together are transcribed in one batch
+WHISPER_MAX_BATCH = int(os.getenv("WHISPER_MAX_BATCH", "4"))
+WHISPER_BATCH_WINDOW_MS = int(os.getenv("WHISPER_BATCH_WINDOW_MS", "50"))
+WHISPER_QUEUE_SIZE = int(os.getenv("WHISPER_QUEUE_SIZE", "32"))
+# OpenVINO compiled-model cache; set to an empty value to disable
+WHISPER_CACHE_DIR = os.getenv("WHISPER_CACHE_DIR", "ov_cache")
+# Load the Whisper model in the background at startup instead of on the first voice message
+WHISPER_PRELOAD = os.getenv("WHISPER_PRELOAD", "true").lower() in ("1", "true", "yes")
+# After a failed model load, seconds before the next voice message tries loading again
+WHISPER_RETRY_SECONDS = float(os.getenv("WHISPER_RETRY_SECONDS", "300"))
+# Long audio is transcribed in chunks of this many seconds, editing the reply after each one
+TRANSCRIPTION_CHUNK_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", "30"))
+# Minimum seconds between edits of a progressive transcription reply
+TRANSCRIPTION_EDIT_INTERVAL = float(os.getenv("TRANSCRIPTION_EDIT_INTERVAL", "3"))
+# Energy-based voice activity detection: trims silence before Whisper and skips silent clips
+VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() in ("1", "true", "yes")
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "12"))
+VAD_MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", "700"))
+# Transcriptions cached by Telegram file_unique_id and content hash, so forwarded voice notes are not re-transcribed
+TRANSCRIPTION_CACHE_ENABLED = os.getenv("TRANSCRIPTION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TRANSCRIPTION_CACHE_PATH = Path(os.getenv("TRANSCRIPTION_CACHE_PATH", str(AUDIO_FOLDER / "transcriptions.db")))
 DATABASE_PATH = os.getenv("DATABASE_PATH", "map.db")
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+# Threads in the dedicated executor used by run_db() for async database access
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL_MS = int(os.getenv("LOG_FLUSH_INTERVAL_MS", "500"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOCATION_FLUSH_INTERVAL_MS = int(os.getenv("LOCATION_FLUSH_INTERVAL_MS", "2000"))
+# Grid cell size (degrees) of the in-memory proximity index used by /map near
+GEO_CELL_DEGREES = float(os.getenv("GEO_CELL_DEGREES", "0.25"))
+# How many users /map near lists
+MAP_NEAR_LIMIT = int(os.getenv("MAP_NEAR_LIMIT", "10"))
 SCREENSHOTS_DIR = Path(os.getenv("SCREENSHOTS_DIR", "screenshots"))
 CAMERA_IP = os.getenv("CAMERA_IP", "10.1.100.151")
 CAMERA_PORT = int(os.getenv("CAMERA_PORT", "8000"))
 CAMERA_USER = os.getenv("CAMERA_USER", "onvif_login")
 CAMERA_PASSWORD = os.getenv("CAMERA_PASSWORD", "onvif_password")
+# Resolved ONVIF snapshot/RTSP URIs are reused for this many seconds (dropped early if they stop working)
+CAMERA_URI_CACHE_TTL = int(os.getenv("CAMERA_URI_CACHE_TTL", "3600"))
+# The resolved URIs are also kept in this JSON file so the bot and tools/get_vlc_link.py share them (empty = memory only)
+CAMERA_URI_CACHE_FILE = os.getenv("CAMERA_URI_CACHE_FILE", "camera_uris.json")
+# Resolve the camera URIs in the background at startup instead of on the first /camera command
+CAMERA_PRELOAD = os.getenv("CAMERA_PRELOAD", "true").lower() in ("1", "true", "yes")
+# /camera screenshot requests within this many seconds share one capture (0 = only concurrent requests)
+CAMERA_SHARE_WINDOW = float(os.getenv("CAMERA_SHARE_WINDOW", "3"))
+# Snapshot downloads: per-request timeout and maximum accepted image size
+CAMERA_HTTP_TIMEOUT = float(os.getenv("CAMERA_HTTP_TIMEOUT", "10"))
+CAMERA_SNAPSHOT_MAX_BYTES = int(os.getenv("CAMERA_SNAPSHOT_MAX_BYTES", str(16 * 1024 * 1024)))
 MAX_VIDEO_DURATION = int(os.getenv("MAX_VIDEO_DURATION", "30"))
+# Persistent RTSP reader: keeps one camera connection open and serves /camera screenshot from memory
+CAMERA_RTSP_READER = os.getenv("CAMERA_RTSP_READER", "false").lower() in ("1", "true", "yes")
+CAMERA_RTSP_READER_FPS = float(os.getenv("CAMERA_RTSP_READER_FPS", "2"))
+CAMERA_RTSP_BUFFER_FRAMES = int(os.getenv("CAMERA_RTSP_BUFFER_FRAMES", "4"))
+# Oldest buffered frame (seconds) that still counts as a current screenshot
+CAMERA_RTSP_MAX_FRAME_AGE = float(os.getenv("CAMERA_RTSP_MAX_FRAME_AGE", "2"))
+# Close the RTSP connection after this many minutes without screenshot requests
+CAMERA_RTSP_IDLE_MINUTES = float(os.getenv("CAMERA_RTSP_IDLE_MINUTES", "5"))
+# JPEG encoding of camera snapshots with the weather overlay; lower the quality to shrink uploads
+CAMERA_JPEG_QUALITY = int(os.getenv("CAMERA_JPEG_QUALITY", "95"))
+CAMERA_JPEG_PROGRESSIVE = os.getenv("CAMERA_JPEG_PROGRESSIVE", "false").lower() in ("1", "true", "yes")
+CAMERA_JPEG_OPTIMIZE = os.getenv("CAMERA_JPEG_OPTIMIZE", "false").lower() in ("1", "true", "yes")
+# Thread pool for camera image processing: concurrent jobs and the most jobs accepted (running + queued)
+IMAGING_POOL_WORKERS = int(os.getenv("IMAGING_POOL_WORKERS", "2"))
+IMAGING_POOL_MAX_PENDING = int(os.getenv("IMAGING_POOL_MAX_PENDING", "8"))
 FONT_PATH = os.getenv("FONT_PATH", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf")
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_LIMIT = int(os.getenv("HTTP_LIMIT", "100"))
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", "10"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "1024"))
+WEATHER_CACHE_GRID_DECIMALS = int(os.getenv("WEATHER_CACHE_GRID_DECIMALS", "2"))
 BOT_VERSION = get_version()
 
 if not BOT_TOKEN:
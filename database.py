@@ -1,162 +1,469 @@
 import sqlite3
+import asyncio
 import logging
-from config import DATABASE_PATH
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from config import DATABASE_PATH, DB_CACHE_SIZE_KB, DB_MMAP_SIZE, DB_BUSY_TIMEOUT_MS, DB_EXECUTOR_WORKERS, GEO_CELL_DEGREES
+from geo_index import GeoIndex, grid_cell
 
 logger = logging.getLogger(__name__)
 
+# One long-lived connection per (thread, database path). sqlite3 keeps a per-connection
+# cache of prepared statements, so reusing the connection also reuses compiled statements.
+_local = threading.local()
+_all_connections: list[sqlite3.Connection] = []
+_connections_lock = threading.Lock()
+# Set by init_db() once the logs_fts full-text index is in place
+FTS_ENABLED = False
+# Trigram tokens need at least this many characters; shorter queries fall back to LIKE
+FTS_MIN_QUERY_LENGTH = 3
+# In-memory user IDs with sharing enabled, per database path (see is_user_sharing)
+_sharing_ids: dict[str, set[int]] = {}
+# In-memory proximity index of sharing users with coordinates, per database path
+_geo_indexes: dict[str, GeoIndex] = {}
+_sharing_lock = threading.Lock()
+# Bumped by close_connections() so other threads drop their stale, closed connections
+_generation = 0
+# Dedicated threads for async database access (see run_db), created on first use
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+def _configure_connection(conn: sqlite3.Connection):
+    """Applies WAL journaling and performance pragmas to a new connection."""
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA cache_size=-{DB_CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size={DB_MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute(f'PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}')
+
+def get_connection(path: str | None = None) -> sqlite3.Connection:
+    """Returns this thread's persistent connection to `path` (DATABASE_PATH by default), opening it on first use."""
+    path = str(path or DATABASE_PATH)
+    connections = getattr(_local, "connections", None)
+    if connections is None or _local.generation != _generation:
+        connections = _local.connections = {}
+        _local.generation = _generation
+
+    conn = connections.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        _configure_connection(conn)
+        connections[path] = conn
+        with _connections_lock:
+            _all_connections.append(conn)
+        logger.debug(f"Opened SQLite connection to {path} in thread {threading.current_thread().name}")
+    return conn
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+        return _executor
+
+async def run_db(func, *args, **kwargs):
+    """
+    Runs a synchronous database function on the dedicated DB executor and awaits its result.
+    Each executor thread keeps its own persistent connection, so the event loop never waits on
+    SQLite I/O or locks, and database work cannot starve the default executor used by other
+    blocking calls.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(func, *args, **kwargs))
+
+def shutdown_db_executor():
+    """Waits for queued database work to finish and stops the executor threads."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+def close_connections():
+    """Closes every connection opened by get_connection(). Called on shutdown."""
+    global _generation
+    # Finish pending async work first so no executor thread uses a connection being closed
+    shutdown_db_executor()
+    with _connections_lock:
+        connections = list(_all_connections)
+        _all_connections.clear()
+        _generation += 1
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"Error closing SQLite connection: {e}")
+
 def init_db():
     """Initializes the SQLite database with the users table."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            user_id INTEGER PRIMARY KEY,
-            username TEXT,
-            full_name TEXT,
-            is_sharing BOOLEAN DEFAULT 0,
-            latitude REAL,
-            longitude REAL,
-            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    conn = get_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER PRIMARY KEY,
+                username TEXT,
+                full_name TEXT,
+                is_sharing BOOLEAN DEFAULT 0,
+                latitude REAL,
+                longitude REAL,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                user_id INTEGER,
+                username TEXT,
+                full_name TEXT,
+                chat_id INTEGER,
+                chat_type TEXT,
+                chat_title TEXT,
+                message_id INTEGER,
+                content TEXT,
+                duration_ms REAL,
+                bot_version TEXT
+            )
+        ''')
+
+        # Simple migration: Add chat_username if it doesn't exist
+        try:
+            cursor.execute('ALTER TABLE logs ADD COLUMN chat_username TEXT')
+        except sqlite3.OperationalError:
+            # Column already exists
+            pass
+
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp)')
+        _migrate_logs_fts(cursor)
+        _migrate_groups(cursor)
+        _migrate_users_geo_cell(cursor)
+
+def _migrate_users_geo_cell(cursor):
+    """
+    Adds users.geo_cell, the grid_cell() of the user's coordinates, with an index over sharing
+    users, and fills it for rows that lack it. Cells are recomputed if GEO_CELL_DEGREES changed.
+    Replaces the earlier users.geohash column.
+    """
+    columns = {row['name'] for row in cursor.execute('PRAGMA table_info(users)')}
+    if 'geohash' in columns:
+        cursor.execute('DROP INDEX IF EXISTS idx_users_geohash')
+        try:
+            cursor.execute('ALTER TABLE users DROP COLUMN geohash')
+        except sqlite3.OperationalError:
+            # SQLite before 3.35 cannot drop columns; the column is just no longer written
+            pass
+    if 'geo_cell' not in columns:
+        cursor.execute('ALTER TABLE users ADD COLUMN geo_cell INTEGER')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_geo_cell ON users(geo_cell) WHERE is_sharing = 1')
+
+    sample = cursor.execute(
+        'SELECT latitude, longitude, geo_cell FROM users WHERE geo_cell IS NOT NULL LIMIT 1'
+    ).fetchone()
+    resized = sample is not None and sample['geo_cell'] != grid_cell(sample['latitude'], sample['longitude'], GEO_CELL_DEGREES)
+    sql = 'SELECT user_id, latitude, longitude FROM users WHERE latitude IS NOT NULL AND longitude IS NOT NULL'
+    if not resized:
+        sql += ' AND geo_cell IS NULL'
+    rows = cursor.execute(sql).fetchall()
+    if rows:
+        cursor.executemany(
+            'UPDATE users SET geo_cell = ? WHERE user_id = ?',
+            [(grid_cell(row['latitude'], row['longitude'], GEO_CELL_DEGREES), row['user_id']) for row in rows]
         )
-    ''')
+        logger.info(f"Computed geo_cell for {len(rows)} users")
+
+def _migrate_groups(cursor):
+    """Creates the groups table maintained by the logging path and backfills it from logs once."""
+    existed = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'groups'"
+    ).fetchone() is not None
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            user_id INTEGER,
-            username TEXT,
-            full_name TEXT,
-            chat_id INTEGER,
-            chat_type TEXT,
+        CREATE TABLE IF NOT EXISTS groups (
+            chat_id INTEGER PRIMARY KEY,
             chat_title TEXT,
-            message_id INTEGER,
-            content TEXT,
-            duration_ms REAL,
-            bot_version TEXT
+            chat_username TEXT,
+            first_seen DATETIME,
+            last_seen DATETIME
         )
     ''')
-    
-    # Simple migration: Add chat_username if it doesn't exist
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_groups_last_seen ON groups(last_seen)')
+    if not existed:
+        logger.info("Backfilling groups table from logs...")
+        cursor.execute('''
+            INSERT INTO groups (chat_id, chat_title, chat_username, first_seen, last_seen)
+            SELECT chat_id, chat_title, chat_username, MIN(timestamp), MAX(timestamp)
+            FROM logs
+            WHERE chat_type IN ('group', 'supergroup')
+            GROUP BY chat_id
+        ''')
+
+def _migrate_logs_fts(cursor):
+    """
+    Creates the logs_fts full-text index (trigram tokenizer, so it matches substrings like LIKE '%q%')
+    and the triggers that keep it in sync with logs. Existing rows are indexed on first creation.
+    """
+    global FTS_ENABLED
+    existed = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'logs_fts'"
+    ).fetchone() is not None
     try:
-        cursor.execute('ALTER TABLE logs ADD COLUMN chat_username TEXT')
-    except sqlite3.OperationalError:
-        # Column already exists
-        pass
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(
+                username, full_name, chat_title, content,
+                content='logs', content_rowid='id', tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 is not available, /log search will use LIKE scans: {e}")
+        FTS_ENABLED = False
+        return
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS logs_fts_insert AFTER INSERT ON logs BEGIN
+            INSERT INTO logs_fts(rowid, username, full_name, chat_title, content)
+            VALUES (new.id, new.username, new.full_name, new.chat_title, new.content);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS logs_fts_delete AFTER DELETE ON logs BEGIN
+            INSERT INTO logs_fts(logs_fts, rowid, username, full_name, chat_title, content)
+            VALUES ('delete', old.id, old.username, old.full_name, old.chat_title, old.content);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS logs_fts_update AFTER UPDATE ON logs BEGIN
+            INSERT INTO logs_fts(logs_fts, rowid, username, full_name, chat_title, content)
+            VALUES ('delete', old.id, old.username, old.full_name, old.chat_title, old.content);
+            INSERT INTO logs_fts(rowid, username, full_name, chat_title, content)
+            VALUES (new.id, new.username, new.full_name, new.chat_title, new.content);
+        END
+    ''')
+    if not existed:
+        logger.info("Building full-text index for existing logs...")
+        cursor.execute("INSERT INTO logs_fts(logs_fts) VALUES ('rebuild')")
+    FTS_ENABLED = True
+
+LOG_COLUMNS = (
+    "user_id", "username", "full_name", "chat_id", "chat_type", "chat_title",
+    "message_id", "content", "duration_ms", "bot_version", "chat_username"
+)
+
+_INSERT_LOG_SQL = f'''
+    INSERT INTO logs ({", ".join(LOG_COLUMNS)})
+    VALUES ({", ".join("?" for _ in LOG_COLUMNS)})
+'''
+
+GROUP_CHAT_TYPES = ('group', 'supergroup')
+
+_UPSERT_GROUP_SQL = '''
+    INSERT INTO groups (chat_id, chat_title, chat_username, first_seen, last_seen)
+    VALUES (?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+    ON CONFLICT(chat_id) DO UPDATE SET
+        chat_title = COALESCE(excluded.chat_title, groups.chat_title),
+        chat_username = excluded.chat_username,
+        last_seen = excluded.last_seen
+'''
 
-    conn.commit()
-    conn.close()
+def _upsert_groups(conn, rows):
+    """Updates the groups table from log rows (tuples ordered as LOG_COLUMNS), once per chat."""
+    latest = {}
+    for row in rows:
+        entry = dict(zip(LOG_COLUMNS, row))
+        if entry["chat_type"] in GROUP_CHAT_TYPES and entry["chat_id"] is not None:
+            latest[entry["chat_id"]] = (entry["chat_id"], entry["chat_title"], entry["chat_username"])
+    if latest:
+        conn.executemany(_UPSERT_GROUP_SQL, latest.values())
 
 def add_interaction_log(user_id, username, full_name, chat_id, chat_type, chat_title, message_id, content, duration_ms, bot_version, chat_username=None):
     """Adds a new interaction log entry to the database."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO logs (
-            user_id, username, full_name, chat_id, chat_type, chat_title, 
-            message_id, content, duration_ms, bot_version, chat_username
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (user_id, username, full_name, chat_id, chat_type, chat_title, message_id, content, duration_ms, bot_version, chat_username))
-    conn.commit()
-    conn.close()
+    row = (user_id, username, full_name, chat_id, chat_type, chat_title, message_id, content, duration_ms, bot_version, chat_username)
+    conn = get_connection()
+    with conn:
+        conn.execute(_INSERT_LOG_SQL, row)
+        _upsert_groups(conn, [row])
+
+def add_interaction_logs(rows):
+    """Adds many interaction log rows (tuples ordered as LOG_COLUMNS) in a single transaction."""
+    if not rows:
+        return
+    conn = get_connection()
+    with conn:
+        conn.executemany(_INSERT_LOG_SQL, rows)
+        _upsert_groups(conn, rows)
 
 def get_recent_logs(limit=10, query=None):
     """Retrieves the most recent interaction logs with optional filtering."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
+    conn = get_connection()
+
+    if query and FTS_ENABLED and len(query) >= FTS_MIN_QUERY_LENGTH:
+        # Quote as a single FTS phrase; with the trigram tokenizer this is a case-insensitive substring match.
+        # Log ids grow with time, so the newest matches are the highest rowids.
+        phrase = '"' + query.replace('"', '""') + '"'
+        return conn.execute('''
+            SELECT * FROM logs WHERE id IN (
+                SELECT rowid FROM logs_fts WHERE logs_fts MATCH ? ORDER BY rowid DESC LIMIT ?
+            )
+            ORDER BY id DESC
+        ''', (phrase, limit)).fetchall()
+
     sql = 'SELECT * FROM logs'
     params = []
-    
+
     if query:
         # Search in username, full_name, chat_title, or content
-        sql += ''' WHERE 
-            username LIKE ? OR 
-            full_name LIKE ? OR 
-            chat_title LIKE ? OR 
+        sql += ''' WHERE
+            username LIKE ? OR
+            full_name LIKE ? OR
+            chat_title LIKE ? OR
             content LIKE ? '''
         search_term = f'%{query}%'
         params.extend([search_term, search_term, search_term, search_term])
-        
+
     sql += ' ORDER BY timestamp DESC LIMIT ?'
     params.append(limit)
-    
-    cursor.execute(sql, params)
-    logs = cursor.fetchall()
-    conn.close()
-    return logs
+
+    return conn.execute(sql, params).fetchall()
 
 def update_user_status(user_id, username, full_name, is_sharing):
     """Updates a user's sharing status and basic info."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO users (user_id, username, full_name, is_sharing)
-        VALUES (?, ?, ?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET
-            username=excluded.username,
-            full_name=excluded.full_name,
-            is_sharing=excluded.is_sharing
-    ''', (user_id, username, full_name, is_sharing))
-    conn.commit()
-    conn.close()
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            INSERT INTO users (user_id, username, full_name, is_sharing)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                username=excluded.username,
+                full_name=excluded.full_name,
+                is_sharing=excluded.is_sharing
+        ''', (user_id, username, full_name, is_sharing))
+
+    # Keep the in-memory sharing set and proximity index coherent with /share on|off
+    with _sharing_lock:
+        ids = _sharing_ids.get(DATABASE_PATH)
+        if ids is not None:
+            if is_sharing:
+                ids.add(user_id)
+            else:
+                ids.discard(user_id)
+
+        index = _geo_indexes.get(DATABASE_PATH)
+        if index is not None:
+            row = conn.execute('SELECT latitude, longitude FROM users WHERE user_id = ?', (user_id,)).fetchone()
+            # Users in cells the index has not loaded yet are read from SQLite when they are
+            if is_sharing and row['latitude'] is not None and index.is_loaded(row['latitude'], row['longitude']):
+                index.update(user_id, row['latitude'], row['longitude'])
+            else:
+                index.remove(user_id)
+
+def load_sharing_user_ids() -> set[int]:
+    """(Re)loads the IDs of users with sharing enabled into memory."""
+    rows = get_connection().execute('SELECT user_id FROM users WHERE is_sharing = 1').fetchall()
+    ids = {row['user_id'] for row in rows}
+    with _sharing_lock:
+        _sharing_ids[DATABASE_PATH] = ids
+    return ids
+
+def is_user_sharing(user_id) -> bool:
+    """Checks the in-memory sharing set; only the first call per database touches SQLite."""
+    ids = _sharing_ids.get(DATABASE_PATH)
+    if ids is None:
+        ids = load_sharing_user_ids()
+    return user_id in ids
 
 def update_user_location(user_id, latitude, longitude):
     """Updates a user's coordinates and timestamp."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        UPDATE users 
-        SET latitude = ?, longitude = ?, updated_at = CURRENT_TIMESTAMP
-        WHERE user_id = ?
-    ''', (latitude, longitude, user_id))
-    conn.commit()
-    conn.close()
+    update_user_locations([(user_id, latitude, longitude)])
+
+def update_user_locations(locations):
+    """Updates coordinates for many (user_id, latitude, longitude) tuples in a single transaction."""
+    if not locations:
+        return
+    conn = get_connection()
+    with conn:
+        conn.executemany('''
+            UPDATE users
+            SET latitude = ?, longitude = ?, geo_cell = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE user_id = ?
+        ''', [
+            (latitude, longitude, grid_cell(latitude, longitude, GEO_CELL_DEGREES), user_id)
+            for user_id, latitude, longitude in locations
+        ])
+
+    index = _geo_indexes.get(DATABASE_PATH)
+    if index is not None:
+        for user_id, latitude, longitude in locations:
+            sharing = is_user_sharing(user_id)
+            with _sharing_lock:
+                if sharing and index.is_loaded(latitude, longitude):
+                    index.update(user_id, latitude, longitude)
+                else:
+                    index.remove(user_id)
+
+def _load_geo_cells(ranges: list[tuple[int, int]]):
+    """Yields (user_id, latitude, longitude) of sharing users in the given geo_cell ranges."""
+    conn = get_connection()
+    for first, last in ranges:
+        yield from conn.execute(
+            'SELECT user_id, latitude, longitude FROM users WHERE is_sharing = 1 AND geo_cell BETWEEN ? AND ?',
+            (first, last)
+        )
+
+def load_geo_index() -> GeoIndex:
+    """
+    (Re)creates the in-memory proximity index. It starts empty and loads the cells each query
+    needs through idx_users_geo_cell, so startup does not scan the users table.
+    """
+    index = GeoIndex(GEO_CELL_DEGREES, loader=_load_geo_cells)
+    with _sharing_lock:
+        _geo_indexes[DATABASE_PATH] = index
+    return index
+
+def get_users_near(latitude, longitude, limit=10, radius_km=None, exclude_user_id=None):
+    """
+    Returns up to `limit` (distance_km, user row) pairs for sharing users nearest to the point,
+    optionally only those within `radius_km`. Uses the in-memory grid index, so only nearby
+    cells are examined (and read from SQLite the first time) and only the matching rows are returned.
+    """
+    index = _geo_indexes.get(DATABASE_PATH)
+    if index is None:
+        index = load_geo_index()
+    exclude = () if exclude_user_id is None else (exclude_user_id,)
+    with _sharing_lock:
+        nearest = index.nearest(latitude, longitude, limit, max_km=radius_km, exclude=exclude)
+    if not nearest:
+        return []
+
+    user_ids = [user_id for _, user_id in nearest]
+    placeholders = ", ".join("?" * len(user_ids))
+    rows = get_connection().execute(
+        f'SELECT * FROM users WHERE is_sharing = 1 AND user_id IN ({placeholders})', user_ids
+    ).fetchall()
+    by_id = {row['user_id']: row for row in rows}
+    return [(distance, by_id[user_id]) for distance, user_id in nearest if user_id in by_id]
 
 def get_user(user_id):
     """Retrieves a user's record from the database."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
-    user = cursor.fetchone()
-    conn.close()
-    return user
+    return get_connection().execute('SELECT * FROM users WHERE user_id = ?', (user_id,)).fetchone()
 
 def get_sharing_users():
     """Returns a list of all users who are currently sharing their location."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE is_sharing = 1')
-    users = cursor.fetchall()
-    conn.close()
-    return users
+    return get_connection().execute('SELECT * FROM users WHERE is_sharing = 1').fetchall()
 
 def get_user_by_username(username):
     """Retrieves a user by their username (case-insensitive)."""
     if username.startswith('@'):
         username = username[1:]
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE username = ? COLLATE NOCASE', (username,))
-    user = cursor.fetchone()
-    conn.close()
-    return user
+    return get_connection().execute(
+        'SELECT * FROM users WHERE username = ? COLLATE NOCASE', (username,)
+    ).fetchone()
 
 def get_known_groups():
     """Retrieves a list of groups the bot has interacted with, ordered by most recent interaction."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT chat_id, chat_title, chat_username, MIN(timestamp) as first_seen, MAX(timestamp) as last_seen 
-        FROM logs 
-        WHERE chat_type IN ('group', 'supergroup') 
-        GROUP BY chat_id 
+    return get_connection().execute('''
+        SELECT chat_id, chat_title, chat_username, first_seen, last_seen
+        FROM groups
         ORDER BY last_seen DESC
-    ''')
-    groups = cursor.fetchall()
-    conn.close()
-    return groups
+    ''').fetchall()
@@ -0,0 +1,205 @@
+import math
+import bisect
+from typing import Callable, Iterable
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def grid_cell(lat: float, lon: float, cell_degrees: float) -> int:
+    """
+    Integer ID of the grid cell containing a point: row * columns + column, with rows counted
+    north from the south pole. Cells of one row have consecutive IDs, so a row segment is an ID range.
+    """
+    rows = math.ceil(180 / cell_degrees)
+    cols = math.ceil(360 / cell_degrees)
+    row = min(rows - 1, max(0, int((lat + 90) // cell_degrees)))
+    return row * cols + int((lon + 180) // cell_degrees) % cols
+
+class GeoIndex:
+    """
+    Uniform latitude/longitude grid over point locations keyed by ID.
+    Radius queries only visit the cells overlapping the search circle's bounding box,
+    and k-nearest queries grow the radius until enough candidates are found,
+    so neither scans every point.
+
+    With a `loader`, the index starts empty and fills itself on demand: before a query it
+    calls `loader(ranges)` with the (first, last) cell ID ranges (see grid_cell) it has not
+    loaded yet, and the loader returns the (key, lat, lon) points in them. Callers must then
+    only update() points whose cell is_loaded(), and remove() the others.
+    """
+
+    def __init__(
+        self,
+        cell_degrees: float = 0.25,
+        loader: Callable[[list[tuple[int, int]]], Iterable[tuple[int, float, float]]] | None = None
+    ):
+        self.cell_degrees = cell_degrees
+        self._rows = math.ceil(180 / cell_degrees)
+        self._cols = math.ceil(360 / cell_degrees)
+        self._cells: dict[tuple[int, int], dict[int, tuple[float, float]]] = {}
+        self._positions: dict[int, tuple[int, int]] = {}
+        self._loader = loader
+        # Sorted, disjoint (first, last) cell ID ranges whose points are all in memory
+        self._loaded: list[tuple[int, int]] = [] if loader else [(0, self._rows * self._cols - 1)]
+
+    def _row(self, lat: float) -> int:
+        return min(self._rows - 1, max(0, int((lat + 90) // self.cell_degrees)))
+
+    def _col(self, lon: float) -> int:
+        return int((lon + 180) // self.cell_degrees) % self._cols
+
+    def is_loaded(self, lat: float, lon: float) -> bool:
+        """True if the points of the cell containing (lat, lon) are in memory."""
+        cell = self._row(lat) * self._cols + self._col(lon)
+        i = bisect.bisect_right(self._loaded, (cell, math.inf)) - 1
+        return i >= 0 and self._loaded[i][1] >= cell
+
+    @property
+    def complete(self) -> bool:
+        """True once every cell is in memory."""
+        return self._loaded == [(0, self._rows * self._cols - 1)]
+
+    def _missing(self, ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """The parts of the given cell ID ranges that are not loaded yet."""
+        missing = []
+        for first, last in ranges:
+            cursor = first
+            i = max(0, bisect.bisect_right(self._loaded, (first, math.inf)) - 1)
+            while i < len(self._loaded) and self._loaded[i][0] <= last and cursor <= last:
+                loaded_first, loaded_last = self._loaded[i]
+                if loaded_last >= cursor:
+                    if loaded_first > cursor:
+                        missing.append((cursor, loaded_first - 1))
+                    cursor = loaded_last + 1
+                i += 1
+            if cursor <= last:
+                missing.append((cursor, last))
+        return missing
+
+    def _mark_loaded(self, ranges: list[tuple[int, int]]):
+        merged: list[tuple[int, int]] = []
+        for first, last in sorted(self._loaded + ranges):
+            if merged and first <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+            else:
+                merged.append((first, last))
+        self._loaded = merged
+
+    def _ensure_loaded(self, rows: range, cols):
+        """Loads the points of the given rows x columns box that are not in memory yet."""
+        if self._loader is None or self.complete:
+            return
+        # The columns are consecutive, possibly wrapping around the antimeridian
+        if cols[-1] >= cols[0]:
+            segments = [(cols[0], cols[-1])]
+        else:
+            segments = [(cols[0], self._cols - 1), (0, cols[-1])]
+        ranges = []
+        for row in rows:
+            for first, last in segments:
+                start, end = row * self._cols + first, row * self._cols + last
+                if ranges and ranges[-1][1] + 1 == start:
+                    ranges[-1] = (ranges[-1][0], end)
+                else:
+                    ranges.append((start, end))
+
+        missing = self._missing(ranges)
+        if not missing:
+            return
+        for key, lat, lon in self._loader(missing):
+            self.update(key, lat, lon)
+        self._mark_loaded(missing)
+
+    def update(self, key: int, lat: float, lon: float):
+        """Inserts or moves a point."""
+        self.remove(key)
+        cell = (self._row(lat), self._col(lon))
+        self._cells.setdefault(cell, {})[key] = (lat, lon)
+        self._positions[key] = cell
+
+    def remove(self, key: int):
+        """Removes a point if present."""
+        cell = self._positions.pop(key, None)
+        if cell is None:
+            return
+        points = self._cells[cell]
+        del points[key]
+        if not points:
+            del self._cells[cell]
+
+    def _candidate_cells(self, lat: float, lon: float, radius_km: float):
+        """Yields the occupied cells that may contain points within `radius_km`."""
+        angle = radius_km / EARTH_RADIUS_KM
+        if angle >= math.pi:
+            self._ensure_loaded(range(self._rows), range(self._cols))
+            yield from self._cells.items()
+            return
+
+        lat_min = lat - math.degrees(angle)
+        lat_max = lat + math.degrees(angle)
+        if lat_min <= -90 or lat_max >= 90:
+            # The circle covers a pole, so every longitude is in range
+            lon_span = 360.0
+        else:
+            lon_span = 2 * math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(lat)))))
+
+        rows = range(self._row(lat_min), self._row(lat_max) + 1)
+        if lon_span >= 360:
+            cols = range(self._cols)
+        else:
+            first = self._col(lon - lon_span / 2)
+            count = (self._col(lon + lon_span / 2) - first) % self._cols + 1
+            cols = [(first + i) % self._cols for i in range(count)]
+        self._ensure_loaded(rows, cols)
+
+        # For huge radii, walking the occupied cells is cheaper than walking the box
+        if len(rows) * len(cols) > len(self._cells):
+            col_set = set(cols)
+            for cell, points in self._cells.items():
+                if cell[0] in rows and cell[1] in col_set:
+                    yield cell, points
+            return
+
+        for row in rows:
+            for col in cols:
+                points = self._cells.get((row, col))
+                if points:
+                    yield (row, col), points
+
+    def within(self, lat: float, lon: float, radius_km: float) -> list[tuple[float, int]]:
+        """Returns (distance_km, key) for every point within `radius_km`, nearest first."""
+        found = []
+        for _, points in self._candidate_cells(lat, lon, radius_km):
+            for key, (p_lat, p_lon) in points.items():
+                distance = haversine_km(lat, lon, p_lat, p_lon)
+                if distance <= radius_km:
+                    found.append((distance, key))
+        found.sort()
+        return found
+
+    def nearest(self, lat: float, lon: float, k: int, max_km: float | None = None, exclude=()) -> list[tuple[float, int]]:
+        """Returns up to `k` (distance_km, key) pairs nearest to the point, optionally capped at `max_km`."""
+        if k <= 0 or (self.complete and not self._positions):
+            return []
+        # Half the Earth's circumference covers every point
+        limit = math.pi * EARTH_RADIUS_KM if max_km is None else min(max_km, math.pi * EARTH_RADIUS_KM)
+        # Start with a radius of about one cell and double it until k points are inside
+        radius = min(limit, self.cell_degrees * 111.0)
+        while True:
+            found = [(d, key) for d, key in self.within(lat, lon, radius) if key not in exclude]
+            if len(found) >= k or radius >= limit:
+                return found[:k]
+            radius = min(limit, radius * 2)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, key):
+        return key in self._positions
@@ -1,72 +1,326 @@
 import os
+import time
+import hashlib
+import asyncio
 import logging
 import shutil
-import subprocess
+import tempfile
+import threading
 import numpy as np
 from datetime import datetime
 from pathlib import Path
 from aiogram import Router, types, F
-from transformers import AutoProcessor, pipeline
-from optimum.intel.openvino import OVModelForSpeechSeq2Seq
-from config import AUDIO_FOLDER
+from aiogram.exceptions import TelegramBadRequest
+from config import (
+    AUDIO_FOLDER, AUDIO_ARCHIVE, AUDIO_DOWNLOAD_TIMEOUT,
+    WHISPER_MODEL_SIZE, WHISPER_PRECISION, WHISPER_MODEL_ID, WHISPER_DEVICE,
+    WHISPER_PERFORMANCE_HINT, WHISPER_NUM_STREAMS,
+    WHISPER_CACHE_DIR, WHISPER_MAX_BATCH, WHISPER_BATCH_WINDOW_MS, WHISPER_QUEUE_SIZE, WHISPER_RETRY_SECONDS,
+    TRANSCRIPTION_CHUNK_SECONDS, TRANSCRIPTION_EDIT_INTERVAL,
+    VAD_ENABLED, VAD_MARGIN_DB, VAD_MIN_SILENCE_MS, TRANSCRIPTION_CACHE_ENABLED
+)
+from database import run_db
+from transcription_cache import get_cached_transcription, store_transcription, file_key, content_key
+from inference_worker import InferenceWorker
+from vad import speech_chunks, split_at_quiet_points
+from audio_stream import decode_audio_stream, FFMPEG_BINARY, READ_CHUNK_SIZE, SAMPLE_RATE
 
 logger = logging.getLogger(__name__)
 router = Router()
 
 # Check for ffmpeg
-FFMPEG_AVAILABLE = shutil.which("ffmpeg") is not None
+FFMPEG_AVAILABLE = shutil.which(FFMPEG_BINARY) is not None
 if not FFMPEG_AVAILABLE:
     logger.error("ffmpeg binary not found. Audio transcription will fail. Please install ffmpeg.")
 
-def load_audio(file_path: str | Path) -> np.ndarray:
+async def fetch_audio(bot, file_path: str, duration: float | None = None, archive_path: Path | None = None, digest=None) -> np.ndarray:
     """
-    Load audio file and convert to 16kHz mono PCM using ffmpeg.
-    Whisper models expect 16kHz float32 mono audio.
+    Downloads a Telegram file and decodes it to 16kHz mono float32 while it downloads.
+    The download is piped straight into ffmpeg and hashed into `digest` along the way. A copy
+    is written to `archive_path`, or to a temporary file when archiving is off, so formats
+    ffmpeg cannot decode from a pipe can be decoded again from the file.
     """
-    command = [
-        "ffmpeg", "-i", str(file_path),
-        "-f", "f32le", "-acodec", "pcm_f32le",
-        "-ar", "16000", "-ac", "1", "-"
-    ]
+    if bot.session.api.is_local:
+        # Local Bot API server: the file is already on disk
+        local_path = bot.session.api.wrap_local_file.to_local(file_path)
+        audio = await decode_audio_stream(source_path=local_path, expected_seconds=duration)
+        if archive_path:
+            await asyncio.to_thread(shutil.copyfile, local_path, archive_path)
+        if digest is not None:
+            await asyncio.to_thread(_hash_file, local_path, digest)
+        return audio
+
+    url = bot.session.api.file_url(bot.token, file_path)
+    chunks = bot.session.stream_content(url=url, timeout=AUDIO_DOWNLOAD_TIMEOUT, chunk_size=READ_CHUNK_SIZE, raise_for_status=True)
+    spool = None
+    if archive_path is None:
+        fd, name = tempfile.mkstemp(prefix="voice-", suffix=Path(file_path).suffix)
+        os.close(fd)
+        spool = Path(name)
+    copy_path = archive_path or spool
+    try:
+        try:
+            return await decode_audio_stream(chunks, expected_seconds=duration, archive_path=copy_path, digest=digest)
+        except RuntimeError as e:
+            # Containers with the index at the end (e.g. some .m4a) cannot be decoded from a pipe
+            if not copy_path.exists():
+                raise
+            logger.warning(f"Streaming decode failed ({e}), retrying from {copy_path}")
+            return await decode_audio_stream(source_path=copy_path, expected_seconds=duration)
+    finally:
+        if spool is not None:
+            spool.unlink(missing_ok=True)
+
+def _hash_file(path, digest):
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_CHUNK_SIZE):
+            digest.update(chunk)
+
+async def lookup_transcription(*keys: str) -> str | None:
+    """
+    Returns a transcription cached by the current model, or None on a miss (or if the cache is unavailable).
+    Texts from another model are treated as misses, so changing the model re-transcribes.
+    """
+    if not TRANSCRIPTION_CACHE_ENABLED:
+        return None
     try:
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        stdout, stderr = process.communicate()
-        if process.returncode != 0:
-            raise RuntimeError(f"ffmpeg failed: {stderr.decode()}")
-        return np.frombuffer(stdout, dtype=np.float32)
+        return await run_db(get_cached_transcription, *keys, model=MODEL_ID)
     except Exception as e:
-        logger.error(f"Error loading audio with ffmpeg: {e}")
-        raise
-
-# Load Whisper model and pipeline (do this once at module level)
-MODEL_ID = "OpenVINO/whisper-base-int8-ov"
-try:
-    logger.info(f"Loading Whisper model {MODEL_ID} on Intel GPU...")
-    processor = AutoProcessor.from_pretrained(MODEL_ID)
+        logger.warning(f"Transcription cache lookup failed: {e}")
+        return None
+
+async def remember_transcription(keys: list[str], text: str):
+    """Stores a transcription under the given keys; failures only cost a future cache miss."""
+    if not TRANSCRIPTION_CACHE_ENABLED:
+        return
     try:
-        model = OVModelForSpeechSeq2Seq.from_pretrained(MODEL_ID, device="GPU")
-        logger.info("Whisper model loaded successfully on Intel GPU.")
+        await run_db(store_transcription, keys, text, MODEL_ID)
     except Exception as e:
-        logger.warning(f"Failed to load Whisper model on Intel GPU: {e}. Falling back to CPU.")
-        model = OVModelForSpeechSeq2Seq.from_pretrained(MODEL_ID, device="CPU")
-        logger.info("Whisper model loaded successfully on CPU.")
-    
+        logger.warning(f"Failed to cache transcription: {e}")
+
+WHISPER_SIZES = ("tiny", "base", "small")
+WHISPER_PRECISIONS = ("int8", "fp16", "int4")
+PERFORMANCE_HINTS = ("LATENCY", "THROUGHPUT")
+
+def whisper_model_id(size: str = WHISPER_MODEL_SIZE, precision: str = WHISPER_PRECISION) -> str:
+    """Returns the OpenVINO Hugging Face checkpoint for a Whisper size and weight precision."""
+    if size not in WHISPER_SIZES:
+        raise ValueError(f"Unknown Whisper model size {size!r}, expected one of {', '.join(WHISPER_SIZES)}")
+    if precision not in WHISPER_PRECISIONS:
+        raise ValueError(f"Unknown Whisper precision {precision!r}, expected one of {', '.join(WHISPER_PRECISIONS)}")
+    return f"OpenVINO/whisper-{size}-{precision}-ov"
+
+def whisper_ov_config(
+    performance_hint: str = WHISPER_PERFORMANCE_HINT,
+    num_streams: str = WHISPER_NUM_STREAMS,
+    cache_dir: str = WHISPER_CACHE_DIR
+) -> dict:
+    """Builds the OpenVINO compile options: performance hint, stream count and model cache."""
+    hint = performance_hint.upper()
+    if hint not in PERFORMANCE_HINTS:
+        raise ValueError(f"Unknown performance hint {performance_hint!r}, expected LATENCY or THROUGHPUT")
+    ov_config = {"PERFORMANCE_HINT": hint}
+    if num_streams:
+        ov_config["NUM_STREAMS"] = str(num_streams).upper()
+    if cache_dir:
+        ov_config["CACHE_DIR"] = str(cache_dir)
+    return ov_config
+
+def build_pipeline(model_id: str, devices: list[str], ov_config: dict):
+    """
+    Loads an OpenVINO Whisper model on the first device in `devices` that works and wraps it
+    in a transformers ASR pipeline. Raises the last device's error if none of them load.
+    """
+    from transformers import AutoProcessor, pipeline
+    from optimum.intel.openvino import OVModelForSpeechSeq2Seq
+
+    processor = AutoProcessor.from_pretrained(model_id)
+    model = None
+    for i, device in enumerate(devices):
+        logger.info(f"Loading Whisper model {model_id} on {device} with {ov_config}...")
+        try:
+            model = OVModelForSpeechSeq2Seq.from_pretrained(model_id, device=device, ov_config=ov_config)
+            logger.info(f"Whisper model loaded successfully on {device}.")
+            break
+        except Exception as e:
+            if i == len(devices) - 1:
+                raise
+            logger.warning(f"Failed to load Whisper model on {device}: {e}. Falling back to {devices[i + 1]}.")
+
     # Create pipeline for automatic chunking of long audio
-    pipe = pipeline(
+    return pipeline(
         "automatic-speech-recognition",
         model=model,
         tokenizer=processor.tokenizer,
         feature_extractor=processor.feature_extractor,
+        # Only kicks in for inputs longer than 30 s (TRANSCRIPTION_CHUNK_SECONDS > 30); shorter
+        # chunks are already cut at quiet points by split_audio()/speech_chunks()
         chunk_length_s=30,
         stride_length_s=5,
     )
-except Exception as e:
-    logger.error(f"Failed to load Whisper pipeline: {e}")
-    pipe = None
+
+MODEL_ID = WHISPER_MODEL_ID or whisper_model_id()
+DEVICES = [device.strip().upper() for device in WHISPER_DEVICE.split(",") if device.strip()] or ["CPU"]
+# Partial replies show only the tail of the text to stay under Telegram's 4096-character limit
+PARTIAL_TEXT_LIMIT = 3500
+# Final transcriptions longer than this are split into follow-up messages
+MESSAGE_TEXT_LIMIT = 3800
+
+# Whisper pipeline, loaded on first use (or by warm_up() after polling starts) so that
+# importing this module does not pull in transformers/OpenVINO or compile the model.
+pipe = None
+# not_loaded -> loading -> ready | failed (-> loading again after WHISPER_RETRY_SECONDS)
+model_state = "not_loaded"
+model_error: str | None = None
+_failed_at: float | None = None
+_load_lock = threading.Lock()
+
+def model_unavailable() -> bool:
+    """True while the last load failed less than WHISPER_RETRY_SECONDS ago."""
+    return (
+        pipe is None and model_state == "failed" and _failed_at is not None
+        and time.monotonic() - _failed_at < WHISPER_RETRY_SECONDS
+    )
+
+def load_pipeline():
+    """
+    Loads the configured Whisper model and builds the pipeline once; concurrent callers wait for the first.
+    Compiled models are cached in WHISPER_CACHE_DIR so restarts skip OpenVINO recompilation.
+    Returns None if loading failed; a failed load is retried once WHISPER_RETRY_SECONDS have passed.
+    """
+    global pipe, model_state, model_error, _failed_at
+    with _load_lock:
+        if pipe is not None or model_unavailable():
+            return pipe
+
+        model_state = "loading"
+        start = time.perf_counter()
+        try:
+            pipe = build_pipeline(MODEL_ID, DEVICES, whisper_ov_config())
+            model_state = "ready"
+            logger.info(f"Whisper pipeline ready in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            logger.error(f"Failed to load Whisper pipeline: {e}")
+            model_state = "failed"
+            model_error = str(e)
+            _failed_at = time.monotonic()
+        return pipe
+
+async def warm_up():
+    """Loads the Whisper pipeline in the background so the first voice message does not wait for it."""
+    await asyncio.to_thread(load_pipeline)
+
+_warm_up_task: asyncio.Task | None = None
+
+async def start_warm_up():
+    """Startup hook: schedules warm_up() without delaying polling."""
+    global _warm_up_task
+    if _warm_up_task is None:
+        _warm_up_task = asyncio.create_task(warm_up())
+
+def transcribe_batch(audio_batch: list[np.ndarray]) -> list[dict]:
+    """Runs the Whisper pipeline over one or more audio arrays (called on the worker thread)."""
+    asr = pipe or load_pipeline()
+    if asr is None:
+        raise RuntimeError(f"Whisper model could not be loaded: {model_error}")
+    if len(audio_batch) == 1:
+        return [asr(audio_batch[0])]
+    return asr(audio_batch, batch_size=len(audio_batch))
+
+# Single inference thread shared by all chats; started on the first voice message
+transcriber = InferenceWorker(
+    transcribe_batch,
+    max_batch=WHISPER_MAX_BATCH,
+    batch_window_ms=WHISPER_BATCH_WINDOW_MS,
+    max_queue=WHISPER_QUEUE_SIZE,
+    name="whisper"
+)
+
+def split_audio(audio: np.ndarray, chunk_seconds: float) -> list[np.ndarray]:
+    """
+    Splits audio into consecutive chunks of at most `chunk_seconds` (views, no copies), cut at
+    low-energy points so words spanning a boundary stay in one chunk.
+    """
+    return split_at_quiet_points(audio, chunk_seconds)
+
+BUSY_TEXT = "Too many voice messages are being transcribed right now. Please try again in a minute."
+
+def format_transcription(header: str, text: str, done: int | None = None, total: int | None = None) -> str:
+    """Formats a (partial) transcription reply, keeping partial text within Telegram's message limit."""
+    if done is None:
+        return f"""{header}\n\n<blockquote expandable>{text}</blockquote>"""
+    if len(text) > PARTIAL_TEXT_LIMIT:
+        text = "…" + text[-PARTIAL_TEXT_LIMIT:]
+    return f"""{header} ⏳ {done}/{total}\n\n<blockquote expandable>{text} …</blockquote>"""
+
+def split_text(text: str, limit: int = MESSAGE_TEXT_LIMIT) -> list[str]:
+    """Splits text into pieces of at most `limit` characters, cutting at spaces where possible."""
+    pieces = []
+    while len(text) > limit:
+        cut = text.rfind(" ", 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        pieces.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    pieces.append(text)
+    return pieces
+
+def transcription_messages(header: str, text: str) -> list[str]:
+    """The final transcription as one or more messages, each within Telegram's length limit."""
+    first, *rest = split_text(text)
+    return [format_transcription(header, first)] + [f"""<blockquote expandable>{piece}</blockquote>""" for piece in rest]
+
+class ProgressiveReply:
+    """
+    A single reply message that is edited as more text becomes available.
+    Intermediate edits are dropped when they come sooner than `min_interval` seconds after
+    the previous one (Telegram limits edits per chat); the final text is always delivered,
+    and errors delivering it are raised.
+    """
+
+    def __init__(self, message: types.Message, min_interval: float):
+        self.message = message
+        self.min_interval = min_interval
+        self.sent: types.Message | None = None
+        self._last_edit = 0.0
+        self._last_text = None
+
+    async def _send(self, text: str):
+        if text == self._last_text:
+            return
+        if self.sent is None:
+            self.sent = await self.message.reply(text)
+        else:
+            try:
+                await self.sent.edit_text(text)
+            except TelegramBadRequest as e:
+                # The message already shows this text
+                if "message is not modified" not in str(e):
+                    raise
+        self._last_text = text
+        self._last_edit = time.monotonic()
+
+    async def update(self, text: str):
+        """Shows partial text now if the rate limit allows it, otherwise skips this update."""
+        if self.sent is None or time.monotonic() - self._last_edit >= self.min_interval:
+            await self._send(text)
+
+    async def finish(self, text: str, *follow_ups: str):
+        """
+        Delivers the final text, waiting out the rate limit if necessary, then sends any
+        `follow_ups` as further replies (for text that does not fit in one message).
+        """
+        if self.sent is not None:
+            wait = self.min_interval - (time.monotonic() - self._last_edit)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        await self._send(text)
+        for follow_up in follow_ups:
+            await self.message.reply(follow_up)
 
 @router.message(F.voice | F.audio)
 async def handle_audio_message(message: types.Message):
-    if not pipe:
+    if model_unavailable():
         await message.answer("Error: Whisper model not loaded. Transcription is unavailable.")
         return
 
@@ -77,9 +331,13 @@ async def handle_audio_message(message: types.Message):
     # Check if it's a voice or audio file
     if message.voice:
         file_id = message.voice.file_id
+        file_unique_id = message.voice.file_unique_id
+        duration = message.voice.duration
         file_ext = "ogg" # Telegram voice messages are usually .ogg (Opus)
     elif message.audio:
         file_id = message.audio.file_id
+        file_unique_id = message.audio.file_unique_id
+        duration = message.audio.duration
         file_ext = message.audio.file_name.split('.')[-1] if message.audio.file_name else "mp3"
     else:
         return
@@ -112,21 +370,67 @@ async def handle_audio_message(message: types.Message):
     temp_file_path = target_dir / temp_file_name
 
     try:
-        # Download the file
+        header = f"🎤 Transcription for {message.from_user.full_name}:"
+
+        # Forwarded copies keep their file_unique_id: answer repeats without downloading
+        file_keys = [file_key(file_unique_id)]
+        cached = await lookup_transcription(*file_keys)
+        if cached is not None:
+            logger.info(f"Transcription cache hit for file {file_unique_id}")
+            for part in transcription_messages(header, cached):
+                await message.reply(part)
+            return
+
         bot = message.bot
         file_info = await bot.get_file(file_id)
-        await bot.download_file(file_info.file_path, destination=temp_file_path)
 
         # Transcribe using OpenVINO Whisper Pipeline
         logger.info(f"Transcribing {temp_file_path}...")
         
-        # Load audio data as numpy array (Whisper expects 16kHz float32)
-        audio_data = load_audio(temp_file_path)
+        # Stream the download through ffmpeg into a numpy array (Whisper expects 16kHz float32)
+        archive_path = temp_file_path if AUDIO_ARCHIVE else None
+        digest = hashlib.sha256()
+        audio_data = await fetch_audio(bot, file_info.file_path, duration, archive_path, digest)
+
+        # Re-uploads of the same bytes get a new file_unique_id but the same content hash
+        hash_key = content_key(digest.hexdigest())
+        cached = await lookup_transcription(hash_key)
+        if cached is not None:
+            logger.info(f"Transcription cache hit for content {hash_key}")
+            await remember_transcription(file_keys, cached)
+            for part in transcription_messages(header, cached):
+                await message.reply(part)
+            return
         
-        # Generate transcription using pipeline (handles long audio)
-        result = pipe(audio_data)
-        transcription_text = result.get("text", "").strip()
+        # Transcribe chunk by chunk on the inference worker, showing partial text as it arrives
+        if transcriber.queue_depth:
+            logger.info(f"Whisper queue depth: {transcriber.queue_depth}, in flight: {transcriber.in_flight}")
+        reply = ProgressiveReply(message, TRANSCRIPTION_EDIT_INTERVAL)
+        if VAD_ENABLED:
+            # Feed only speech to Whisper; silent clips never reach the model
+            segments = await asyncio.to_thread(
+                speech_chunks, audio_data, TRANSCRIPTION_CHUNK_SECONDS,
+                margin_db=VAD_MARGIN_DB, min_silence_ms=VAD_MIN_SILENCE_MS
+            )
+            kept = sum(len(segment) for segment in segments) / SAMPLE_RATE
+            logger.info(f"VAD kept {kept:.1f}s of {len(audio_data) / SAMPLE_RATE:.1f}s in {len(segments)} chunks")
+        else:
+            segments = split_audio(audio_data, TRANSCRIPTION_CHUNK_SECONDS)
+        texts = []
+        for i, segment in enumerate(segments):
+            try:
+                # Back-pressure only turns away new messages; once the first chunk is admitted,
+                # the rest wait for queue space instead of abandoning a partial transcription
+                result = await transcriber.submit(segment, wait=i > 0)
+            except asyncio.QueueFull:
+                await message.reply(BUSY_TEXT)
+                return
+            texts.append(result.get("text", "").strip())
+            if i < len(segments) - 1:
+                partial = " ".join(t for t in texts if t)
+                await reply.update(format_transcription(header, partial, i + 1, len(segments)))
 
+        transcription_text = " ".join(t for t in texts if t)
         if not transcription_text:
             transcription_text = "[No speech detected]"
 
@@ -135,9 +439,9 @@ async def handle_audio_message(message: types.Message):
         with open(txt_file_path, "w", encoding="utf-8") as f:
             f.write(transcription_text)
 
-        # Send response to group
-        response = f"🎤 Transcription for {message.from_user.full_name}:\n\n<blockquote expandable>{transcription_text}</blockquote>"
-        await message.reply(response)
+        # Send (or finalize) the response to the group
+        await reply.finish(*transcription_messages(header, transcription_text))
+        await remember_transcription(file_keys + [hash_key], transcription_text)
 
     except Exception as e:
         logger.error(f"Error processing audio message: {e}")
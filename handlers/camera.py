@@ -1,78 +1,104 @@
 import logging
-import httpx
 import os
 import asyncio
-import requests
-import urllib3
 from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont
-import io
-from requests.auth import HTTPDigestAuth, HTTPBasicAuth
 from aiogram import Router, types
 from aiogram.filters import Command, CommandObject
 from aiogram.types import BufferedInputFile, FSInputFile
-from onvif import ONVIFCamera
 from config import (
     CAMERA_IP, CAMERA_PORT, CAMERA_USER, CAMERA_PASSWORD, 
-    SCREENSHOTS_DIR, MAX_VIDEO_DURATION, FONT_PATH
+    SCREENSHOTS_DIR, MAX_VIDEO_DURATION, FONT_PATH,
+    CAMERA_RTSP_READER, CAMERA_RTSP_READER_FPS, CAMERA_RTSP_BUFFER_FRAMES,
+    CAMERA_RTSP_MAX_FRAME_AGE, CAMERA_RTSP_IDLE_MINUTES, CAMERA_URI_CACHE_TTL, CAMERA_URI_CACHE_FILE,
+    CAMERA_HTTP_TIMEOUT, CAMERA_SNAPSHOT_MAX_BYTES,
+    CAMERA_JPEG_QUALITY, CAMERA_JPEG_PROGRESSIVE, CAMERA_JPEG_OPTIMIZE,
+    IMAGING_POOL_WORKERS, IMAGING_POOL_MAX_PENDING, CAMERA_SHARE_WINDOW
 )
+from cache import TTLCache, SingleFlight
+from camera_client import CameraHTTPClient
+from image_overlay import render_overlay
+from imaging_pool import ImagingPool
 from handlers.weather import get_weather
-
-# Disable insecure request warnings for self-signed camera certificates
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from onvif_discovery import ONVIFDiscovery, with_rtsp_credentials as add_rtsp_credentials
+from rtsp_reader import RTSPFrameReader
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+# ONVIF client and resolved URIs, shared by all /camera commands for the process lifetime
+camera_discovery = ONVIFDiscovery(
+    CAMERA_IP, CAMERA_PORT, CAMERA_USER, CAMERA_PASSWORD,
+    ttl=CAMERA_URI_CACHE_TTL, cache_path=CAMERA_URI_CACHE_FILE
+)
+_uri_lookups = SingleFlight("camera_uris")
+# Keep-alive HTTP client for the snapshot URI
+camera_http = CameraHTTPClient(CAMERA_USER, CAMERA_PASSWORD, timeout=CAMERA_HTTP_TIMEOUT, max_bytes=CAMERA_SNAPSHOT_MAX_BYTES)
+# Pillow decode/overlay/encode runs here so large frames never block the dispatcher
+imaging_pool = ImagingPool(workers=IMAGING_POOL_WORKERS, max_pending=IMAGING_POOL_MAX_PENDING)
+
 async def get_camera_snapshot():
-    """Connects to the ONVIF camera and retrieves snapshot or RTSP URIs."""
+    """Returns the camera's (snapshot URI, RTSP URI), resolved over ONVIF and cached."""
     try:
-        def connect_and_get_uris():
-            cam = ONVIFCamera(CAMERA_IP, CAMERA_PORT, CAMERA_USER, CAMERA_PASSWORD)
-            media = cam.create_media_service()
-            profiles = media.GetProfiles()
-            if not profiles:
-                raise Exception("No media profiles found on camera.")
-            
-            token = profiles[0].token
-            
-            # 1. Try to get Snapshot URI
-            snapshot_uri = None
-            try:
-                obj = media.create_type('GetSnapshotUri')
-                obj.ProfileToken = token
-                res = media.GetSnapshotUri(obj)
-                snapshot_uri = res.Uri
-            except Exception as e:
-                logger.warning(f"Could not get Snapshot URI: {e}")
-
-            # 2. Try to get RTSP Stream URI as fallback
-            rtsp_uri = None
-            try:
-                obj = media.create_type('GetStreamUri')
-                obj.ProfileToken = token
-                obj.StreamSetup = {
-                    'Stream': 'RTP-Unicast',
-                    'Transport': {'Protocol': 'RTSP'}
-                }
-                res = media.GetStreamUri(obj)
-                rtsp_uri = res.Uri
-            except Exception as e:
-                logger.warning(f"Could not get Stream URI: {e}")
-
-            return snapshot_uri, rtsp_uri
-
-        return await asyncio.to_thread(connect_and_get_uris)
+        uris = await _uri_lookups.do("uris", asyncio.to_thread, camera_discovery.get_uris)
+        return uris.snapshot_uri, uris.rtsp_uri
     except Exception as e:
         logger.error(f"Failed to get camera URIs: {e}")
         raise
 
+async def warm_up():
+    """Resolves the camera URIs in the background so the first /camera command skips ONVIF discovery."""
+    try:
+        await get_camera_snapshot()
+        logger.info("Camera URIs resolved and cached.")
+    except Exception as e:
+        logger.warning(f"Camera warm-up failed, URIs will be resolved on first use: {e}")
+
+_warm_up_task: asyncio.Task | None = None
+
+async def start_warm_up():
+    """Startup hook: schedules warm_up() without delaying polling."""
+    global _warm_up_task
+    if _warm_up_task is None:
+        _warm_up_task = asyncio.create_task(warm_up())
+
+def with_rtsp_credentials(rtsp_uri: str) -> str:
+    """Injects the camera credentials into an RTSP URI if they aren't there."""
+    return add_rtsp_credentials(rtsp_uri, CAMERA_USER, CAMERA_PASSWORD)
+
+# Long-lived RTSP connection used when CAMERA_RTSP_READER is enabled
+_rtsp_reader: RTSPFrameReader | None = None
+
+async def get_rtsp_frame(rtsp_uri: str):
+    """Returns a recent frame from the persistent RTSP reader, starting it if needed."""
+    global _rtsp_reader
+    rtsp_uri = with_rtsp_credentials(rtsp_uri)
+    if _rtsp_reader is not None and _rtsp_reader.uri != rtsp_uri:
+        await _rtsp_reader.stop()
+        _rtsp_reader = None
+    if _rtsp_reader is None:
+        _rtsp_reader = RTSPFrameReader(
+            rtsp_uri,
+            fps=CAMERA_RTSP_READER_FPS,
+            buffer_frames=CAMERA_RTSP_BUFFER_FRAMES,
+            idle_timeout=CAMERA_RTSP_IDLE_MINUTES * 60
+        )
+    return await _rtsp_reader.get_frame(max_age=CAMERA_RTSP_MAX_FRAME_AGE)
+
+async def stop_rtsp_reader():
+    """Closes the persistent RTSP connection (called on shutdown)."""
+    if _rtsp_reader is not None:
+        await _rtsp_reader.stop()
+
+async def close_camera_clients():
+    """Closes the RTSP reader, the snapshot HTTP connections and the imaging pool (called on shutdown)."""
+    await stop_rtsp_reader()
+    await camera_http.close()
+    await asyncio.to_thread(imaging_pool.shutdown)
+
 async def capture_rtsp_frame(rtsp_uri: str):
     """Uses ffmpeg to capture a single frame from an RTSP stream."""
     try:
-        # Inject credentials into RTSP URI if they aren't there
-        if rtsp_uri.startswith("rtsp://") and "@" not in rtsp_uri:
-            rtsp_uri = rtsp_uri.replace("rtsp://", f"rtsp://{CAMERA_USER}:{CAMERA_PASSWORD}@")
+        rtsp_uri = with_rtsp_credentials(rtsp_uri)
 
         logger.info(f"Attempting RTSP frame capture from: {rtsp_uri.split('@')[-1]}")
         
@@ -108,9 +134,7 @@ async def capture_rtsp_frame(rtsp_uri: str):
 async def record_rtsp_video(rtsp_uri: str, duration: int, output_path: os.PathLike):
     """Uses ffmpeg to record a video from an RTSP stream for a given duration."""
     try:
-        # Inject credentials into RTSP URI if they aren't there
-        if rtsp_uri.startswith("rtsp://") and "@" not in rtsp_uri:
-            rtsp_uri = rtsp_uri.replace("rtsp://", f"rtsp://{CAMERA_USER}:{CAMERA_PASSWORD}@")
+        rtsp_uri = with_rtsp_credentials(rtsp_uri)
 
         logger.info(f"Attempting RTSP video record from: {rtsp_uri.split('@')[-1]} for {duration}s")
         
@@ -178,60 +202,103 @@ async def overlay_weather_on_image(image_bytes: bytes, city_name: str = "Izhevsk
             f"Wind: {wind_speed_kmh} km/h"
         )
 
-        # 3. Process image
-        with Image.open(io.BytesIO(image_bytes)) as img:
-            # Ensure it's in RGB (needed for some JPEG variations)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Use a smaller font size if it's multi-line to avoid taking too much space
-            try:
-                # Use FONT_PATH from config
-                font = ImageFont.truetype(FONT_PATH, 18)
-            except Exception:
-                logger.warning(f"Could not load font at {FONT_PATH}, falling back to default.")
-                font = ImageFont.load_default()
-
-            draw = ImageDraw.Draw(img)
-            
-            # Calculate multi-line text size and position (top-right)
-            if hasattr(draw, "multiline_textbbox"):
-                bbox = draw.multiline_textbbox((0, 0), weather_text, font=font)
-                tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
-            else:
-                # Older PIL fallback
-                lines = weather_text.split('\n')
-                tw = max(draw.textsize(line, font=font)[0] for line in lines)
-                th = sum(draw.textsize(line, font=font)[1] for line in lines) + (len(lines) - 1) * 4
-
-            padding = 15
-            width, height = img.size
-            x = width - tw - padding
-            y = padding
-
-            # Draw background box for readability (semi-transparent black)
-            # Create a separate layer for transparency
-            overlay = Image.new('RGBA', img.size, (255, 255, 255, 0))
-            overlay_draw = ImageDraw.Draw(overlay)
-            overlay_draw.rectangle(
-                [x - 8, y - 8, x + tw + 8, y + th + 8],
-                fill=(0, 0, 0, 128)
-            )
-            img = Image.alpha_composite(img.convert('RGBA'), overlay).convert('RGB')
-            
-            # Draw multi-line text on the composited image
-            draw = ImageDraw.Draw(img)
-            draw.multiline_text((x, y), weather_text, font=font, fill=(255, 255, 255), spacing=4)
-
-            # Save back to bytes
-            output = io.BytesIO()
-            img.save(output, format="JPEG", quality=95)
-            return output.getvalue()
+        # 3. Draw the (cached) text panel and re-encode on the imaging pool, off the event loop
+        return await imaging_pool.run(
+            render_overlay, image_bytes, weather_text, FONT_PATH,
+            quality=CAMERA_JPEG_QUALITY,
+            progressive=CAMERA_JPEG_PROGRESSIVE,
+            optimize=CAMERA_JPEG_OPTIMIZE
+        )
 
+    except asyncio.QueueFull:
+        logger.warning(f"Imaging pool busy, sending snapshot without weather overlay ({imaging_pool.stats()})")
+        return image_bytes
     except Exception as e:
         logger.error(f"Error overlaying weather on image: {e}")
         return image_bytes
 
+class Screenshot:
+    """A captured, overlaid and saved snapshot, shared by all requests in the same window."""
+
+    def __init__(self, image: bytes, filename: str):
+        self.image = image
+        self.filename = filename
+        # Telegram file_id of the first upload; later sends reference it instead of re-uploading
+        self.file_id: str | None = None
+        self._upload_lock = asyncio.Lock()
+
+# Concurrent /camera screenshot requests share one capture, and a finished capture is reused
+# for CAMERA_SHARE_WINDOW seconds
+_capture_flight = SingleFlight("camera_capture")
+_recent_screenshots = TTLCache(maxsize=1, ttl=CAMERA_SHARE_WINDOW)
+
+async def capture_screenshot() -> Screenshot | None:
+    """Captures a frame, adds the weather overlay and saves it to SCREENSHOTS_DIR."""
+    snapshot_uri, rtsp_uri = await get_camera_snapshot()
+    image_content = None
+
+    # 1. Latest frame from the persistent RTSP reader, served from memory
+    if CAMERA_RTSP_READER and rtsp_uri:
+        image_content = await get_rtsp_frame(rtsp_uri)
+    
+    # 2. Try Snapshot URI
+    if not image_content and snapshot_uri:
+        image_content = await camera_http.fetch(snapshot_uri)
+
+    # 3. Fallback to a one-shot RTSP capture
+    if not image_content and rtsp_uri and not CAMERA_RTSP_READER:
+        logger.info("Falling back to RTSP capture...")
+        image_content = await capture_rtsp_frame(rtsp_uri)
+
+    if not image_content:
+        camera_discovery.invalidate("screenshot capture failed")
+        return None
+
+    # 4. Add Weather Overlay
+    image_content = await overlay_weather_on_image(image_content, city_name="Izhevsk")
+
+    # 5. Save
+    # Ensure directory exists
+    SCREENSHOTS_DIR.mkdir(parents=True, exist_ok=True)
+    
+    # Create timestamped filename
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+    filename = f"snapshot_{timestamp}.jpg"
+    filepath = SCREENSHOTS_DIR / filename
+    
+    # Save to disk
+    with open(filepath, "wb") as f:
+        f.write(image_content)
+    logger.info(f"Saved snapshot to {filepath}")
+
+    screenshot = Screenshot(image_content, filename)
+    _recent_screenshots.set("screenshot", screenshot)
+    return screenshot
+
+async def get_shared_screenshot() -> Screenshot | None:
+    """Returns a screenshot from the last CAMERA_SHARE_WINDOW seconds, or joins/starts a capture."""
+    screenshot = _recent_screenshots.get("screenshot")
+    if screenshot is not None:
+        logger.info(f"Reusing screenshot {screenshot.filename}")
+        return screenshot
+    return await _capture_flight.do("screenshot", capture_screenshot)
+
+async def send_screenshot(message: types.Message, screenshot: Screenshot):
+    """
+    Sends a shared screenshot. The first send uploads the bytes; concurrent senders wait for it
+    and then reuse its Telegram file_id (if the upload fails, the next sender uploads instead).
+    """
+    caption = f"🖼️ Camera Snapshot from {CAMERA_IP}\nSaved as: <code>{screenshot.filename}</code>"
+    if screenshot.file_id is None:
+        async with screenshot._upload_lock:
+            if screenshot.file_id is None:
+                photo = BufferedInputFile(screenshot.image, filename=screenshot.filename)
+                sent = await message.answer_photo(photo, caption=caption)
+                if sent and sent.photo:
+                    screenshot.file_id = sent.photo[-1].file_id
+                return
+    await message.answer_photo(screenshot.file_id, caption=caption)
+
 @router.message(Command("camera"))
 async def cmd_camera(message: types.Message, command: CommandObject):
     """Handles the /camera screenshot and /camera video [sec] commands."""
@@ -242,61 +309,9 @@ async def cmd_camera(message: types.Message, command: CommandObject):
         processing_msg = await message.answer("📸 Connecting to camera and capturing screenshot...")
         
         try:
-            snapshot_uri, rtsp_uri = await get_camera_snapshot()
-            image_content = None
-            
-            # 1. Try Snapshot URI
-            if snapshot_uri:
-                def download_image():
-                    try:
-                        response = requests.get(
-                            snapshot_uri, 
-                            auth=HTTPDigestAuth(CAMERA_USER, CAMERA_PASSWORD), 
-                            timeout=10.0,
-                            verify=False
-                        )
-                        if response.status_code == 401:
-                            response = requests.get(
-                                snapshot_uri, 
-                                auth=HTTPBasicAuth(CAMERA_USER, CAMERA_PASSWORD), 
-                                timeout=10.0,
-                                verify=False
-                            )
-                        return response if response.status_code == 200 and response.content else None
-                    except Exception:
-                        return None
-
-                response = await asyncio.to_thread(download_image)
-                if response:
-                    image_content = response.content
-
-            # 2. Fallback to RTSP
-            if not image_content and rtsp_uri:
-                logger.info("Falling back to RTSP capture...")
-                image_content = await capture_rtsp_frame(rtsp_uri)
-
-            # 3. Add Weather Overlay (NEW)
-            if image_content:
-                image_content = await overlay_weather_on_image(image_content, city_name="Izhevsk")
-
-            # 4. Save and Send
-            if image_content:
-                # Ensure directory exists
-                SCREENSHOTS_DIR.mkdir(parents=True, exist_ok=True)
-                
-                # Create timestamped filename
-                timestamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
-                filename = f"snapshot_{timestamp}.jpg"
-                filepath = SCREENSHOTS_DIR / filename
-                
-                # Save to disk
-                with open(filepath, "wb") as f:
-                    f.write(image_content)
-                logger.info(f"Saved snapshot to {filepath}")
-
-                # Send to Telegram
-                photo = BufferedInputFile(image_content, filename=filename)
-                await message.answer_photo(photo, caption=f"🖼️ Camera Snapshot from {CAMERA_IP}\nSaved as: <code>{filename}</code>")
+            screenshot = await get_shared_screenshot()
+            if screenshot:
+                await send_screenshot(message, screenshot)
                 await processing_msg.delete()
             else:
                 await message.answer("❌ Failed to capture image from both Snapshot URI and RTSP stream.")
@@ -339,8 +354,10 @@ async def cmd_camera(message: types.Message, command: CommandObject):
                     await message.answer_video(video, caption=f"🎥 Camera Video from {CAMERA_IP} ({duration}s)\nSaved as: <code>{filename}</code>")
                     await processing_msg.delete()
                 else:
+                    camera_discovery.invalidate("video recording failed")
                     await message.answer("❌ Failed to record video from RTSP stream.")
             else:
+                camera_discovery.invalidate("no RTSP URI")
                 await message.answer("❌ No RTSP stream available for video recording.")
                     
         except Exception as e:
@@ -1,23 +1,30 @@
+import re
 import logging
 from aiogram import Router, types, F
 from aiogram.filters import Command, CommandObject
 from aiogram.utils.keyboard import ReplyKeyboardBuilder
-from database import update_user_status, update_user_location, get_user, get_sharing_users, get_user_by_username
+from config import MAP_NEAR_LIMIT
+from database import run_db, update_user_status, get_user, get_sharing_users, get_user_by_username, get_users_near
+from middlewares.circle_location import LocationWriter
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+# "/map near" or "/map near <km>"; anything else after "near" is a username (a user called
+# "near" is reachable as "/map @near")
+NEAR_PATTERN = re.compile(r"near(?:\s+(\d+(?:[.,]\d+)?))?")
+
 @router.message(Command("share"))
-async def cmd_share(message: types.Message, command: CommandObject):
+async def cmd_share(message: types.Message, command: CommandObject, location_writer: LocationWriter | None = None):
     """Handles the /share [on|off|update|status] command."""
     args = command.args.strip().lower() if command.args else None
     user = message.from_user
     
     try:
         if args == "on":
-            update_user_status(user.id, user.username, user.full_name, True)
+            await run_db(update_user_status, user.id, user.username, user.full_name, True)
             # Check if we already have a location
-            user_record = get_user(user.id)
+            user_record = await run_db(get_user, user.id)
             if user_record and user_record['latitude'] is not None:
                 await message.answer("""Location sharing is now <b>ON</b>. I'll use your last known location. You can send a new location (<code>/share update</code>) anytime to update it.""")
             else:
@@ -28,11 +35,11 @@ async def cmd_share(message: types.Message, command: CommandObject):
                     reply_markup=builder.as_markup(resize_keyboard=True, one_time_keyboard=True)
                 )
         elif args == "off":
-            update_user_status(user.id, user.username, user.full_name, False)
+            await run_db(update_user_status, user.id, user.username, user.full_name, False)
             await message.answer("""Location sharing is now <b>OFF</b>. You won't be visible on the map and won't see others.""")
         elif args == "update":
             # Check if sharing is on
-            user_record = get_user(user.id)
+            user_record = await run_db(get_user, user.id)
             if not user_record or not user_record['is_sharing']:
                 await message.answer("""Please turn on sharing first using <code>/share on</code>.""")
                 return
@@ -44,7 +51,9 @@ async def cmd_share(message: types.Message, command: CommandObject):
                 reply_markup=builder.as_markup(resize_keyboard=True, one_time_keyboard=True)
             )
         elif args == "status":
-            user_record = get_user(user.id)
+            if location_writer:
+                await location_writer.flush_user(user.id)
+            user_record = await run_db(get_user, user.id)
             if not user_record:
                 status = "❌ Not sharing (no record)"
             elif user_record['is_sharing']:
@@ -62,10 +71,13 @@ async def cmd_share(message: types.Message, command: CommandObject):
         await message.answer(f"""Sorry, an error occurred while processing your request: {str(e)}""")
 
 @router.message(Command("map"))
-async def cmd_map(message: types.Message, command: CommandObject):
-    """Handles the /map [list|username] command."""
+async def cmd_map(message: types.Message, command: CommandObject, location_writer: LocationWriter | None = None):
+    """Handles the /map [list|near [km]|username] command."""
+    # A location sent just before /map may still be waiting in the writer
+    if location_writer:
+        await location_writer.flush_user(message.from_user.id)
     # Mutual sharing check
-    user_record = get_user(message.from_user.id)
+    user_record = await run_db(get_user, message.from_user.id)
     if not user_record or not user_record['is_sharing']:
         await message.answer("""You must turn on location sharing (<code>/share on</code>) to see other users.""")
         return
@@ -73,7 +85,7 @@ async def cmd_map(message: types.Message, command: CommandObject):
     args = command.args.strip().lower() if command.args else None
     if not args or args == "list":
         # List sharing users
-        sharing_users = get_sharing_users()
+        sharing_users = await run_db(get_sharing_users)
         # Filter out users without coordinates
         sharing_users = [u for u in sharing_users if u['latitude'] is not None]
         
@@ -87,10 +99,12 @@ async def cmd_map(message: types.Message, command: CommandObject):
             response += f"• @{name} - <code>/map {name}</code>\n"
         
         await message.answer(response)
+    elif near := NEAR_PATTERN.fullmatch(args):
+        await show_nearby_users(message, user_record, near.group(1))
     else:
         # Show specific user location
         target_name = args
-        target = get_user_by_username(target_name)
+        target = await run_db(get_user_by_username, target_name)
         
         if not target:
             await message.answer(f"""Sorry, I couldn't find user @{target_name} in the system.""")
@@ -117,3 +131,35 @@ async def cmd_map(message: types.Message, command: CommandObject):
             f"""<a href='{maps_link}'>View on Google Maps</a>""",
             disable_web_page_preview=False
         )
+
+async def show_nearby_users(message: types.Message, user_record, radius: str | None):
+    """Lists the sharing users nearest to the requester, optionally within a radius in km."""
+    if user_record['latitude'] is None:
+        await message.answer("""Please share your location first (<code>/share update</code>) to find people near you.""")
+        return
+
+    radius_km = None
+    if radius:
+        radius_km = float(radius.replace(",", "."))
+        if not radius_km > 0:
+            await message.answer("""Usage: <code>/map near</code> or <code>/map near [km]</code>, e.g. <code>/map near 5</code>""")
+            return
+
+    nearby = await run_db(
+        get_users_near, user_record['latitude'], user_record['longitude'],
+        MAP_NEAR_LIMIT, radius_km, user_record['user_id']
+    )
+    if not nearby:
+        if radius_km:
+            await message.answer(f"""No one in the circle is within {radius_km:g} km of you.""")
+        else:
+            await message.answer("""No one else in the circle has shared their location yet.""")
+        return
+
+    header = f"within {radius_km:g} km" if radius_km else "nearest to you"
+    response = f"<b>Circle of Friends {header}:</b>\n\n"
+    for distance, u in nearby:
+        name = u['username'] if u['username'] else u['full_name']
+        response += f"• @{name} - {distance:.1f} km - <code>/map {name}</code>\n"
+
+    await message.answer(response)
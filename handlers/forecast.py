@@ -1,15 +1,24 @@
 import logging
-import aiohttp
 from collections import defaultdict
 from datetime import datetime, timezone, timedelta
 from aiogram import Router, types, F
 from aiogram.filters import Command, CommandObject
 from aiogram.utils.keyboard import ReplyKeyboardBuilder
-from config import WEATHER_API_KEY
+from config import WEATHER_API_KEY, WEATHER_CACHE_TTL, WEATHER_CACHE_MAX_ENTRIES, WEATHER_CACHE_GRID_DECIMALS
+from http_client import get_http_session
+from cache import TTLCache, SingleFlight, location_cache_key
 
 router = Router()
 logger = logging.getLogger(__name__)
 
+# OpenWeatherMap data only refreshes every ~10 minutes
+forecast_cache = TTLCache(maxsize=WEATHER_CACHE_MAX_ENTRIES, ttl=WEATHER_CACHE_TTL)
+# Concurrent identical forecast requests share one API call
+forecast_flight = SingleFlight("forecast")
+
+def _location_key(city_name: str = None, lat: float = None, lon: float = None):
+    return location_cache_key(city_name, lat, lon, decimals=WEATHER_CACHE_GRID_DECIMALS)
+
 async def get_forecast(city_name: str = None, lat: float = None, lon: float = None):
     """Fetches 5-day/3-hour forecast from OpenWeatherMap."""
     if not WEATHER_API_KEY:
@@ -25,19 +34,29 @@ async def get_forecast(city_name: str = None, lat: float = None, lon: float = No
     else:
         return None
 
+    cache_key = _location_key(city_name, lat, lon)
+    cached = forecast_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    return await forecast_flight.do(cache_key, _fetch_forecast, cache_key, params)
+
+async def _fetch_forecast(cache_key, params: dict):
+    """Requests forecast data from the API and caches a successful response."""
     url = "https://api.openweathermap.org/data/2.5/forecast"
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_data = await response.json()
-                    logger.error(f"OpenWeatherMap forecast returned status {response.status}: {error_data}")
-                    return None
-        except Exception as e:
-            logger.exception(f"Error fetching forecast for {params.get('q') or (lat, lon)}")
-            return None
+    session = get_http_session()
+    try:
+        async with session.get(url, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                forecast_cache.set(cache_key, data)
+                return data
+            else:
+                error_data = await response.json()
+                logger.error(f"OpenWeatherMap forecast returned status {response.status}: {error_data}")
+                return None
+    except Exception as e:
+        logger.exception(f"Error fetching forecast for {params.get('q') or (params.get('lat'), params.get('lon'))}")
+        return None
 
 def format_forecast_message(data: dict):
     """Formats the forecast data into a readable message."""
@@ -21,7 +21,7 @@ async def cmd_help(message: types.Message):
         "/webcams - Interact with Windy webcams (use /webcams for full help)\n"
         "<b>📍 Circle of Friends:</b>\n"
         "/share [on|off|update|status] - Manage location sharing\n"
-        "/map [list|username] - See mutual friends on a map\n"
+        "/map [list|near [km]|username] - See mutual friends on a map\n"
         "<b>📸 Camera:</b>\n"
         "/camera screenshot - Capture a snapshot from local camera\n"
         "/camera video [sec] - Record a video (default 5s, max 30s)\n"
@@ -4,17 +4,13 @@ from uuid import uuid4
 from aiogram import Router, types
 from aiogram.types import InlineQueryResultArticle, InputTextMessageContent
 from handlers.weather import get_weather, format_weather_message
+from city_index import CityIndex
 
 router = Router()
 logger = logging.getLogger(__name__)
 
-# Load cities from file at startup
-try:
-    with open("cities.txt", "r") as f:
-        CITIES = [line.strip() for line in f.readlines()]
-except FileNotFoundError:
-    logger.warning("cities.txt not found. Autocompletion will be disabled.")
-    CITIES = []
+# Build the city autocompletion index once at startup
+CITY_INDEX = CityIndex.from_file("cities.txt")
 
 @router.inline_query()
 async def inline_weather_handler(inline_query: types.InlineQuery):
@@ -68,7 +64,7 @@ async def inline_weather_handler(inline_query: types.InlineQuery):
                 return
 
     # --- Autocompletion Logic ---
-    matching_cities = [city for city in CITIES if city.lower().startswith(query.lower())][:5]
+    matching_cities = CITY_INDEX.search(query, limit=5)
     
     if matching_cities:
         # Fetch weather for all matching cities concurrently
@@ -1,9 +1,8 @@
-import asyncio
 import logging
 from aiogram import Router, types
 from aiogram.filters import Command, CommandObject
 from config import LOG_NUM_LINES
-from database import get_recent_logs
+from database import run_db, get_recent_logs
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -26,7 +25,7 @@ async def cmd_log(message: types.Message, command: CommandObject):
                 query = " ".join(args)
 
         # Fetch logs from DB
-        logs = await asyncio.to_thread(get_recent_logs, limit, query)
+        logs = await run_db(get_recent_logs, limit, query)
 
         if not logs:
             msg = f"Log database is empty for query: '{query}'" if query else "Log database is empty."
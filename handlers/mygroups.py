@@ -1,8 +1,7 @@
 import logging
-import asyncio
 from aiogram import Router, types
 from aiogram.filters import Command
-from database import get_known_groups
+from database import run_db, get_known_groups
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -11,7 +10,7 @@ logger = logging.getLogger(__name__)
 async def cmd_mygroups(message: types.Message):
     """Handles the /mygroups command to list groups the bot has interacted with."""
     try:
-        groups = await asyncio.to_thread(get_known_groups)
+        groups = await run_db(get_known_groups)
         
         if not groups:
             await message.answer("No known groups found in logs.")
@@ -1,14 +1,23 @@
 import logging
-import aiohttp
 from datetime import datetime, timezone, timedelta
 from aiogram import Router, types, F
 from aiogram.filters import Command, CommandObject
 from aiogram.utils.keyboard import ReplyKeyboardBuilder, InlineKeyboardBuilder
-from config import WEATHER_API_KEY
+from config import WEATHER_API_KEY, WEATHER_CACHE_TTL, WEATHER_CACHE_MAX_ENTRIES, WEATHER_CACHE_GRID_DECIMALS
+from http_client import get_http_session
+from cache import TTLCache, SingleFlight, location_cache_key
 
 router = Router()
 logger = logging.getLogger(__name__)
 
+# OpenWeatherMap data only refreshes every ~10 minutes
+weather_cache = TTLCache(maxsize=WEATHER_CACHE_MAX_ENTRIES, ttl=WEATHER_CACHE_TTL)
+# Concurrent identical requests (e.g. several inline queries for the same city) share one API call
+weather_flight = SingleFlight("weather")
+
+def _location_key(city_name: str = None, lat: float = None, lon: float = None):
+    return location_cache_key(city_name, lat, lon, decimals=WEATHER_CACHE_GRID_DECIMALS)
+
 async def get_weather(city_name: str = None, lat: float = None, lon: float = None):
     """Fetches weather from OpenWeatherMap using city name or coordinates."""
     if not WEATHER_API_KEY:
@@ -24,19 +33,30 @@ async def get_weather(city_name: str = None, lat: float = None, lon: float = Non
     else:
         return None
 
+    # Cache hits are answered here; only misses go through the flight to the API
+    cache_key = _location_key(city_name, lat, lon)
+    cached = weather_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    return await weather_flight.do(cache_key, _fetch_weather, cache_key, params)
+
+async def _fetch_weather(cache_key, params: dict):
+    """Requests weather data from the API and caches a successful response."""
     url = "https://api.openweathermap.org/data/2.5/weather"
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_data = await response.json()
-                    logger.error(f"OpenWeatherMap returned status {response.status}: {error_data}")
-                    return None
-        except Exception as e:
-            logger.exception(f"Error fetching weather for {params.get('q') or (lat, lon)}")
-            return None
+    session = get_http_session()
+    try:
+        async with session.get(url, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                weather_cache.set(cache_key, data)
+                return data
+            else:
+                error_data = await response.json()
+                logger.error(f"OpenWeatherMap returned status {response.status}: {error_data}")
+                return None
+    except Exception as e:
+        logger.exception(f"Error fetching weather for {params.get('q') or (params.get('lat'), params.get('lon'))}")
+        return None
 
 def format_weather_message(data: dict):
     """Formats the OpenWeatherMap data into a detailed, readable message."""
@@ -7,6 +7,8 @@ from aiogram.filters import Command, CommandObject
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 from config import WINDY_API_KEY
 from handlers.weather import get_weather
+from http_client import get_http_session
+from cache import SingleFlight
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -17,6 +19,9 @@ DEFAULT_WEBCAM_RADIUS_KM = 30
 DEFAULT_WEBCAM_LIST_LIMIT = 5
 METADATA_DISPLAY_LIMIT = 50
 
+# Concurrent identical Windy requests share one API call
+windy_flight = SingleFlight("windy")
+
 
 class WindyAPIError(Exception):
     """Base exception for Windy API errors."""
@@ -41,6 +46,11 @@ def handle_webcams_errors(func):
     return wrapper
 
 
+def _windy_key(endpoint: str, params: dict = None):
+    return (endpoint, tuple(sorted((params or {}).items())))
+
+
+@windy_flight.coalesce(_windy_key)
 async def _fetch_windy(endpoint: str, params: dict = None):
     """Helper to fetch data from Windy API."""
     if not WINDY_API_KEY:
@@ -49,21 +59,21 @@ async def _fetch_windy(endpoint: str, params: dict = None):
     headers = {"x-windy-api-key": WINDY_API_KEY}
     url = f"{WINDY_API_URL}{endpoint}"
 
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, headers=headers, params=params, timeout=WINDY_API_TIMEOUT) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Windy API error {response.status} for {url}: {error_text}")
-                    raise WindyAPIError(f"API returned status {response.status}")
-        except (aiohttp.ClientError, asyncio.TimeoutError):
-            logger.exception(f"HTTP client or timeout error fetching Windy API URL: {url}")
-            return None
-        except Exception:
-            logger.exception(f"Unexpected exception fetching Windy API URL: {url}")
-            return None
+    session = get_http_session()
+    try:
+        async with session.get(url, headers=headers, params=params, timeout=WINDY_API_TIMEOUT) as response:
+            if response.status == 200:
+                return await response.json()
+            else:
+                error_text = await response.text()
+                logger.error(f"Windy API error {response.status} for {url}: {error_text}")
+                raise WindyAPIError(f"API returned status {response.status}")
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        logger.exception(f"HTTP client or timeout error fetching Windy API URL: {url}")
+        return None
+    except Exception:
+        logger.exception(f"Unexpected exception fetching Windy API URL: {url}")
+        return None
 
 
 def _parse_list_or_dict(data, key):
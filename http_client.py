@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import aiohttp
+from typing import Awaitable, Callable
+from config import (
+    HTTP_TIMEOUT, HTTP_CONNECT_TIMEOUT, HTTP_LIMIT, HTTP_LIMIT_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT, HTTP_DNS_CACHE_TTL
+)
+
+logger = logging.getLogger(__name__)
+
+_session: aiohttp.ClientSession | None = None
+_session_loop: asyncio.AbstractEventLoop | None = None
+
+def _create_session() -> aiohttp.ClientSession:
+    """Builds a pooled ClientSession with keep-alive and DNS caching."""
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_LIMIT,
+        limit_per_host=HTTP_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        use_dns_cache=True,
+    )
+    timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+def close_on_owner_loop(close: Callable[[], Awaitable], loop: asyncio.AbstractEventLoop | None, name: str):
+    """
+    Closes a client that belongs to another event loop. Async clients can only be closed on their
+    own loop, so the close is scheduled there if that loop is still running; otherwise the client
+    is dropped and its connections are left to the garbage collector.
+    """
+    if loop is not None and loop.is_running() and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(close(), loop)
+        logger.info(f"Closing {name} on its previous event loop")
+    else:
+        logger.warning(f"Dropping {name} from a stopped event loop without closing it")
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    Returns the application-wide HTTP session, creating it on first use.
+    A new session is created if the previous one was closed or belongs to another event loop
+    (e.g. one-shot CLI runs or tests).
+    """
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        if _session is not None and not _session.closed:
+            close_on_owner_loop(_session.close, _session_loop, "shared HTTP session")
+        _session = _create_session()
+        _session_loop = loop
+        logger.info(
+            f"Created shared HTTP session (limit={HTTP_LIMIT}, per_host={HTTP_LIMIT_PER_HOST}, "
+            f"timeout={HTTP_TIMEOUT}s)"
+        )
+    return _session
+
+async def init_http_session() -> aiohttp.ClientSession:
+    """Creates the shared HTTP session. Called once from bot.py on startup."""
+    return get_http_session()
+
+async def close_http_session():
+    """Closes the shared HTTP session and releases pooled connections."""
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("Closed shared HTTP session.")
+    _session = None
+    _session_loop = None
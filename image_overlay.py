@@ -0,0 +1,70 @@
+import io
+import logging
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+# Panel geometry: distance from the top-right corner and padding around the text
+PANEL_MARGIN = 15
+PANEL_PADDING = 8
+LINE_SPACING = 4
+PANEL_FILL = (0, 0, 0, 128)
+TEXT_FILL = (255, 255, 255, 255)
+
+@lru_cache(maxsize=8)
+def load_font(font_path: str, size: int):
+    """Loads a TrueType font once per (path, size), falling back to Pillow's default font."""
+    try:
+        return ImageFont.truetype(font_path, size)
+    except Exception:
+        logger.warning(f"Could not load font at {font_path}, falling back to default.")
+        return ImageFont.load_default()
+
+@lru_cache(maxsize=32)
+def render_panel(text: str, font_path: str, font_size: int = 18) -> Image.Image:
+    """
+    Renders multi-line text on a semi-transparent black box as a small RGBA image.
+    Cached per text, so repeated snapshots with unchanged weather skip text layout entirely.
+    The returned image is shared and must not be modified.
+    """
+    font = load_font(font_path, font_size)
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    bbox = measure.multiline_textbbox((0, 0), text, font=font, spacing=LINE_SPACING)
+    tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+    # The box spans [-padding, size + padding] around the text origin, inclusive
+    panel = Image.new("RGBA", (tw + 2 * PANEL_PADDING + 1, th + 2 * PANEL_PADDING + 1), PANEL_FILL)
+    draw = ImageDraw.Draw(panel)
+    draw.multiline_text((PANEL_PADDING, PANEL_PADDING), text, font=font, fill=TEXT_FILL, spacing=LINE_SPACING)
+    return panel
+
+def render_overlay(
+    image_bytes: bytes,
+    text: str,
+    font_path: str,
+    font_size: int = 18,
+    quality: int = 95,
+    progressive: bool = False,
+    optimize: bool = False
+) -> bytes:
+    """
+    Draws the text panel in the top-right corner of a JPEG and re-encodes it.
+    Only the panel's bounding box is blended (Image.paste with the panel's alpha as mask),
+    so the rest of the frame is never converted to RGBA or composited.
+    """
+    panel = render_panel(text, font_path, font_size)
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        # Ensure it's in RGB (needed for some JPEG variations)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+
+        # Same placement as the text itself: right-aligned PANEL_MARGIN from the top-right corner
+        text_width = panel.width - 2 * PANEL_PADDING - 1
+        x = img.width - text_width - PANEL_MARGIN - PANEL_PADDING
+        y = PANEL_MARGIN - PANEL_PADDING
+        img.paste(panel, (x, y), panel)
+
+        output = io.BytesIO()
+        img.save(output, format="JPEG", quality=quality, progressive=progressive, optimize=optimize)
+        return output.getvalue()
@@ -0,0 +1,114 @@
+import time
+import asyncio
+import logging
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+class ImagingPool:
+    """
+    Bounded thread pool for CPU-bound Pillow work (decode, composite, JPEG encode).
+    At most `workers` jobs run at once and at most `max_pending` are accepted in total
+    (running plus queued); beyond that run() raises asyncio.QueueFull so callers can degrade
+    instead of piling up work. Pillow releases the GIL while decoding and encoding, so
+    threads give real parallelism without pickling frames to another process.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 8, name: str = "imaging"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.name = name
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_queue_wait = 0.0
+        self.total_queue_wait = 0.0
+        self.busy_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+            return self._executor
+
+    @property
+    def queued(self) -> int:
+        """Jobs accepted but not yet started."""
+        return self.pending - self.running
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Runs `func(*args, **kwargs)` on the pool and awaits its result.
+        Raises asyncio.QueueFull if `max_pending` jobs are already running or waiting.
+        """
+        executor = self._get_executor()
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise asyncio.QueueFull(f"{self.name} pool is busy ({self.pending} jobs pending)")
+            self.pending += 1
+        submitted = time.perf_counter()
+        try:
+            future = executor.submit(partial(self._execute, submitted, func, *args, **kwargs))
+        except BaseException:
+            self._job_done(None)
+            raise
+        # The job leaves `pending` when it finishes (or is cancelled before starting), not when
+        # the caller stops waiting: a cancelled caller does not stop a job that is already running
+        future.add_done_callback(self._job_done)
+        return await asyncio.wrap_future(future)
+
+    def _job_done(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    def _execute(self, submitted: float, func: Callable, *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        wait = start - submitted
+        with self._lock:
+            self.running += 1
+            self.total_queue_wait += wait
+            self.max_queue_wait = max(self.max_queue_wait, wait)
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.busy_seconds += time.perf_counter() - start
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        """Returns load and queueing counters."""
+        started = self.completed + self.failed
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_queue_wait_ms": round(self.total_queue_wait / started * 1000, 1) if started else 0.0,
+            "max_queue_wait_ms": round(self.max_queue_wait * 1000, 1),
+            "busy_seconds": round(self.busy_seconds, 3),
+        }
+
+    def shutdown(self):
+        """Waits for running jobs and stops the threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+            logger.info(f"{self.name} pool stopped ({self.stats()})")
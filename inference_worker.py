@@ -0,0 +1,166 @@
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+class InferenceWorker:
+    """
+    Runs a blocking inference function on a dedicated thread, fed by a bounded asyncio queue.
+    Requests that arrive within `batch_window_ms` of each other (up to `max_batch`) are passed
+    to `infer_batch` together. Callers await a future, so the event loop keeps serving other
+    updates while inference runs.
+    """
+
+    def __init__(
+        self,
+        infer_batch: Callable[[list], list],
+        max_batch: int = 4,
+        batch_window_ms: int = 50,
+        max_queue: int = 32,
+        name: str = "inference"
+    ):
+        self.infer_batch = infer_batch
+        self.max_batch = max_batch
+        self.batch_window = batch_window_ms / 1000
+        self.max_queue = max_queue
+        self.name = name
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self.in_flight = 0
+        self.processed = 0
+        self.batches = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for the worker, excluding the batch currently being processed."""
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self):
+        """Starts the worker on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"{self.name} worker started (max_batch={self.max_batch}, window={self.batch_window}s)")
+
+    async def submit(self, item: Any, wait: bool = False) -> Any:
+        """
+        Queues an item and waits for its result. Starts the worker on first use.
+        Raises asyncio.QueueFull if `max_queue` requests are already waiting, unless `wait`
+        is set, in which case it waits for queue space (for work that was already admitted).
+        """
+        if not self.running:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        if wait:
+            await self._queue.put((item, future))
+        else:
+            self._queue.put_nowait((item, future))
+        logger.debug(f"{self.name} queue depth: {self.queue_depth}")
+        return await future
+
+    async def stop(self):
+        """Finishes queued requests and stops the worker thread."""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._executor.shutdown(wait=True)
+        logger.info(f"{self.name} worker stopped ({self.stats()})")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            request = await self._queue.get()
+            if request is None:
+                break
+
+            batch = [request]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                try:
+                    # Take whatever is already queued, then wait briefly for stragglers
+                    if timeout <= 0:
+                        request = self._queue.get_nowait()
+                    else:
+                        request = await asyncio.wait_for(self._queue.get(), timeout)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+
+            await self._process(batch)
+
+    def _infer(self, items: list) -> list:
+        """Runs infer_batch, failing unless it returns exactly one result per item."""
+        results = list(self.infer_batch(items))
+        if len(results) != len(items):
+            raise RuntimeError(f"{self.name} returned {len(results)} results for {len(items)} inputs")
+        return results
+
+    async def _process(self, batch: list[tuple[Any, asyncio.Future]]):
+        loop = asyncio.get_running_loop()
+        # Skip requests whose callers have gone away
+        batch = [(item, future) for item, future in batch if not future.cancelled()]
+        if not batch:
+            return
+
+        items = [item for item, _ in batch]
+        self.in_flight = len(batch)
+        start = time.perf_counter()
+        try:
+            results = await loop.run_in_executor(self._executor, self._infer, items)
+        except Exception as e:
+            if len(batch) == 1:
+                results = [e]
+            else:
+                # Isolate the failing item by retrying one at a time
+                logger.warning(f"{self.name} batch of {len(batch)} failed ({e}), retrying individually")
+                results = []
+                for item in items:
+                    try:
+                        results.extend(await loop.run_in_executor(self._executor, self._infer, [item]))
+                    except Exception as item_error:
+                        results.append(item_error)
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+            self.in_flight = 0
+
+        self.batches += 1
+        for (_, future), result in zip(batch, results, strict=True):
+            if future.cancelled():
+                continue
+            if isinstance(result, Exception):
+                self.failed += 1
+                future.set_exception(result)
+            else:
+                self.processed += 1
+                future.set_result(result)
+        if len(batch) > 1:
+            logger.info(f"{self.name} processed a batch of {len(batch)} in {time.perf_counter() - start:.2f}s")
+
+    def stats(self) -> dict:
+        """Returns queue depth and processed/failed/batch counters."""
+        return {
+            "queued": self.queue_depth,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "batches": self.batches,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 2),
+        }
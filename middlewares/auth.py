@@ -1,4 +1,5 @@
 import os
+import time
 import logging
 from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware
@@ -7,6 +8,8 @@ from aiogram.types import TelegramObject, Message
 logger = logging.getLogger(__name__)
 
 AUTH_FILE = ".auth"
+# How often (seconds) the .auth file is stat()-ed for changes
+AUTH_CHECK_INTERVAL = 5.0
 
 def get_authorized_users() -> set[int]:
     """Reads the authorized user IDs from the .auth file."""
@@ -19,6 +22,45 @@ def get_authorized_users() -> set[int]:
         logger.error(f"Error reading {AUTH_FILE}: {e}")
         return set()
 
+class AuthorizedUsersCache:
+    """
+    Keeps the authorized user IDs in memory and re-reads the .auth file only when its
+    inode, mtime or size changes. The file is checked at most every `check_interval` seconds.
+    The set is replaced as a whole, so readers never observe a partially loaded set.
+    """
+
+    def __init__(self, check_interval: float = AUTH_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._users: frozenset[int] = frozenset()
+        self._signature = None
+        self._next_check = 0.0
+
+    def _file_signature(self):
+        try:
+            st = os.stat(AUTH_FILE)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def reload(self) -> frozenset[int]:
+        """Forces a re-read of the .auth file."""
+        self._signature = self._file_signature()
+        self._users = frozenset(get_authorized_users())
+        self._next_check = time.monotonic() + self.check_interval
+        logger.info(f"Loaded {len(self._users)} authorized users from {AUTH_FILE}")
+        return self._users
+
+    def get(self) -> frozenset[int]:
+        """Returns the current authorized set, reloading it if the file changed."""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            if self._file_signature() != self._signature:
+                return self.reload()
+        return self._users
+
+authorized_users = AuthorizedUsersCache()
+
 class AdminMiddleware(BaseMiddleware):
     async def __call__(
         self,
@@ -33,8 +75,7 @@ class AdminMiddleware(BaseMiddleware):
         if not user:
             return await handler(event, data)
 
-        authorized_users = get_authorized_users()
-        if user.id not in authorized_users:
+        if user.id not in authorized_users.get():
             logger.warning(f"Unauthorized access attempt to {event.text} from user ID: {user.id}")
             await event.answer("You are not authorized to use this command.")
             return
@@ -1,28 +1,93 @@
+import asyncio
 import logging
 from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import Message
-from database import get_user, update_user_location
+from config import LOCATION_FLUSH_INTERVAL_MS
+from database import run_db, is_user_sharing, update_user_locations
 
 logger = logging.getLogger(__name__)
 
+class LocationWriter:
+    """
+    Coalesces location updates and persists them off the event loop.
+    Only the latest position per user within `flush_interval_ms` is written.
+    Handlers that read a user's own location call flush_user() first, so they never serve a
+    position older than one the user already sent.
+    """
+
+    def __init__(self, flush_interval_ms: int = LOCATION_FLUSH_INTERVAL_MS):
+        self.flush_interval = flush_interval_ms / 1000
+        self._pending: dict[int, tuple[float, float]] = {}
+        self._flush_task: asyncio.Task | None = None
+        # Serializes writes so a flush can wait for one that is already in progress
+        self._write_lock = asyncio.Lock()
+        self.coalesced = 0
+
+    def submit(self, user_id: int, latitude: float, longitude: float):
+        """Schedules a location write, replacing any pending position for the same user."""
+        if user_id in self._pending:
+            self.coalesced += 1
+        self._pending[user_id] = (latitude, longitude)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Updates submitted while a flush is in progress see this task still running and do not
+        # schedule their own, so keep flushing until nothing is left
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            if not self._pending:
+                return
+
+    async def flush(self):
+        """Writes all pending positions in one transaction."""
+        async with self._write_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            try:
+                await run_db(
+                    update_user_locations,
+                    [(user_id, lat, lon) for user_id, (lat, lon) in pending.items()]
+                )
+            except Exception as e:
+                logger.error(f"Failed to persist {len(pending)} location updates: {e}")
+
+    async def flush_user(self, user_id: int):
+        """
+        Makes sure `user_id`'s latest position is in the database before it is read: writes it
+        now if it is pending, or waits for a write in progress that may contain it.
+        """
+        if user_id in self._pending or self._write_lock.locked():
+            await self.flush()
+
 class CircleLocationMiddleware(BaseMiddleware):
+    def __init__(self, writer: LocationWriter | None = None):
+        self.writer = writer or LocationWriter()
+
     async def __call__(
         self,
         handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
         event: Message,
         data: Dict[str, Any]
     ) -> Any:
+        # Handlers that read the sender's own location flush their pending update first
+        data["location_writer"] = self.writer
+
         # Check if message contains a location
         if isinstance(event, Message) and event.location:
             user = event.from_user
-            if user:
-                user_record = get_user(user.id)
-                # Only update if the user has opted in to sharing
-                if user_record and user_record['is_sharing']:
-                    lat = event.location.latitude
-                    lon = event.location.longitude
-                    update_user_location(user.id, lat, lon)
-                    logger.info(f"Middleware updated location for user {user.id} (@{user.username})")
+            # Only update if the user has opted in to sharing (in-memory check, no DB I/O)
+            if user and is_user_sharing(user.id):
+                lat = event.location.latitude
+                lon = event.location.longitude
+                self.writer.submit(user.id, lat, lon)
+                logger.info(f"Middleware queued location update for user {user.id} (@{user.username})")
 
         return await handler(event, data)
+
+    async def flush(self):
+        """Persists any pending location updates. Called on shutdown."""
+        await self.writer.flush()
@@ -4,10 +4,125 @@ import time
 from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
-from config import BOT_VERSION
-from database import add_interaction_log
+from config import BOT_VERSION, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL_MS, LOG_QUEUE_SIZE
+from database import run_db, add_interaction_log, add_interaction_logs, LOG_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+class InteractionLogSink:
+    """
+    Buffers interaction log rows in a bounded queue and writes them in batches.
+    A batch is flushed with a single executemany transaction every `batch_size` rows
+    or `flush_interval_ms` milliseconds, whichever comes first. When the queue is full,
+    new rows are dropped and counted instead of blocking the update pipeline.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = LOG_BATCH_SIZE,
+        flush_interval_ms: int = LOG_FLUSH_INTERVAL_MS,
+        max_queue: int = LOG_QUEUE_SIZE
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_queue = max_queue
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Starts the background writer on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Interaction log sink started (batch={self.batch_size}, interval={self.flush_interval}s)")
+
+    def submit(self, row: tuple) -> bool:
+        """Queues a row ordered as LOG_COLUMNS. Returns False if it had to be dropped."""
+        if not self.running:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            # Avoid flooding the log during a burst
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Interaction log queue is full, dropped {self.dropped} rows so far")
+            return False
+
+    async def stop(self):
+        """Flushes all queued rows and stops the writer."""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        logger.info(f"Interaction log sink stopped (written={self.written}, dropped={self.dropped}, failed={self.failed})")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            row = await self._queue.get()
+            if row is None:
+                break
+
+            batch = [row]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+
+            await self._flush(batch)
+
+        # Drain anything that raced in before the stop sentinel was processed
+        remaining = []
+        while not self._queue.empty():
+            row = self._queue.get_nowait()
+            if row is not None:
+                remaining.append(row)
+        await self._flush(remaining)
+
+    async def _flush(self, batch: list[tuple]):
+        if not batch:
+            return
+        try:
+            await run_db(add_interaction_logs, batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} interaction log rows: {e}")
+
+    def stats(self) -> dict:
+        """Returns queue depth and written/dropped/failed counters."""
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
 
 class InteractionLoggingMiddleware(BaseMiddleware):
+    def __init__(self, sink: InteractionLogSink | None = None):
+        self.sink = sink
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
@@ -55,9 +170,7 @@ class InteractionLoggingMiddleware(BaseMiddleware):
         end_time = time.perf_counter()
         duration_ms = (end_time - start_time) * 1000
         
-        # Log to SQLite (asynchronously to avoid blocking)
-        asyncio.create_task(asyncio.to_thread(
-            add_interaction_log,
+        log_entry = dict(
             user_id=user.id,
             username=user.username,
             full_name=user.full_name,
@@ -69,6 +182,13 @@ class InteractionLoggingMiddleware(BaseMiddleware):
             duration_ms=duration_ms,
             bot_version=BOT_VERSION,
             chat_username=getattr(chat, "username", None) if chat else None
-        ))
-        
+        )
+
+        if self.sink is not None and self.sink.running:
+            # Batched write through the background sink
+            self.sink.submit(tuple(log_entry[column] for column in LOG_COLUMNS))
+        else:
+            # Log to SQLite (asynchronously to avoid blocking)
+            asyncio.create_task(run_db(add_interaction_log, **log_entry))
+
         return result
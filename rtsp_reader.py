@@ -0,0 +1,165 @@
+import time
+import asyncio
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BINARY = "ffmpeg"
+READ_CHUNK_SIZE = 64 * 1024
+# JPEG start/end-of-image markers. 0xFF bytes inside entropy-coded data are always followed
+# by 0x00, so an end marker can only occur at the end of a frame.
+JPEG_SOI = b"\xff\xd8"
+JPEG_EOI = b"\xff\xd9"
+# Keep only the tail of ffmpeg's stderr for error messages
+STDERR_TAIL_BYTES = 4096
+
+def split_jpeg_frames(buffer: bytearray) -> list[bytes]:
+    """Removes and returns the complete JPEG images at the start of `buffer`; a partial frame stays in it."""
+    frames = []
+    while True:
+        start = buffer.find(JPEG_SOI)
+        if start < 0:
+            buffer.clear()
+            return frames
+        end = buffer.find(JPEG_EOI, start + 2)
+        if end < 0:
+            del buffer[:start]
+            return frames
+        frames.append(bytes(buffer[start:end + 2]))
+        del buffer[:end + 2]
+
+class RTSPFrameReader:
+    """
+    Keeps one RTSP connection open with a long-running ffmpeg process that re-encodes the
+    stream to JPEG at `fps` frames per second. The last `buffer_frames` frames are kept in a
+    ring buffer so snapshots are served from memory. The reader starts on the first request
+    and stops after `idle_timeout` seconds without one; if ffmpeg exits (camera reboot,
+    network drop) the next request reconnects.
+    """
+
+    def __init__(self, uri: str, fps: float = 2, buffer_frames: int = 4, idle_timeout: float = 300):
+        self.uri = uri
+        self.fps = fps
+        self.idle_timeout = idle_timeout
+        self.frames: deque[tuple[float, bytes]] = deque(maxlen=max(1, buffer_frames))
+        self._process: asyncio.subprocess.Process | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._new_frame = asyncio.Event()
+        self._last_request = 0.0
+        self._stderr_tail = bytearray()
+        self.connects = 0
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    def latest_frame(self, max_age: float | None = None) -> bytes | None:
+        """Returns the newest buffered frame, or None if there is none (or it is older than `max_age` seconds)."""
+        if not self.frames:
+            return None
+        captured_at, frame = self.frames[-1]
+        if max_age is not None and time.monotonic() - captured_at > max_age:
+            return None
+        return frame
+
+    async def get_frame(self, max_age: float = 2.0, timeout: float = 10.0) -> bytes | None:
+        """
+        Returns a frame captured within the last `max_age` seconds, starting the reader and
+        waiting up to `timeout` seconds for the first frame if needed. Returns None on timeout.
+        """
+        self._last_request = time.monotonic()
+        if not self.running:
+            await self.start()
+        frame = self.latest_frame(max_age)
+        if frame is not None:
+            return frame
+
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            self._new_frame.clear()
+            try:
+                await asyncio.wait_for(self._new_frame.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+            frame = self.latest_frame(max_age)
+            if frame is not None:
+                return frame
+            if not self.running:
+                break
+        if not self.running:
+            logger.error(f"RTSP reader stopped: {self._stderr_tail.decode(errors='replace').strip() or 'no output'}")
+        return None
+
+    async def start(self):
+        """Spawns ffmpeg and the reader tasks (no-op if already running)."""
+        if self.running:
+            return
+        await self.stop()
+        command = [
+            FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error",
+            "-rtsp_transport", "tcp",
+            "-timeout", "5000000",  # 5 seconds timeout for RTSP connection
+            "-i", self.uri,
+            "-an", "-vf", f"fps={self.fps}",
+            "-f", "image2pipe", "-vcodec", "mjpeg", "-q:v", "3",
+            "pipe:1"
+        ]
+        logger.info(f"Starting RTSP reader for {self.uri.split('@')[-1]}")
+        self._stderr_tail.clear()
+        self._process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        self.connects += 1
+        self._tasks = [
+            asyncio.create_task(self._read_frames(self._process)),
+            asyncio.create_task(self._read_errors(self._process)),
+            asyncio.create_task(self._watch_idle()),
+        ]
+
+    async def stop(self):
+        """Terminates ffmpeg and the reader tasks. Buffered frames are dropped."""
+        # Detach before awaiting anything, so a request arriving while the old process shuts
+        # down sees the reader as stopped and starts a new one instead of waiting on this one
+        current = asyncio.current_task()
+        tasks = [task for task in self._tasks if task is not current]
+        process, self._process = self._process, None
+        self._tasks = []
+        self.frames.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    async def _read_frames(self, process: asyncio.subprocess.Process):
+        buffer = bytearray()
+        while chunk := await process.stdout.read(READ_CHUNK_SIZE):
+            buffer.extend(chunk)
+            frames = split_jpeg_frames(buffer)
+            if frames:
+                now = time.monotonic()
+                self.frames.extend((now, frame) for frame in frames)
+                self._new_frame.set()
+        await process.wait()
+        logger.warning(f"RTSP reader ffmpeg exited with code {process.returncode}")
+        # Wake up waiters so they notice the reader is gone
+        self._new_frame.set()
+
+    async def _read_errors(self, process: asyncio.subprocess.Process):
+        while chunk := await process.stderr.read(READ_CHUNK_SIZE):
+            self._stderr_tail.extend(chunk)
+            del self._stderr_tail[:-STDERR_TAIL_BYTES]
+
+    async def _watch_idle(self):
+        while True:
+            idle = time.monotonic() - self._last_request
+            if idle >= self.idle_timeout:
+                logger.info(f"Stopping RTSP reader after {idle:.0f}s without requests")
+                await self.stop()
+                return
+            await asyncio.sleep(min(self.idle_timeout - idle, 30))
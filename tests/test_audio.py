@@ -1,9 +1,16 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from aiogram.types import Message, Voice, Audio, User
-from handlers.audio import handle_audio_message
+from handlers.audio import handle_audio_message, BUSY_TEXT
+from database import close_connections
 from pathlib import Path
 
+@pytest.fixture(autouse=True)
+def transcription_cache_db(tmp_path):
+    with patch("transcription_cache.TRANSCRIPTION_CACHE_PATH", tmp_path / "transcriptions.db"):
+        yield
+    close_connections()
+
 @pytest.mark.asyncio
 async def test_handle_voice_message():
     # Mock message and bot
@@ -12,6 +19,8 @@ async def test_handle_voice_message():
     message.answer = AsyncMock()
     message.voice = MagicMock(spec=Voice)
     message.voice.file_id = "voice_file_id"
+    message.voice.file_unique_id = "voice_unique_id"
+    message.voice.duration = 5
     message.audio = None
     
     # Mock from_user and chat
@@ -32,12 +41,14 @@ async def test_handle_voice_message():
     file_info.file_path = "path/to/voice.ogg"
     bot.get_file.return_value = file_info
     
-    # Mock Whisper pipeline and load_audio
+    # Mock Whisper pipeline and the streaming download/decode
     with (
         patch("handlers.audio.pipe") as mock_pipe,
-        patch("handlers.audio.load_audio") as mock_load_audio
+        patch("handlers.audio.fetch_audio", new_callable=AsyncMock) as mock_fetch_audio,
+        patch("handlers.audio.FFMPEG_AVAILABLE", True),
+        patch("handlers.audio.VAD_ENABLED", False)
     ):
-        mock_load_audio.return_value = "mock_audio_data"
+        mock_fetch_audio.return_value = "mock_audio_data"
         mock_pipe.return_value = {"text": "Hello world"}
         
         # Mock directory creation and file writing
@@ -49,10 +60,11 @@ async def test_handle_voice_message():
             
             await handle_audio_message(message)
             
-            # Verify pipeline was called
+            # Verify the file was streamed and the pipeline was called
+            mock_fetch_audio.assert_awaited_once()
             mock_pipe.assert_called_once_with("mock_audio_data")
             # Verify response was sent
-            message.reply.assert_called_once_with("🎤 Transcription for Test User:\n\nHello world")
+            message.reply.assert_called_once_with("🎤 Transcription for Test User:\n\n<blockquote expandable>Hello world</blockquote>")
 
 @pytest.mark.asyncio
 async def test_handle_audio_file():
@@ -63,7 +75,9 @@ async def test_handle_audio_file():
     message.voice = None
     message.audio = MagicMock(spec=Audio)
     message.audio.file_id = "audio_file_id"
+    message.audio.file_unique_id = "audio_unique_id"
     message.audio.file_name = "test.mp3"
+    message.audio.duration = 120
     
     # Mock from_user and chat
     mock_user = MagicMock(spec=User)
@@ -83,12 +97,14 @@ async def test_handle_audio_file():
     file_info.file_path = "path/to/test.mp3"
     bot.get_file.return_value = file_info
     
-    # Mock Whisper pipeline and load_audio
+    # Mock Whisper pipeline and the streaming download/decode
     with (
         patch("handlers.audio.pipe") as mock_pipe,
-        patch("handlers.audio.load_audio") as mock_load_audio
+        patch("handlers.audio.fetch_audio", new_callable=AsyncMock) as mock_fetch_audio,
+        patch("handlers.audio.FFMPEG_AVAILABLE", True),
+        patch("handlers.audio.VAD_ENABLED", False)
     ):
-        mock_load_audio.return_value = "mock_audio_data"
+        mock_fetch_audio.return_value = "mock_audio_data"
         mock_pipe.return_value = {"text": "Audio transcription test"}
         
         # Mock directory creation and file writing
@@ -99,7 +115,416 @@ async def test_handle_audio_file():
             
             await handle_audio_message(message)
             
-            # Verify pipeline was called
+            # Verify the file was streamed and the pipeline was called
+            mock_fetch_audio.assert_awaited_once()
             mock_pipe.assert_called_once_with("mock_audio_data")
             # Verify response was sent
-            message.reply.assert_called_once_with("🎤 Transcription for Test User:\n\nAudio transcription test")
+            message.reply.assert_called_once_with("🎤 Transcription for Test User:\n\n<blockquote expandable>Audio transcription test</blockquote>")
+
+def test_module_import_does_not_load_model():
+    import os
+    import sys
+    import subprocess
+    # A fresh interpreter, so modules imported by other tests do not interfere
+    code = "import sys, handlers.audio as a; print(a.model_state, 'transformers' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=Path(__file__).parent.parent, env={**os.environ, "BOT_TOKEN": os.environ.get("BOT_TOKEN", "test")}
+    )
+    assert result.stdout.split() == ["not_loaded", "False"]
+
+@pytest.mark.asyncio
+async def test_failed_model_load_is_reported():
+    import sys
+    import handlers.audio as audio
+
+    message = AsyncMock(spec=Message)
+    message.answer = AsyncMock()
+    with (
+        patch.object(audio, "pipe", None),
+        patch.object(audio, "model_state", "not_loaded"),
+        patch.object(audio, "model_error", None),
+        patch.object(audio, "_failed_at", None),
+        # Make the transformers import fail without touching the network
+        patch.dict(sys.modules, {"transformers": None})
+    ):
+        assert audio.load_pipeline() is None
+        assert audio.model_state == "failed"
+        with pytest.raises(RuntimeError, match="could not be loaded"):
+            audio.transcribe_batch(["audio"])
+
+        await handle_audio_message(message)
+        message.answer.assert_called_once_with("Error: Whisper model not loaded. Transcription is unavailable.")
+
+def test_failed_model_load_is_retried_after_backoff():
+    import handlers.audio as audio
+
+    mock_pipe = MagicMock()
+    with (
+        patch.object(audio, "pipe", None),
+        patch.object(audio, "model_state", "not_loaded"),
+        patch.object(audio, "model_error", None),
+        patch.object(audio, "_failed_at", None),
+        patch.object(audio, "WHISPER_RETRY_SECONDS", 60),
+        patch("handlers.audio.build_pipeline", side_effect=[RuntimeError("GPU busy"), mock_pipe]) as mock_build,
+        patch("handlers.audio.whisper_ov_config", return_value={})
+    ):
+        assert audio.load_pipeline() is None
+        # Within the backoff the failure is remembered without another load attempt
+        assert audio.model_unavailable()
+        assert audio.load_pipeline() is None
+        assert mock_build.call_count == 1
+
+        audio._failed_at -= 61
+        assert not audio.model_unavailable()
+        assert audio.load_pipeline() is mock_pipe
+        assert audio.model_state == "ready"
+        assert mock_build.call_count == 2
+
+def test_transcribe_batch_loads_pipeline_lazily():
+    import handlers.audio as audio
+
+    mock_pipe = MagicMock(return_value={"text": "hi"})
+    with (
+        patch.object(audio, "pipe", None),
+        patch.object(audio, "load_pipeline", return_value=mock_pipe) as mock_load
+    ):
+        assert audio.transcribe_batch(["audio"]) == [{"text": "hi"}]
+        mock_load.assert_called_once()
+
+def test_whisper_model_id_and_ov_config():
+    from handlers.audio import whisper_model_id, whisper_ov_config
+
+    assert whisper_model_id("small", "fp16") == "OpenVINO/whisper-small-fp16-ov"
+    with pytest.raises(ValueError, match="model size"):
+        whisper_model_id("huge", "int8")
+
+    assert whisper_ov_config("throughput", "2", "ov_cache") == {
+        "PERFORMANCE_HINT": "THROUGHPUT", "NUM_STREAMS": "2", "CACHE_DIR": "ov_cache"
+    }
+    # Empty stream count and cache dir leave the device defaults alone
+    assert whisper_ov_config("LATENCY", "", "") == {"PERFORMANCE_HINT": "LATENCY"}
+    with pytest.raises(ValueError, match="performance hint"):
+        whisper_ov_config("FAST", "", "")
+
+def test_build_pipeline_falls_back_to_next_device():
+    import sys
+    import handlers.audio as audio
+
+    transformers = MagicMock()
+    openvino = MagicMock()
+    model = MagicMock()
+    openvino.OVModelForSpeechSeq2Seq.from_pretrained.side_effect = [RuntimeError("no GPU"), model]
+    modules = {"transformers": transformers, "optimum": MagicMock(), "optimum.intel": MagicMock(), "optimum.intel.openvino": openvino}
+    with patch.dict(sys.modules, modules):
+        result = audio.build_pipeline("OpenVINO/whisper-tiny-int8-ov", ["GPU", "CPU"], {"PERFORMANCE_HINT": "LATENCY"})
+
+    assert result is transformers.pipeline.return_value
+    devices = [call.kwargs["device"] for call in openvino.OVModelForSpeechSeq2Seq.from_pretrained.call_args_list]
+    assert devices == ["GPU", "CPU"]
+    assert transformers.pipeline.call_args.kwargs["model"] is model
+
+@pytest.mark.asyncio
+async def test_long_voice_message_is_transcribed_progressively():
+    import numpy as np
+
+    message = AsyncMock(spec=Message)
+    sent = AsyncMock()
+    message.reply = AsyncMock(return_value=sent)
+    message.voice = MagicMock(spec=Voice)
+    message.voice.file_id = "voice_file_id"
+    message.voice.file_unique_id = "voice_unique_id"
+    message.voice.duration = 75
+    message.audio = None
+    message.from_user = MagicMock(spec=User)
+    message.from_user.id = 12345
+    message.from_user.username = "testuser"
+    message.from_user.full_name = "Test User"
+    message.chat = MagicMock()
+    message.chat.title = "Test Group"
+    message.bot = AsyncMock()
+    message.bot.get_file.return_value = MagicMock(file_path="path/to/voice.ogg")
+
+    # 75 seconds of audio -> three 30s chunks
+    audio_data = np.zeros(16000 * 75, dtype=np.float32)
+    with (
+        patch("handlers.audio.pipe", side_effect=[{"text": "One."}, {"text": "Two."}, {"text": "Three."}]) as mock_pipe,
+        patch("handlers.audio.fetch_audio", new_callable=AsyncMock, return_value=audio_data),
+        patch("handlers.audio.FFMPEG_AVAILABLE", True),
+        patch("handlers.audio.TRANSCRIPTION_EDIT_INTERVAL", 0),
+        patch("handlers.audio.VAD_ENABLED", False),
+        patch("pathlib.Path.mkdir"),
+        patch("builtins.open", MagicMock())
+    ):
+        await handle_audio_message(message)
+
+    lengths = [len(call.args[0]) for call in mock_pipe.call_args_list]
+    assert len(lengths) == 3 and sum(lengths) == 16000 * 75
+    assert all(length <= 16000 * 30 for length in lengths)
+    # First chunk's text is sent as soon as it is ready, then the same message is edited
+    message.reply.assert_called_once()
+    assert "One. …" in message.reply.call_args.args[0]
+    assert "1/3" in message.reply.call_args.args[0]
+    edits = [call.args[0] for call in sent.edit_text.call_args_list]
+    assert "One. Two. …" in edits[0]
+    assert edits[-1] == "🎤 Transcription for Test User:\n\n<blockquote expandable>One. Two. Three.</blockquote>"
+
+@pytest.mark.asyncio
+async def test_progressive_reply_rate_limits_edits():
+    from handlers.audio import ProgressiveReply
+
+    message = AsyncMock(spec=Message)
+    sent = AsyncMock()
+    message.reply = AsyncMock(return_value=sent)
+    reply = ProgressiveReply(message, min_interval=0.2)
+
+    await reply.update("a")
+    await reply.update("a b")
+    await reply.update("a b c")
+    await reply.finish("a b c d")
+
+    message.reply.assert_called_once_with("a")
+    # Intermediate updates within the interval are dropped, the final text is delivered
+    sent.edit_text.assert_called_once_with("a b c d")
+
+@pytest.mark.asyncio
+async def test_progressive_reply_only_ignores_not_modified_errors():
+    from aiogram.exceptions import TelegramBadRequest
+    from handlers.audio import ProgressiveReply
+
+    message = AsyncMock(spec=Message)
+    sent = AsyncMock()
+    message.reply = AsyncMock(return_value=sent)
+    reply = ProgressiveReply(message, min_interval=0)
+
+    await reply.update("a")
+    sent.edit_text.side_effect = TelegramBadRequest(method=MagicMock(), message="Bad Request: message is not modified")
+    await reply.update("a ")
+
+    sent.edit_text.side_effect = TelegramBadRequest(method=MagicMock(), message="Bad Request: MESSAGE_TOO_LONG")
+    with pytest.raises(TelegramBadRequest):
+        await reply.finish("a b")
+
+def test_transcription_messages_split_long_text():
+    from handlers.audio import transcription_messages, MESSAGE_TEXT_LIMIT
+
+    words = " ".join(f"word{i}" for i in range(2000))
+    parts = transcription_messages("🎤 Transcription for Test User:", words)
+    assert len(parts) == 5
+    assert parts[0].startswith("🎤 Transcription for Test User:\n\n<blockquote expandable>word0 ")
+    assert all(part.endswith("</blockquote>") and len(part) < 4096 for part in parts)
+    # Cuts fall between words and no text is lost
+    texts = [part.split("<blockquote expandable>")[1].removesuffix("</blockquote>") for part in parts]
+    assert all(len(text) <= MESSAGE_TEXT_LIMIT for text in texts)
+    assert " ".join(texts) == words
+
+@pytest.mark.asyncio
+async def test_long_transcription_is_sent_as_follow_up_messages():
+    words = " ".join(f"word{i}" for i in range(1000))
+    message = make_voice_message()
+    with (
+        patch("handlers.audio.pipe", return_value={"text": words}),
+        patch("handlers.audio.fetch_audio", new_callable=AsyncMock, return_value="mock_audio_data"),
+        patch("handlers.audio.FFMPEG_AVAILABLE", True),
+        patch("handlers.audio.VAD_ENABLED", False),
+        patch("pathlib.Path.mkdir"),
+        patch("builtins.open", MagicMock())
+    ):
+        await handle_audio_message(message)
+
+    replies = [call.args[0] for call in message.reply.call_args_list]
+    assert len(replies) == 3
+    assert replies[0].startswith("🎤 Transcription for Test User:")
+    assert replies[1].startswith("<blockquote expandable>word")
+    assert all(len(reply) < 4096 for reply in replies)
+
+@pytest.mark.asyncio
+async def test_silent_voice_message_skips_inference():
+    import numpy as np
+
+    message = AsyncMock(spec=Message)
+    message.reply = AsyncMock()
+    message.voice = MagicMock(spec=Voice)
+    message.voice.file_id = "voice_file_id"
+    message.voice.file_unique_id = "voice_unique_id"
+    message.voice.duration = 10
+    message.audio = None
+    message.from_user = MagicMock(spec=User)
+    message.from_user.id = 12345
+    message.from_user.username = "testuser"
+    message.from_user.full_name = "Test User"
+    message.chat = MagicMock()
+    message.chat.title = "Test Group"
+    message.bot = AsyncMock()
+    message.bot.get_file.return_value = MagicMock(file_path="path/to/voice.ogg")
+
+    with (
+        patch("handlers.audio.pipe") as mock_pipe,
+        patch("handlers.audio.fetch_audio", new_callable=AsyncMock, return_value=np.zeros(16000 * 10, dtype=np.float32)),
+        patch("handlers.audio.FFMPEG_AVAILABLE", True),
+        patch("handlers.audio.VAD_ENABLED", True),
+        patch("pathlib.Path.mkdir"),
+        patch("builtins.open", MagicMock())
+    ):
+        await handle_audio_message(message)
+
+    mock_pipe.assert_not_called()
+    message.reply.assert_called_once_with("🎤 Transcription for Test User:\n\n<blockquote expandable>[No speech detected]</blockquote>")
+
+def make_voice_message(file_unique_id="voice_unique_id", duration=5):
+    message = AsyncMock(spec=Message)
+    message.reply = AsyncMock()
+    message.answer = AsyncMock()
+    message.voice = MagicMock(spec=Voice)
+    message.voice.file_id = "voice_file_id"
+    message.voice.file_unique_id = file_unique_id
+    message.voice.duration = duration
+    message.audio = None
+    message.from_user = MagicMock(spec=User)
+    message.from_user.id = 12345
+    message.from_user.username = "testuser"
+    message.from_user.full_name = "Test User"
+    message.chat = MagicMock()
+    message.chat.title = "Test Group"
+    message.bot = AsyncMock()
+    message.bot.get_file.return_value = MagicMock(file_path="path/to/voice.ogg")
+    return message
+
+@pytest.mark.asyncio
+async def test_repeated_voice_messages_are_served_from_cache():
+    async def fake_fetch(bot, file_path, duration, archive_path, digest):
+        digest.update(b"same voice note bytes")
+        return "mock_audio_data"
+
+    with (
+        patch("handlers.audio.pipe", return_value={"text": "Hello again"}) as mock_pipe,
+        patch("handlers.audio.fetch_audio", side_effect=fake_fetch) as mock_fetch,
+        patch("handlers.audio.FFMPEG_AVAILABLE", True),
+        patch("handlers.audio.VAD_ENABLED", False),
+        patch("pathlib.Path.mkdir"),
+        patch("builtins.open", MagicMock())
+    ):
+        first = make_voice_message()
+        await handle_audio_message(first)
+
+        # A forwarded copy: same file_unique_id, answered without download or inference
+        forwarded = make_voice_message()
+        await handle_audio_message(forwarded)
+        forwarded.bot.get_file.assert_not_called()
+
+        # A re-upload: new file_unique_id, same bytes, answered without inference
+        reuploaded = make_voice_message(file_unique_id="other_unique_id")
+        await handle_audio_message(reuploaded)
+
+    expected = "🎤 Transcription for Test User:\n\n<blockquote expandable>Hello again</blockquote>"
+    for message in (first, forwarded, reuploaded):
+        message.reply.assert_called_once_with(expected)
+    mock_pipe.assert_called_once()
+    assert mock_fetch.call_count == 2
+
+    from handlers.audio import MODEL_ID
+    from transcription_cache import get_cached_transcription, file_key
+    assert get_cached_transcription(file_key("other_unique_id"), model=MODEL_ID) == "Hello again"
+    # Text from another model is not reused
+    assert get_cached_transcription(file_key("other_unique_id"), model="other-model") is None
+
+def test_split_audio_cuts_at_pauses():
+    import numpy as np
+    from handlers.audio import split_audio
+
+    t = np.arange(16000 * 28) / 16000
+    speech = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    pause = np.zeros(16000 // 2, dtype=np.float32)
+    audio = np.concatenate([speech, pause, speech])
+
+    chunks = split_audio(audio, 30)
+    # The cut falls in the pause at 28 s instead of mid-word at 30 s
+    assert 28 * 16000 <= len(chunks[0]) <= 28.5 * 16000
+    assert sum(len(chunk) for chunk in chunks) == len(audio)
+    # Short clips are passed through as a single chunk
+    assert len(split_audio(audio[:16000], 30)) == 1
+
+@pytest.mark.asyncio
+async def test_queue_full_only_rejects_new_voice_messages():
+    import asyncio
+    import numpy as np
+
+    message = make_voice_message(duration=75)
+    sent = AsyncMock()
+    message.reply = AsyncMock(return_value=sent)
+    audio = np.zeros(16000 * 75, dtype=np.float32)
+
+    with (
+        patch("handlers.audio.fetch_audio", new_callable=AsyncMock, return_value=audio),
+        patch("handlers.audio.FFMPEG_AVAILABLE", True),
+        patch("handlers.audio.TRANSCRIPTION_EDIT_INTERVAL", 0),
+        patch("handlers.audio.VAD_ENABLED", False),
+        patch("pathlib.Path.mkdir"),
+        patch("builtins.open", MagicMock())
+    ):
+        # A full queue turns the message away before anything is shown
+        with patch("handlers.audio.transcriber.submit", new_callable=AsyncMock, side_effect=asyncio.QueueFull()):
+            await handle_audio_message(message)
+        message.reply.assert_called_once_with(BUSY_TEXT)
+
+        # Once the first chunk is admitted, the remaining chunks wait for queue space
+        message.reply.reset_mock()
+        with patch("handlers.audio.transcriber.submit", new_callable=AsyncMock, side_effect=[{"text": "One."}, {"text": "Two."}, {"text": "Three."}]) as mock_submit:
+            await handle_audio_message(make_voice_message(file_unique_id="other", duration=75) if False else message)
+        assert [call.kwargs["wait"] for call in mock_submit.call_args_list] == [False, True, True]
+        assert sent.edit_text.call_args.args[0].endswith("One. Two. Three.</blockquote>")
+
+def test_transcription_cache_creates_missing_directory(tmp_path):
+    from transcription_cache import get_cached_transcription, store_transcription, file_key
+
+    path = tmp_path / "missing" / "transcriptions.db"
+    with patch("transcription_cache.TRANSCRIPTION_CACHE_PATH", path):
+        store_transcription([file_key("abc")], "Hello", "model-a")
+        assert get_cached_transcription(file_key("abc"), model="model-a") == "Hello"
+    assert path.exists()
+
+@pytest.mark.asyncio
+async def test_fetch_audio_retries_from_archive_when_pipe_decode_fails(tmp_path):
+    import numpy as np
+    from handlers.audio import fetch_audio
+
+    archive = tmp_path / "voice.m4a"
+    archive.write_bytes(b"archived")
+    bot = MagicMock()
+    bot.session.api.is_local = False
+    decoded = np.zeros(16000, dtype=np.float32)
+
+    with patch("handlers.audio.decode_audio_stream", new_callable=AsyncMock, side_effect=[RuntimeError("moov atom not found"), decoded]) as mock_decode:
+        audio = await fetch_audio(bot, "path/to/voice.m4a", 1, archive)
+
+    assert audio is decoded
+    assert mock_decode.call_args.kwargs["source_path"] == archive
+
+@pytest.mark.asyncio
+async def test_fetch_audio_retries_from_temporary_copy_without_archive():
+    import numpy as np
+    from handlers.audio import fetch_audio
+
+    bot = MagicMock()
+    bot.session.api.is_local = False
+    decoded = np.zeros(16000, dtype=np.float32)
+    copies = []
+
+    async def decode(chunks=None, source_path=None, expected_seconds=None, archive_path=None, digest=None):
+        if chunks is not None:
+            copies.append(archive_path)
+            archive_path.write_bytes(b"spooled")
+            raise RuntimeError("moov atom not found")
+        assert source_path.read_bytes() == b"spooled"
+        return decoded
+
+    with patch("handlers.audio.decode_audio_stream", side_effect=decode):
+        assert await fetch_audio(bot, "path/to/voice.m4a", 1) is decoded
+
+    # The temporary copy keeps the file extension and is removed afterwards
+    assert copies[0].suffix == ".m4a"
+    assert not copies[0].exists()
+
+    with patch("handlers.audio.decode_audio_stream", new_callable=AsyncMock, side_effect=RuntimeError("bad data")):
+        with pytest.raises(RuntimeError):
+            await fetch_audio(bot, "path/to/voice.ogg", 1)
@@ -0,0 +1,106 @@
+import sys
+import pytest
+import numpy as np
+from unittest.mock import patch
+from audio_stream import PCMBuffer, decode_audio_stream
+
+# Stands in for ffmpeg: copies the input (stdin or the -i file) to stdout unchanged,
+# so raw float32 bytes in are the decoded samples out
+FAKE_FFMPEG = """#!{python}
+import sys, shutil
+source = sys.argv[sys.argv.index("-i") + 1]
+data = sys.stdin.buffer if source == "pipe:0" else open(source, "rb")
+head = data.read(4)
+if head == b"FAIL":
+    sys.stderr.write("Invalid data found when processing input")
+    sys.exit(1)
+sys.stdout.buffer.write(head)
+shutil.copyfileobj(data, sys.stdout.buffer)
+"""
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    script = tmp_path / "ffmpeg"
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    script.chmod(0o755)
+    with patch("audio_stream.FFMPEG_BINARY", str(script)):
+        yield script
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+def test_pcm_buffer_handles_split_samples_and_growth():
+    samples = np.arange(50000, dtype=np.float32)
+    raw = samples.tobytes()
+    buffer = PCMBuffer(expected_samples=100)
+    # Odd chunk size splits samples across appends and forces the buffer to grow
+    for i in range(0, len(raw), 4097):
+        buffer.append(raw[i:i + 4097])
+    assert len(buffer) == 50000
+    np.testing.assert_array_equal(buffer.array(), samples)
+
+@pytest.mark.asyncio
+async def test_decode_stream_with_archive(fake_ffmpeg, tmp_path):
+    samples = np.linspace(-1, 1, 16000 * 3, dtype=np.float32)
+    archive = tmp_path / "voice.ogg"
+
+    audio = await decode_audio_stream(chunked(samples.tobytes(), 1000), expected_seconds=3, archive_path=archive)
+
+    np.testing.assert_array_equal(audio, samples)
+    assert archive.read_bytes() == samples.tobytes()
+
+@pytest.mark.asyncio
+async def test_decode_from_file(fake_ffmpeg, tmp_path):
+    samples = np.ones(1234, dtype=np.float32)
+    source = tmp_path / "audio.mp3"
+    source.write_bytes(samples.tobytes())
+
+    audio = await decode_audio_stream(source_path=source)
+    np.testing.assert_array_equal(audio, samples)
+
+@pytest.mark.asyncio
+async def test_decode_failure_reports_stderr(fake_ffmpeg):
+    with pytest.raises(RuntimeError, match="Invalid data"):
+        await decode_audio_stream(chunked(b"FAIL" + b"\0" * 100000, 4096))
+
+@pytest.mark.asyncio
+async def test_archive_and_digest_complete_when_ffmpeg_fails(fake_ffmpeg, tmp_path):
+    import hashlib
+    data = b"FAIL" + bytes(range(256)) * 2000
+    archive = tmp_path / "voice.m4a"
+    digest = hashlib.sha256()
+
+    with pytest.raises(RuntimeError):
+        await decode_audio_stream(chunked(data, 4096), archive_path=archive, digest=digest)
+
+    # The full file is still archived so the caller can retry decoding from disk
+    assert archive.read_bytes() == data
+    assert digest.hexdigest() == hashlib.sha256(data).hexdigest()
+
+@pytest.mark.asyncio
+async def test_archive_writes_run_off_the_event_loop(fake_ffmpeg, tmp_path):
+    import threading
+    samples = np.linspace(-1, 1, 16000, dtype=np.float32)
+    archive = tmp_path / "voice.ogg"
+    loop_thread = threading.get_ident()
+    write_threads = []
+    real_open = open
+
+    class RecordingFile:
+        def __init__(self, *args):
+            self._file = real_open(*args)
+
+        def write(self, data):
+            write_threads.append(threading.get_ident())
+            return self._file.write(data)
+
+        def close(self):
+            self._file.close()
+
+    with patch("audio_stream.open", RecordingFile, create=True):
+        audio = await decode_audio_stream(chunked(samples.tobytes(), 4096), archive_path=archive)
+
+    np.testing.assert_array_equal(audio, samples)
+    assert archive.read_bytes() == samples.tobytes()
+    assert write_threads and loop_thread not in write_threads
@@ -0,0 +1,53 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from aiogram.types import Message, User
+from middlewares import auth
+from middlewares.auth import AdminMiddleware, AuthorizedUsersCache
+
+@pytest.fixture
+def auth_file(tmp_path):
+    path = tmp_path / ".auth"
+    path.write_text("111\n222\n", encoding="utf-8")
+    with patch("middlewares.auth.AUTH_FILE", str(path)):
+        yield path
+
+def test_cache_reads_file_once_until_it_changes(auth_file):
+    cache = AuthorizedUsersCache(check_interval=0)
+    with patch("middlewares.auth.get_authorized_users", wraps=auth.get_authorized_users) as mock_read:
+        assert cache.get() == {111, 222}
+        assert cache.get() == {111, 222}
+        assert mock_read.call_count == 1
+
+        auth_file.write_text("111\n222\n333\n", encoding="utf-8")
+        assert cache.get() == {111, 222, 333}
+        assert mock_read.call_count == 2
+
+def test_cache_throttles_stat_calls(auth_file):
+    cache = AuthorizedUsersCache(check_interval=3600)
+    assert cache.get() == {111, 222}
+    auth_file.write_text("999\n", encoding="utf-8")
+    # Not re-checked until the interval passes or reload() is called
+    assert cache.get() == {111, 222}
+    assert cache.reload() == {999}
+
+def test_cache_missing_file(tmp_path):
+    with patch("middlewares.auth.AUTH_FILE", str(tmp_path / "missing")):
+        assert AuthorizedUsersCache(check_interval=0).get() == frozenset()
+
+@pytest.mark.asyncio
+async def test_admin_middleware_blocks_unauthorized(auth_file):
+    message = AsyncMock(spec=Message)
+    message.answer = AsyncMock()
+    message.text = "/log"
+    message.from_user = MagicMock(spec=User)
+    message.from_user.id = 555
+    handler = AsyncMock()
+
+    with patch("middlewares.auth.authorized_users", AuthorizedUsersCache(check_interval=0)):
+        await AdminMiddleware()(handler, message, {})
+        handler.assert_not_called()
+        message.answer.assert_called_once_with("You are not authorized to use this command.")
+
+        message.from_user.id = 111
+        await AdminMiddleware()(handler, message, {})
+        handler.assert_called_once_with(message, {})
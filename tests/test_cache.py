@@ -0,0 +1,96 @@
+import pytest
+import asyncio
+from unittest.mock import patch, MagicMock
+from cache import TTLCache, SingleFlight, location_cache_key
+from handlers import weather
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def test_ttl_cache_hit_and_expiry():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=60, timer=clock)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    clock.now = 61
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 0, "maxsize": 10}
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_location_cache_key_normalization():
+    assert location_cache_key("  Moscow,   RU ") == location_cache_key("moscow, ru")
+    assert location_cache_key(lat=56.84671, lon=53.20451) == location_cache_key(lat=56.8499, lon=53.2002)
+    assert location_cache_key() is None
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight("test")
+    calls = 0
+
+    @flight.coalesce(lambda city: city)
+    async def fetch(city):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"name": city}
+
+    results = await asyncio.gather(*(fetch("Moscow") for _ in range(5)), fetch("London"))
+
+    assert calls == 2
+    assert results[:5] == [{"name": "Moscow"}] * 5
+    assert flight.stats() == {"calls": 2, "coalesced": 4, "in_flight": 0}
+
+@pytest.mark.asyncio
+async def test_single_flight_propagates_errors_and_forgets_key():
+    flight = SingleFlight("test")
+
+    async def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        await flight.do("key", boom)
+    assert flight.stats()["in_flight"] == 0
+
+class MockResponse:
+    def __init__(self, data, status):
+        self._data = data
+        self.status = status
+    async def json(self):
+        return self._data
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+@pytest.mark.asyncio
+async def test_get_weather_served_from_cache():
+    weather.weather_cache.clear()
+    calls_before = weather.weather_flight.calls
+    session = MagicMock()
+    session.get.return_value = MockResponse({"name": "Moscow"}, 200)
+
+    with patch("handlers.weather.WEATHER_API_KEY", "key"), \
+         patch("handlers.weather.get_http_session", return_value=session):
+        first = await weather.get_weather(city_name="Moscow, RU")
+        second = await weather.get_weather(city_name="moscow, ru")
+
+    assert first == second == {"name": "Moscow"}
+    session.get.assert_called_once()
+    assert weather.weather_cache.hits == 1
+    # The cache hit is answered before the flight, so only the miss counts as an upstream call
+    assert weather.weather_flight.calls - calls_before == 1
+    weather.weather_cache.clear()
@@ -1,5 +1,4 @@
 import pytest
-import requests
 from unittest.mock import AsyncMock, MagicMock, patch, mock_open, ANY
 from aiogram.types import Message, User
 from handlers.camera import cmd_camera, overlay_weather_on_image
@@ -7,6 +6,14 @@ from pathlib import Path
 from PIL import Image
 import io
 
+@pytest.fixture(autouse=True)
+def reset_shared_screenshot():
+    # Each test captures its own screenshot instead of reusing one from the previous test
+    from handlers.camera import _recent_screenshots
+    _recent_screenshots.clear()
+    yield
+    _recent_screenshots.clear()
+
 @pytest.mark.asyncio
 async def test_overlay_weather_on_image_success():
     # Create a small blank image
@@ -73,12 +80,9 @@ async def test_cmd_camera_screenshot_uri_success():
         mock_get_snapshot_uri = "http://10.1.100.151/snapshot.jpg"
         mock_get_uris.return_value = (mock_get_snapshot_uri, "rtsp://10.1.100.151/stream")
         
-        # Mock requests.get for Snapshot URI
-        with patch("requests.get") as mock_get:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.content = b"fake_image_content"
-            mock_get.return_value = mock_response
+        # Mock the snapshot download
+        with patch("handlers.camera.camera_http.fetch", new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = b"fake_image_content"
             
             # Mock filesystem operations
             with patch("pathlib.Path.mkdir"), \
@@ -88,6 +92,7 @@ async def test_cmd_camera_screenshot_uri_success():
                 
                 # Verify snapshot was requested
                 mock_get_uris.assert_called_once()
+                mock_fetch.assert_called_once_with(mock_get_snapshot_uri)
                 # Verify file was saved
                 mocked_file.assert_called()
                 mocked_file().write.assert_called_with(b"fake_image_content")
@@ -115,9 +120,8 @@ async def test_cmd_camera_screenshot_rtsp_fallback_success():
         mock_get_uris.return_value = ("http://10.1.100.151/fail.jpg", "rtsp://10.1.100.151/stream")
         
         # Mock Snapshot failure
-        with patch("requests.get") as mock_get:
-            mock_get.return_value.status_code = 404
-            mock_get.return_value.content = b""
+        with patch("handlers.camera.camera_http.fetch", new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = None
             
             # Mock RTSP capture success
             with patch("handlers.camera.capture_rtsp_frame", new_callable=AsyncMock) as mock_capture_rtsp:
@@ -286,3 +290,175 @@ async def test_cmd_camera_screenshot_all_fail():
         await cmd_camera(message, command)
         
         message.answer.assert_any_call("❌ Failed to capture image from both Snapshot URI and RTSP stream.")
+
+@pytest.mark.asyncio
+async def test_cmd_camera_screenshot_uses_persistent_rtsp_reader():
+    message = AsyncMock(spec=Message)
+    message.answer = AsyncMock()
+    message.answer_photo = AsyncMock()
+    processing_msg = AsyncMock()
+    message.answer.return_value = processing_msg
+
+    command = MagicMock()
+    command.args = "screenshot"
+
+    with patch("handlers.camera.CAMERA_RTSP_READER", True), \
+         patch("handlers.camera.get_camera_snapshot", new_callable=AsyncMock) as mock_get_uris, \
+         patch("handlers.camera.get_rtsp_frame", new_callable=AsyncMock) as mock_frame, \
+         patch("handlers.camera.capture_rtsp_frame", new_callable=AsyncMock) as mock_capture_rtsp, \
+         patch("handlers.camera.get_weather", new_callable=AsyncMock, return_value=None), \
+         patch("handlers.camera.camera_http.fetch", new_callable=AsyncMock) as mock_fetch, \
+         patch("pathlib.Path.mkdir"), \
+         patch("builtins.open", mock_open()) as mocked_file:
+        mock_get_uris.return_value = ("http://10.1.100.151/snapshot.jpg", "rtsp://10.1.100.151/stream")
+        mock_frame.return_value = b"buffered_frame"
+
+        await cmd_camera(message, command)
+
+        # The buffered frame is used; neither the snapshot URI nor a new ffmpeg process is needed
+        mock_frame.assert_called_once_with("rtsp://10.1.100.151/stream")
+        mock_fetch.assert_not_called()
+        mock_capture_rtsp.assert_not_called()
+        mocked_file().write.assert_called_with(b"buffered_frame")
+        message.answer_photo.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_failed_screenshot_invalidates_cached_uris():
+    message = AsyncMock(spec=Message)
+    message.answer = AsyncMock()
+    message.answer.return_value = AsyncMock()
+
+    command = MagicMock()
+    command.args = "screenshot"
+
+    with patch("handlers.camera.get_camera_snapshot", new_callable=AsyncMock) as mock_get_uris, \
+         patch("handlers.camera.capture_rtsp_frame", new_callable=AsyncMock, return_value=None), \
+         patch("handlers.camera.camera_discovery") as mock_discovery, \
+         patch("handlers.camera.camera_http.fetch", new_callable=AsyncMock, return_value=None):
+        mock_get_uris.return_value = ("http://10.1.100.151/fail.jpg", "rtsp://10.1.100.151/stream")
+
+        await cmd_camera(message, command)
+
+        mock_discovery.invalidate.assert_called_once()
+        message.answer.assert_called_with("❌ Failed to capture image from both Snapshot URI and RTSP stream.")
+
+@pytest.mark.asyncio
+async def test_video_without_rtsp_uri_invalidates_cached_uris():
+    message = AsyncMock(spec=Message)
+    message.answer = AsyncMock()
+    message.answer.return_value = AsyncMock()
+
+    command = MagicMock()
+    command.args = "video 5"
+
+    with patch("handlers.camera.get_camera_snapshot", new_callable=AsyncMock, return_value=("http://10.1.100.151/snap.jpg", None)), \
+         patch("handlers.camera.camera_discovery") as mock_discovery, \
+         patch("handlers.camera.record_rtsp_video", new_callable=AsyncMock) as mock_record:
+        await cmd_camera(message, command)
+
+        mock_record.assert_not_called()
+        mock_discovery.invalidate.assert_called_once()
+        message.answer.assert_called_with("❌ No RTSP stream available for video recording.")
+
+@pytest.mark.asyncio
+async def test_get_camera_snapshot_coalesces_concurrent_lookups():
+    import asyncio
+    import time
+    from handlers.camera import get_camera_snapshot
+    from onvif_discovery import CameraURIs
+
+    def slow_lookup():
+        time.sleep(0.1)
+        return CameraURIs("http://cam/snap.jpg", "rtsp://cam/stream", "Main", "t")
+
+    with patch("handlers.camera.camera_discovery") as mock_discovery:
+        mock_discovery.get_uris.side_effect = slow_lookup
+        results = await asyncio.gather(*(get_camera_snapshot() for _ in range(5)))
+
+    assert results == [("http://cam/snap.jpg", "rtsp://cam/stream")] * 5
+    assert mock_discovery.get_uris.call_count == 1
+
+def make_screenshot_message():
+    message = AsyncMock(spec=Message)
+    message.answer = AsyncMock(return_value=AsyncMock())
+    sent = MagicMock()
+    sent.photo = [MagicMock(file_id="small"), MagicMock(file_id="uploaded_file_id")]
+    message.answer_photo = AsyncMock(return_value=sent)
+    return message
+
+@pytest.mark.asyncio
+async def test_concurrent_screenshots_share_one_capture_and_upload():
+    import asyncio
+
+    messages = [make_screenshot_message() for _ in range(5)]
+    command = MagicMock()
+    command.args = "screenshot"
+
+    async def slow_fetch(uri):
+        await asyncio.sleep(0.05)
+        return b"snapshot"
+
+    with patch("handlers.camera.get_camera_snapshot", new_callable=AsyncMock) as mock_get_uris, \
+         patch("handlers.camera.camera_http.fetch", side_effect=slow_fetch) as mock_fetch, \
+         patch("handlers.camera.overlay_weather_on_image", new_callable=AsyncMock, return_value=b"overlaid") as mock_overlay, \
+         patch("pathlib.Path.mkdir"), \
+         patch("builtins.open", mock_open()) as mocked_file:
+        mock_get_uris.return_value = ("http://10.1.100.151/snapshot.jpg", None)
+
+        await asyncio.gather(*(cmd_camera(message, command) for message in messages))
+
+        # One lookup, download, overlay and file for all five requests
+        mock_get_uris.assert_called_once()
+        mock_fetch.assert_called_once()
+        mock_overlay.assert_called_once()
+        assert mocked_file().write.call_count == 1
+
+    photos = [message.answer_photo.call_args.args[0] for message in messages]
+    uploads = [photo for photo in photos if not isinstance(photo, str)]
+    assert len(uploads) == 1
+    assert uploads[0].data == b"overlaid"
+    # Everyone else gets the file_id of the largest size from the first upload
+    assert sorted(photo for photo in photos if isinstance(photo, str)) == ["uploaded_file_id"] * 4
+
+@pytest.mark.asyncio
+async def test_screenshot_is_reused_within_window_only():
+    command = MagicMock()
+    command.args = "screenshot"
+
+    with patch("handlers.camera.get_camera_snapshot", new_callable=AsyncMock) as mock_get_uris, \
+         patch("handlers.camera.camera_http.fetch", new_callable=AsyncMock, return_value=b"snapshot"), \
+         patch("handlers.camera.overlay_weather_on_image", new_callable=AsyncMock, return_value=b"overlaid"), \
+         patch("pathlib.Path.mkdir"), \
+         patch("builtins.open", mock_open()):
+        mock_get_uris.return_value = ("http://10.1.100.151/snapshot.jpg", None)
+
+        first, second = make_screenshot_message(), make_screenshot_message()
+        await cmd_camera(first, command)
+        await cmd_camera(second, command)
+        assert mock_get_uris.call_count == 1
+        assert second.answer_photo.call_args.args[0] == "uploaded_file_id"
+
+        # Once the window has passed, a new capture is taken
+        from handlers.camera import _recent_screenshots
+        _recent_screenshots.clear()
+        third = make_screenshot_message()
+        await cmd_camera(third, command)
+        assert mock_get_uris.call_count == 2
+        assert not isinstance(third.answer_photo.call_args.args[0], str)
+
+@pytest.mark.asyncio
+async def test_failed_upload_lets_next_request_upload():
+    import asyncio
+    from aiogram.exceptions import TelegramNetworkError
+    from handlers.camera import Screenshot, send_screenshot
+
+    screenshot = Screenshot(b"overlaid", "snapshot.jpg")
+    failing = make_screenshot_message()
+    failing.answer_photo.side_effect = TelegramNetworkError(method=MagicMock(), message="timeout")
+    waiting = make_screenshot_message()
+
+    results = await asyncio.gather(send_screenshot(failing, screenshot), send_screenshot(waiting, screenshot), return_exceptions=True)
+
+    assert isinstance(results[0], TelegramNetworkError)
+    assert not isinstance(waiting.answer_photo.call_args.args[0], str)
+    assert screenshot.file_id == "uploaded_file_id"
@@ -0,0 +1,117 @@
+import pytest
+import httpx
+from camera_client import CameraHTTPClient
+
+JPEG = b"\xff\xd8" + b"x" * 5000 + b"\xff\xd9"
+DIGEST_CHALLENGE = 'Digest realm="camera", nonce="abc123", qop="auth"'
+
+def digest_camera(log: list):
+    """Camera that requires Digest auth and accepts a reused nonce."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        log.append(request.headers.get("authorization", ""))
+        if not request.headers.get("authorization", "").startswith("Digest "):
+            return httpx.Response(401, headers={"www-authenticate": DIGEST_CHALLENGE})
+        return httpx.Response(200, content=JPEG)
+    return handler
+
+def basic_camera(log: list):
+    """Camera that only supports Basic auth."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        log.append(request.headers.get("authorization", ""))
+        if not request.headers.get("authorization", "").startswith("Basic "):
+            return httpx.Response(401, headers={"www-authenticate": 'Basic realm="camera"'})
+        return httpx.Response(200, content=JPEG)
+    return handler
+
+@pytest.mark.asyncio
+async def test_warm_digest_request_is_single_round_trip():
+    log = []
+    client = CameraHTTPClient("user", "pass", transport=httpx.MockTransport(digest_camera(log)))
+    try:
+        assert await client.fetch("http://camera/snapshot.jpg") == JPEG
+        assert len(log) == 2  # challenge + authenticated request
+        assert client.auth_scheme == "digest"
+
+        assert await client.fetch("http://camera/snapshot.jpg") == JPEG
+        assert len(log) == 3  # the cached challenge is answered up front
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+async def test_basic_auth_is_remembered():
+    log = []
+    client = CameraHTTPClient("user", "pass", transport=httpx.MockTransport(basic_camera(log)))
+    try:
+        assert await client.fetch("http://camera/snapshot.jpg") == JPEG
+        assert client.auth_scheme == "basic"
+        log.clear()
+
+        # Basic is now tried first, so Digest is no longer attempted
+        assert await client.fetch("http://camera/snapshot.jpg") == JPEG
+        assert len(log) == 1
+        assert log[0].startswith("Basic ")
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+async def test_oversized_snapshot_is_rejected():
+    def handler(request: httpx.Request) -> httpx.Response:
+        # No Content-Length, so the cap has to be enforced while streaming
+        return httpx.Response(200, content=iter([b"x" * 4096] * 10))
+
+    client = CameraHTTPClient("user", "pass", max_bytes=10000, transport=httpx.MockTransport(handler))
+    try:
+        assert await client.fetch("http://camera/snapshot.jpg") is None
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+async def test_declared_oversized_snapshot_is_rejected_before_download():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=b"x" * 20000)
+
+    client = CameraHTTPClient("user", "pass", max_bytes=10000, transport=httpx.MockTransport(handler))
+    try:
+        assert await client.fetch("http://camera/snapshot.jpg") is None
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+async def test_errors_and_bad_status_return_none():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/down":
+            raise httpx.ConnectError("connection refused")
+        return httpx.Response(404)
+
+    client = CameraHTTPClient("user", "pass", transport=httpx.MockTransport(handler))
+    try:
+        assert await client.fetch("http://camera/missing.jpg") is None
+        assert await client.fetch("http://camera/down") is None
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+async def test_client_from_another_loop_is_closed_on_that_loop():
+    import asyncio
+    import threading
+
+    client = CameraHTTPClient("user", "pass", transport=httpx.MockTransport(digest_camera([])))
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        async def create():
+            return client._get_client()
+        old_client = asyncio.run_coroutine_threadsafe(create(), other_loop).result(5)
+
+        assert await client.fetch("http://camera/snapshot.jpg") == JPEG
+        for _ in range(50):
+            if old_client.is_closed:
+                break
+            await asyncio.sleep(0.01)
+        assert old_client.is_closed
+    finally:
+        await client.close()
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join(5)
+        other_loop.close()
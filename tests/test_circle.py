@@ -72,13 +72,15 @@ async def test_location_auto_update_middleware():
     handler = AsyncMock()
     
     await middleware(handler, message, {})
+    # Location writes are coalesced and persisted in the background
+    await middleware.flush()
     
     # Verify location stored
     user = get_user(1)
     assert user['latitude'] == 50.0
     assert user['longitude'] == 30.0
     # Verify handler was called
-    handler.assert_called_once_with(message, {})
+    handler.assert_called_once_with(message, {"location_writer": middleware.writer})
 
 @pytest.mark.asyncio
 async def test_cmd_share_status():
@@ -145,3 +147,177 @@ async def test_cmd_map_list_success():
     # Verify User 2 is in the list
     args, kwargs = message.answer.call_args
     assert "user2" in args[0]
+
+@pytest.mark.asyncio
+async def test_location_middleware_skips_non_sharing_and_coalesces():
+    update_user_status(1, "user1", "User One", True)
+    update_user_status(2, "user2", "User Two", False)
+
+    def location_message(user_id, lat, lon):
+        message = MagicMock(spec=Message)
+        message.location = MagicMock(spec=Location)
+        message.location.latitude = lat
+        message.location.longitude = lon
+        message.from_user = MagicMock(spec=User)
+        message.from_user.id = user_id
+        message.from_user.username = f"user{user_id}"
+        return message
+
+    middleware = CircleLocationMiddleware()
+    handler = AsyncMock()
+    with patch("middlewares.circle_location.update_user_locations") as mock_write:
+        await middleware(handler, location_message(1, 50.0, 30.0), {})
+        await middleware(handler, location_message(1, 51.0, 31.0), {})
+        await middleware(handler, location_message(2, 10.0, 10.0), {})
+        await middleware.flush()
+
+    # Only the latest position of the sharing user is written, in one batch
+    mock_write.assert_called_once_with([(1, 51.0, 31.0)])
+    assert middleware.writer.coalesced == 1
+
+@pytest.mark.asyncio
+async def test_sharing_cache_follows_share_command():
+    from database import is_user_sharing
+    assert not is_user_sharing(1)
+
+    message = AsyncMock(spec=Message)
+    message.answer = AsyncMock()
+    message.from_user = MagicMock(spec=User)
+    message.from_user.id = 1
+    message.from_user.username = "user1"
+    message.from_user.full_name = "User One"
+    command = MagicMock()
+
+    command.args = "on"
+    await cmd_share(message, command)
+    assert is_user_sharing(1)
+
+    command.args = "off"
+    await cmd_share(message, command)
+    assert not is_user_sharing(1)
+
+@pytest.mark.asyncio
+async def test_cmd_map_near():
+    message = AsyncMock(spec=Message)
+    message.answer = AsyncMock()
+    message.from_user = MagicMock(spec=User)
+    message.from_user.id = 1
+
+    # Requester in Moscow, user2 nearby, user3 in London, user4 not sharing
+    update_user_status(1, "user1", "User One", True)
+    update_user_location(1, 55.75, 37.62)
+    update_user_status(2, "user2", "User Two", True)
+    update_user_location(2, 55.76, 37.64)
+    update_user_status(3, "user3", "User Three", True)
+    update_user_location(3, 51.5, -0.12)
+    update_user_status(4, "user4", "User Four", True)
+    update_user_location(4, 55.75, 37.63)
+    update_user_status(4, "user4", "User Four", False)
+
+    command = MagicMock()
+    command.args = "near"
+    await cmd_map(message, command)
+    args, _ = message.answer.call_args
+    assert args[0].index("user2") < args[0].index("user3")
+    assert "user1" not in args[0]
+    assert "user4" not in args[0]
+
+    command.args = "near 10"
+    await cmd_map(message, command)
+    args, _ = message.answer.call_args
+    assert "within 10 km" in args[0]
+    assert "user2" in args[0]
+    assert "user3" not in args[0]
+
+    # Moving into range is reflected without reloading the index
+    update_user_location(3, 55.7, 37.6)
+    await cmd_map(message, command)
+    args, _ = message.answer.call_args
+    assert "user3" in args[0]
+
+    command.args = "near 0"
+    await cmd_map(message, command)
+    args, _ = message.answer.call_args
+    assert "Usage" in args[0]
+
+@pytest.mark.asyncio
+async def test_cmd_map_user_named_near():
+    message = AsyncMock(spec=Message)
+    message.answer = AsyncMock()
+    message.answer_location = AsyncMock()
+    message.from_user = MagicMock(spec=User)
+    message.from_user.id = 1
+
+    update_user_status(1, "user1", "User One", True)
+    update_user_location(1, 55.75, 37.62)
+    update_user_status(2, "near", "Near Person", True)
+    update_user_location(2, 55.76, 37.64)
+
+    command = MagicMock()
+    command.args = "@near"
+    await cmd_map(message, command)
+    message.answer_location.assert_called_once_with(latitude=55.76, longitude=37.64)
+
+    # Text after "near" that is not a radius is a username, not a malformed /map near
+    message.answer_location.reset_mock()
+    command.args = "near abc"
+    await cmd_map(message, command)
+    message.answer_location.assert_not_called()
+    args, _ = message.answer.call_args
+    assert "couldn't find user @near abc" in args[0]
+
+@pytest.mark.asyncio
+async def test_map_reads_the_requesters_pending_location():
+    from middlewares.circle_location import LocationWriter
+
+    update_user_status(1, "user1", "User One", True)
+    update_user_location(1, 51.5, -0.12)
+    update_user_status(2, "user2", "User Two", True)
+    update_user_location(2, 55.76, 37.64)
+
+    # The new position is still waiting in the writer when /map near arrives
+    writer = LocationWriter(flush_interval_ms=60000)
+    middleware = CircleLocationMiddleware(writer)
+    message = AsyncMock(spec=Message)
+    message.answer = AsyncMock()
+    message.location = MagicMock(spec=Location)
+    message.location.latitude = 55.75
+    message.location.longitude = 37.62
+    message.from_user = MagicMock(spec=User)
+    message.from_user.id = 1
+    message.from_user.username = "user1"
+    data = {}
+    await middleware(AsyncMock(), message, data)
+    assert data["location_writer"] is writer
+    assert 1 in writer._pending
+
+    command = MagicMock()
+    command.args = "near 10"
+    await cmd_map(message, command, location_writer=writer)
+    args, _ = message.answer.call_args
+    assert "user2" in args[0]
+    assert writer._pending == {}
+    assert get_user(1)["latitude"] == 55.75
+    writer._flush_task.cancel()
+
+@pytest.mark.asyncio
+async def test_location_submitted_during_slow_flush_is_written():
+    import time
+    import asyncio
+    from middlewares.circle_location import LocationWriter
+
+    writes = []
+    def slow_write(rows):
+        time.sleep(0.2)
+        writes.append(rows)
+
+    writer = LocationWriter(flush_interval_ms=50)
+    with patch("middlewares.circle_location.update_user_locations", side_effect=slow_write):
+        writer.submit(1, 1.0, 1.0)
+        await asyncio.sleep(0.1)  # the first flush is now inside run_db
+        writer.submit(2, 2.0, 2.0)
+        await asyncio.sleep(0.5)
+
+    assert writes == [[(1, 1.0, 1.0)], [(2, 2.0, 2.0)]]
+    assert writer._pending == {}
+    assert writer._flush_task.done()
@@ -0,0 +1,37 @@
+from city_index import CityIndex, fold
+
+CITIES = [
+    ("Moscow, RU", 12000000),
+    ("Mossoró, BR", 300000),
+    ("Mosul, IQ", 1700000),
+    ("Zürich, CH", 400000),
+    ("London, GB", 8900000),
+]
+
+def test_fold_strips_diacritics_and_case():
+    assert fold("Zürich") == fold("ZURICH") == "zurich"
+
+def test_search_prefix_ranked_by_population():
+    index = CityIndex(CITIES)
+    assert index.search("mos") == ["Moscow, RU", "Mosul, IQ", "Mossoró, BR"]
+    assert index.search("Mos", limit=1) == ["Moscow, RU"]
+
+def test_search_diacritic_insensitive():
+    index = CityIndex(CITIES)
+    assert index.search("Zurich") == ["Zürich, CH"]
+    assert index.search("mossoro") == ["Mossoró, BR"]
+
+def test_search_no_match_or_empty_query():
+    index = CityIndex(CITIES)
+    assert index.search("xyz") == []
+    assert index.search("  ") == []
+
+def test_from_file_with_and_without_population(tmp_path):
+    cities_file = tmp_path / "cities.txt"
+    cities_file.write_text("Berlin, DE\t3600000\nBern, CH\nBerdyansk, UA\t100000\n", encoding="utf-8")
+    index = CityIndex.from_file(cities_file)
+    assert len(index) == 3
+    assert index.search("ber") == ["Berlin, DE", "Berdyansk, UA", "Bern, CH"]
+
+def test_from_file_missing(tmp_path):
+    assert len(CityIndex.from_file(tmp_path / "missing.txt")) == 0
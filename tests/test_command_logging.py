@@ -0,0 +1,73 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from middlewares.command_logging import InteractionLogSink, InteractionLoggingMiddleware
+from database import init_db, get_recent_logs, close_connections, LOG_COLUMNS
+
+@pytest.fixture(autouse=True)
+def setup_db(tmp_path):
+    db_path = tmp_path / "test_map.db"
+    with patch("database.DATABASE_PATH", str(db_path)):
+        init_db()
+        yield db_path
+    close_connections()
+
+def make_row(i):
+    values = dict(
+        user_id=i, username=f"user{i}", full_name=f"User {i}", chat_id=1, chat_type="private",
+        chat_title=None, message_id=i, content=f"/cmd {i}", duration_ms=1.0, bot_version="test",
+        chat_username=None
+    )
+    return tuple(values[column] for column in LOG_COLUMNS)
+
+@pytest.mark.asyncio
+async def test_sink_flushes_in_batches():
+    sink = InteractionLogSink(batch_size=10, flush_interval_ms=1000, max_queue=100)
+    sink.start()
+    with patch("middlewares.command_logging.add_interaction_logs") as mock_write:
+        for i in range(25):
+            assert sink.submit(make_row(i))
+        await sink.stop()
+
+    sizes = [len(call.args[0]) for call in mock_write.call_args_list]
+    assert sizes == [10, 10, 5]
+    assert sink.written == 25
+
+@pytest.mark.asyncio
+async def test_sink_flushes_after_interval():
+    sink = InteractionLogSink(batch_size=100, flush_interval_ms=20, max_queue=100)
+    sink.start()
+    sink.submit(make_row(1))
+    await asyncio.sleep(0.2)
+
+    assert sink.written == 1
+    assert get_recent_logs(10)[0]["content"] == "/cmd 1"
+    await sink.stop()
+
+@pytest.mark.asyncio
+async def test_sink_drops_when_full():
+    sink = InteractionLogSink(batch_size=10, flush_interval_ms=1000, max_queue=2)
+    sink.start()
+    results = [sink.submit(make_row(i)) for i in range(5)]
+    await sink.stop()
+
+    assert results.count(False) == 3
+    assert sink.dropped == 3
+    assert len(get_recent_logs(10)) == 2
+
+@pytest.mark.asyncio
+async def test_middleware_uses_running_sink():
+    sink = MagicMock(spec=InteractionLogSink)
+    sink.running = True
+    middleware = InteractionLoggingMiddleware(sink=sink)
+
+    event = MagicMock()
+    event.from_user.id = 42
+    event.text = "/weather"
+    handler = AsyncMock(return_value="ok")
+
+    assert await middleware(handler, event, {}) == "ok"
+    sink.submit.assert_called_once()
+    row = dict(zip(LOG_COLUMNS, sink.submit.call_args[0][0]))
+    assert row["user_id"] == 42
+    assert row["content"] == "/weather"
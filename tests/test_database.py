@@ -0,0 +1,219 @@
+import gc
+import pytest
+import asyncio
+import sqlite3
+import threading
+from unittest.mock import patch
+import database
+from database import (
+    init_db, get_connection, close_connections, add_interaction_log, add_interaction_logs,
+    get_recent_logs, get_known_groups, LOG_COLUMNS, run_db, update_user_status, get_user
+)
+
+@pytest.fixture(autouse=True)
+def setup_db(tmp_path):
+    db_path = tmp_path / "test_map.db"
+    with patch("database.DATABASE_PATH", str(db_path)):
+        init_db()
+        yield db_path
+    close_connections()
+
+def test_connection_is_reused_and_uses_wal():
+    conn = get_connection()
+    assert get_connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    # synchronous=NORMAL is reported as 1
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+def test_each_thread_gets_its_own_connection():
+    main_conn = get_connection()
+    other = {}
+    thread = threading.Thread(target=lambda: other.setdefault("conn", get_connection()))
+    thread.start()
+    thread.join()
+    assert other["conn"] is not main_conn
+
+def test_writes_from_other_thread_are_visible():
+    thread = threading.Thread(target=add_interaction_log, kwargs=dict(
+        user_id=1, username="user1", full_name="User One", chat_id=1, chat_type="private",
+        chat_title=None, message_id=1, content="/start", duration_ms=1.0, bot_version="test"
+    ))
+    thread.start()
+    thread.join()
+    logs = get_recent_logs(10)
+    assert len(logs) == 1
+    assert logs[0]["content"] == "/start"
+
+def test_close_connections_reopens_on_next_use():
+    conn = get_connection()
+    close_connections()
+    new_conn = get_connection()
+    assert new_conn is not conn
+    assert new_conn.execute("SELECT 1").fetchone()[0] == 1
+
+def _log(content, username="user1", chat_title=None):
+    add_interaction_log(
+        user_id=1, username=username, full_name="User One", chat_id=1, chat_type="private",
+        chat_title=chat_title, message_id=1, content=content, duration_ms=1.0, bot_version="test"
+    )
+
+def test_log_search_uses_fts_substring_match():
+    assert database.FTS_ENABLED
+    _log("/weather Moscow")
+    _log("/rate USD EUR", chat_title="Currency Chat")
+    _log("/weather London", username="someone")
+
+    results = get_recent_logs(10, "WEATHER")
+    assert [r["content"] for r in results] == ["/weather London", "/weather Moscow"]
+    assert [r["content"] for r in get_recent_logs(10, "rency ch")] == ["/rate USD EUR"]
+    assert [r["content"] for r in get_recent_logs(1, "weather")] == ["/weather London"]
+
+def test_log_search_short_query_falls_back_to_like():
+    _log("/rate USD EUR")
+    _log("/start")
+    assert [r["content"] for r in get_recent_logs(10, "EU")] == ["/rate USD EUR"]
+
+def test_log_fts_index_follows_deletes_and_backfills():
+    _log("/weather Moscow")
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM logs")
+    assert get_recent_logs(10, "Moscow") == []
+
+    # Simulate a database created before the FTS migration
+    _log("/forecast Paris")
+    with conn:
+        conn.execute("DROP TABLE logs_fts")
+        for trigger in ("logs_fts_insert", "logs_fts_delete", "logs_fts_update"):
+            conn.execute(f"DROP TRIGGER {trigger}")
+    init_db()
+    assert [r["content"] for r in get_recent_logs(10, "paris")] == ["/forecast Paris"]
+
+def _group_row(chat_id, title, chat_type="supergroup", chat_username=None):
+    values = dict(
+        user_id=1, username="user1", full_name="User One", chat_id=chat_id, chat_type=chat_type,
+        chat_title=title, message_id=1, content="/start", duration_ms=1.0, bot_version="test",
+        chat_username=chat_username
+    )
+    return tuple(values[column] for column in LOG_COLUMNS)
+
+def test_groups_table_maintained_by_logging():
+    add_interaction_logs([
+        _group_row(-1001, "Old Title"),
+        _group_row(-1001, "New Title", chat_username="new_group"),
+        _group_row(5, None, chat_type="private"),
+    ])
+    add_interaction_log(*_group_row(-1002, "Other Group"))
+
+    groups = {g["chat_id"]: g for g in get_known_groups()}
+    assert set(groups) == {-1001, -1002}
+    assert groups[-1001]["chat_title"] == "New Title"
+    assert groups[-1001]["chat_username"] == "new_group"
+    assert groups[-1001]["first_seen"] is not None
+
+def test_groups_table_backfilled_from_existing_logs():
+    add_interaction_log(*_group_row(-1003, "Legacy Group"))
+    conn = get_connection()
+    with conn:
+        conn.execute("DROP TABLE groups")
+    init_db()
+    assert [g["chat_title"] for g in get_known_groups()] == ["Legacy Group"]
+
+async def _max_loop_lag(work, interval=0.005):
+    """Runs `work` while a heartbeat task measures the worst event-loop scheduling delay."""
+    loop = asyncio.get_running_loop()
+    lags = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            start = loop.time()
+            await asyncio.sleep(interval)
+            lags.append(loop.time() - start - interval)
+
+    # Objects left by earlier tests would make a full GC pass show up as loop lag
+    gc.collect()
+    gc.freeze()
+    task = asyncio.create_task(heartbeat())
+    try:
+        await work()
+    finally:
+        gc.unfreeze()
+        done.set()
+        await task
+    return max(lags)
+
+@pytest.mark.asyncio
+async def test_run_db_uses_dedicated_thread():
+    thread_name = await run_db(lambda: threading.current_thread().name)
+    assert thread_name.startswith("db")
+    await run_db(update_user_status, 1, "user1", "User One", True)
+    assert (await run_db(get_user, 1))["username"] == "user1"
+
+@pytest.mark.asyncio
+async def test_event_loop_lag_stays_flat_under_write_pressure(setup_db):
+    # Another connection holds the write lock, as a slow writer or a backup would
+    locker = sqlite3.connect(setup_db, check_same_thread=False)
+    locker.execute("BEGIN IMMEDIATE")
+    releaser = threading.Timer(0.3, locker.commit)
+    releaser.start()
+
+    async def work():
+        # Queue a burst of writes behind the lock, then keep writing in batches
+        await asyncio.gather(*(
+            run_db(update_user_status, i, f"user{i}", f"User {i}", True) for i in range(20)
+        ))
+        for batch in range(20):
+            await run_db(add_interaction_logs, [_group_row(-1000 - i, f"Group {i}") for i in range(200)])
+
+    try:
+        lag = await _max_loop_lag(work)
+    finally:
+        releaser.join()
+        locker.close()
+
+    assert len(await run_db(get_known_groups)) == 200
+    # The writes waited ~300 ms on the lock, but the loop kept ticking
+    assert lag < 0.1
+
+def test_geo_cell_migration_replaces_geohash_and_follows_cell_size(setup_db):
+    from geo_index import grid_cell
+
+    conn = get_connection()
+    with conn:
+        conn.execute("ALTER TABLE users ADD COLUMN geohash TEXT")
+        conn.execute("CREATE INDEX idx_users_geohash ON users(geohash)")
+        conn.execute("INSERT INTO users (user_id, is_sharing, latitude, longitude, geohash) VALUES (1, 1, 55.75, 37.62, 'ucfv0')")
+        conn.execute("UPDATE users SET geo_cell = NULL")
+    init_db()
+
+    columns = {row['name'] for row in conn.execute("PRAGMA table_info(users)")}
+    assert "geohash" not in columns
+    assert get_user(1)["geo_cell"] == grid_cell(55.75, 37.62, database.GEO_CELL_DEGREES)
+    plan = " ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT user_id FROM users WHERE is_sharing = 1 AND geo_cell BETWEEN 10 AND 20"
+    ))
+    assert "idx_users_geo_cell" in plan
+
+    with patch("database.GEO_CELL_DEGREES", 1.0):
+        init_db()
+    assert get_user(1)["geo_cell"] == grid_cell(55.75, 37.62, 1.0)
+
+def test_geo_index_reads_only_nearby_cells(setup_db):
+    from database import update_user_location, get_users_near, load_geo_index
+
+    update_user_status(1, "moscow", "Moscow", True)
+    update_user_location(1, 55.75, 37.62)
+    update_user_status(2, "london", "London", True)
+    update_user_location(2, 51.5, -0.12)
+
+    index = load_geo_index()
+    assert len(index) == 0
+    assert [row["user_id"] for _, row in get_users_near(55.75, 37.62, radius_km=10)] == [1]
+    assert 1 in index and 2 not in index
+
+    # A user moving into a cell that is not loaded yet is left to SQLite until it is queried
+    update_user_location(1, 40.71, -74.0)
+    assert 1 not in index
+    assert [row["user_id"] for _, row in get_users_near(40.7, -74.0, radius_km=10)] == [1]
+    assert [row["user_id"] for _, row in get_users_near(55.75, 37.62, limit=2)] == [2, 1]
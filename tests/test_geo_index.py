@@ -0,0 +1,95 @@
+import random
+import pytest
+from geo_index import GeoIndex, haversine_km, grid_cell
+
+def brute_force(points, lat, lon, radius_km=None):
+    found = sorted((haversine_km(lat, lon, p_lat, p_lon), key) for key, (p_lat, p_lon) in points.items())
+    if radius_km is not None:
+        found = [(d, key) for d, key in found if d <= radius_km]
+    return found
+
+@pytest.fixture
+def random_points():
+    rng = random.Random(42)
+    points = {}
+    # Clusters around a few cities plus a uniform background
+    for key in range(3000):
+        if key % 3 == 0:
+            points[key] = (rng.uniform(-89.9, 89.9), rng.uniform(-180, 179.99))
+        else:
+            base_lat, base_lon = [(55.75, 37.62), (51.5, -0.12), (-33.87, 151.21)][key % 3 - 1]
+            points[key] = (base_lat + rng.gauss(0, 0.5), base_lon + rng.gauss(0, 0.5))
+    return points
+
+def test_haversine():
+    # Moscow - London is about 2500 km
+    assert 2490 < haversine_km(55.75, 37.62, 51.5, -0.12) < 2510
+
+def test_within_matches_brute_force(random_points):
+    index = GeoIndex(cell_degrees=0.25)
+    for key, (lat, lon) in random_points.items():
+        index.update(key, lat, lon)
+
+    for lat, lon, radius in [(55.75, 37.62, 5), (51.5, -0.12, 50), (0, 0, 2000), (-33.87, 151.21, 0.5)]:
+        assert index.within(lat, lon, radius) == brute_force(random_points, lat, lon, radius)
+
+def test_nearest_matches_brute_force(random_points):
+    index = GeoIndex(cell_degrees=0.25)
+    for key, (lat, lon) in random_points.items():
+        index.update(key, lat, lon)
+
+    for lat, lon in [(55.75, 37.62), (10.0, -60.0), (89.5, 0.0), (0.0, 179.9)]:
+        assert index.nearest(lat, lon, 10) == brute_force(random_points, lat, lon)[:10]
+
+def test_nearest_across_antimeridian_and_pole():
+    index = GeoIndex(cell_degrees=1.0)
+    index.update(1, 0.0, 179.9)
+    index.update(2, 0.0, -179.9)
+    index.update(3, 89.9, 90.0)
+    index.update(4, 89.9, -90.0)
+
+    assert [key for _, key in index.nearest(0.0, 179.95, 2)] == [1, 2]
+    assert sorted(key for _, key in index.within(89.95, 0.0, 30)) == [3, 4]
+
+def test_update_moves_and_remove_and_exclude():
+    index = GeoIndex()
+    index.update(1, 10.0, 10.0)
+    index.update(2, 10.1, 10.1)
+    index.update(1, 40.0, 40.0)
+    assert len(index) == 2
+    assert [key for _, key in index.within(10.0, 10.0, 50)] == [2]
+    assert [key for _, key in index.nearest(10.0, 10.0, 5, exclude=(2,))] == [1]
+    assert index.nearest(10.0, 10.0, 5, max_km=float("inf"), exclude=(1, 2)) == []
+
+    index.remove(2)
+    index.remove(3)
+    assert 2 not in index
+    assert index.within(10.0, 10.0, 50) == []
+
+def test_lazy_index_loads_only_queried_cells(random_points):
+    cell_degrees = 0.25
+    requested = []
+
+    def loader(ranges):
+        requested.extend(ranges)
+        for key, (lat, lon) in random_points.items():
+            cell = grid_cell(lat, lon, cell_degrees)
+            if any(first <= cell <= last for first, last in ranges):
+                yield key, lat, lon
+
+    index = GeoIndex(cell_degrees, loader=loader)
+    assert len(index) == 0 and not index.is_loaded(55.75, 37.62)
+
+    assert index.within(55.75, 37.62, 5) == brute_force(random_points, 55.75, 37.62, 5)
+    assert index.is_loaded(55.75, 37.62) and not index.is_loaded(51.5, -0.12)
+    assert len(index) < len(random_points)
+
+    # Cells already in memory are not requested again
+    requested.clear()
+    index.within(55.75, 37.62, 5)
+    assert requested == []
+
+    for lat, lon in [(51.5, -0.12), (0.0, 179.9), (89.5, 0.0)]:
+        assert index.nearest(lat, lon, 10) == brute_force(random_points, lat, lon)[:10]
+    assert index.within(0, 0, 30000) == brute_force(random_points, 0, 0, 30000)
+    assert index.complete and len(index) == len(random_points)
@@ -0,0 +1,55 @@
+import pytest
+import http_client
+from http_client import get_http_session, close_http_session
+
+@pytest.mark.asyncio
+async def test_get_http_session_is_shared():
+    session = get_http_session()
+    try:
+        assert get_http_session() is session
+        assert not session.closed
+    finally:
+        await close_http_session()
+
+@pytest.mark.asyncio
+async def test_close_http_session_recreates_on_next_use():
+    session = get_http_session()
+    await close_http_session()
+    assert session.closed
+    assert http_client._session is None
+
+    new_session = get_http_session()
+    try:
+        assert new_session is not session
+        assert not new_session.closed
+    finally:
+        await close_http_session()
+
+@pytest.mark.asyncio
+async def test_session_from_another_loop_is_closed_on_that_loop():
+    import asyncio
+    import threading
+
+    # A session created on a loop that keeps running in another thread
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        async def create():
+            return get_http_session()
+        old_session = asyncio.run_coroutine_threadsafe(create(), other_loop).result(5)
+
+        session = get_http_session()
+        try:
+            assert session is not old_session
+            for _ in range(50):
+                if old_session.closed:
+                    break
+                await asyncio.sleep(0.01)
+            assert old_session.closed
+        finally:
+            await close_http_session()
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join(5)
+        other_loop.close()
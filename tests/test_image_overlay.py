@@ -0,0 +1,45 @@
+import io
+from PIL import Image
+from config import FONT_PATH
+from image_overlay import render_overlay, render_panel, load_font
+
+TEXT = "Weather in Izhevsk\nTemp: 3°C"
+
+def make_jpeg(size=(640, 360), color=(200, 200, 200)):
+    output = io.BytesIO()
+    Image.new("RGB", size, color).save(output, format="JPEG", quality=95)
+    return output.getvalue()
+
+def test_panel_and_font_are_cached():
+    render_panel.cache_clear()
+    load_font.cache_clear()
+    first = render_panel(TEXT, FONT_PATH)
+    assert render_panel(TEXT, FONT_PATH) is first
+    assert render_panel(TEXT + "\nWind: 5 km/h", FONT_PATH) is not first
+    assert load_font.cache_info().misses == 1
+    assert first.mode == "RGBA"
+
+def test_overlay_only_touches_top_right_panel():
+    result = render_overlay(make_jpeg(), TEXT, FONT_PATH, quality=90)
+    panel = render_panel(TEXT, FONT_PATH)
+    with Image.open(io.BytesIO(result)) as img:
+        assert img.size == (640, 360)
+        # Inside the panel the background is darkened by the semi-transparent box
+        assert max(img.getpixel((640 - 10, 9))) < 140
+        # Outside it the frame is unchanged (up to JPEG noise)
+        assert min(img.getpixel((5, 355))) > 190
+        assert min(img.getpixel((640 - panel.width - 20, 20))) > 190
+
+def test_jpeg_settings_are_applied():
+    result = render_overlay(make_jpeg(), TEXT, FONT_PATH, quality=60, progressive=True, optimize=True)
+    with Image.open(io.BytesIO(result)) as img:
+        assert img.info.get("progressive") == 1
+    assert len(result) < len(render_overlay(make_jpeg(), TEXT, FONT_PATH, quality=95))
+
+def test_non_rgb_and_tiny_images():
+    output = io.BytesIO()
+    Image.new("L", (40, 30), 128).save(output, format="JPEG")
+    # The panel is wider than the image; it is clipped instead of failing
+    with Image.open(io.BytesIO(render_overlay(output.getvalue(), TEXT, FONT_PATH))) as img:
+        assert img.mode == "RGB"
+        assert img.size == (40, 30)
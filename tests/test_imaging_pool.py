@@ -0,0 +1,132 @@
+import time
+import asyncio
+import threading
+import pytest
+from imaging_pool import ImagingPool
+
+@pytest.mark.asyncio
+async def test_runs_off_loop_and_limits_concurrency():
+    pool = ImagingPool(workers=2, max_pending=10)
+    loop_thread = threading.get_ident()
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def job(i):
+        nonlocal active, peak
+        assert threading.get_ident() != loop_thread
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return i * 2
+
+    try:
+        results = await asyncio.gather(*(pool.run(job, i) for i in range(6)))
+        assert results == [0, 2, 4, 6, 8, 10]
+        assert peak == 2
+        stats = pool.stats()
+        assert stats["completed"] == 6
+        assert stats["running"] == 0 and stats["queued"] == 0
+        # Jobs beyond the first two had to wait for a free worker
+        assert stats["max_queue_wait_ms"] >= 40
+    finally:
+        pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_rejects_when_full():
+    pool = ImagingPool(workers=1, max_pending=2)
+    try:
+        first = asyncio.ensure_future(pool.run(time.sleep, 0.1))
+        second = asyncio.ensure_future(pool.run(time.sleep, 0.1))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.QueueFull):
+            await pool.run(time.sleep, 0.1)
+        await asyncio.gather(first, second)
+        assert pool.stats()["rejected"] == 1
+        # Capacity is available again once jobs finish
+        await pool.run(time.sleep, 0)
+    finally:
+        pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_failures_are_counted_and_raised():
+    pool = ImagingPool(workers=1)
+
+    def broken():
+        raise ValueError("cannot identify image file")
+
+    try:
+        with pytest.raises(ValueError):
+            await pool.run(broken)
+        assert pool.stats()["failed"] == 1
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_overlays():
+    import io
+    from PIL import Image
+    from image_overlay import render_overlay
+
+    output = io.BytesIO()
+    Image.new("RGB", (1920, 1080), (90, 120, 150)).save(output, format="JPEG")
+    frame = output.getvalue()
+    pool = ImagingPool(workers=2, max_pending=16)
+
+    lags = []
+    async def heartbeat(stop: asyncio.Event):
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - start - 0.005)
+
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stop))
+    try:
+        await asyncio.gather(*(pool.run(render_overlay, frame, f"Temp: {i}°C", "/nonexistent") for i in range(8)))
+    finally:
+        stop.set()
+        await beat
+        pool.shutdown()
+    assert pool.stats()["completed"] == 8
+    assert max(lags) < 0.1
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_keeps_running_job_pending():
+    pool = ImagingPool(workers=1, max_pending=2)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    try:
+        running = asyncio.create_task(pool.run(blocking))
+        await asyncio.to_thread(started.wait, 5)
+        queued = asyncio.create_task(pool.run(blocking))
+        await asyncio.sleep(0)
+        assert pool.pending == 2
+
+        # The queued job is dropped with its caller; the running one keeps its slot until it ends
+        running.cancel()
+        queued.cancel()
+        await asyncio.gather(running, queued, return_exceptions=True)
+        assert pool.pending == 1
+        assert pool.running == 1
+
+        release.set()
+        for _ in range(100):
+            if pool.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pool.pending == 0 and pool.running == 0
+        assert pool.stats()["completed"] == 1
+    finally:
+        release.set()
+        pool.shutdown()
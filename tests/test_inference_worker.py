@@ -0,0 +1,126 @@
+import pytest
+import asyncio
+import threading
+import time
+from inference_worker import InferenceWorker
+
+@pytest.mark.asyncio
+async def test_requests_arriving_together_are_batched():
+    calls = []
+
+    def infer(batch):
+        calls.append(list(batch))
+        return [item * 2 for item in batch]
+
+    worker = InferenceWorker(infer, max_batch=3, batch_window_ms=50)
+    results = await asyncio.gather(*(worker.submit(i) for i in range(5)))
+    await worker.stop()
+
+    assert results == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2], [3, 4]]
+    assert worker.stats()["processed"] == 5
+    assert worker.stats()["batches"] == 2
+
+@pytest.mark.asyncio
+async def test_inference_runs_off_the_event_loop():
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def infer(batch):
+        threads.append(threading.get_ident())
+        time.sleep(0.3)
+        return batch
+
+    worker = InferenceWorker(infer, batch_window_ms=0)
+    task = asyncio.create_task(worker.submit("audio"))
+    await asyncio.sleep(0.05)
+
+    # The loop keeps ticking while inference runs
+    start = time.perf_counter()
+    await asyncio.sleep(0.01)
+    assert time.perf_counter() - start < 0.1
+    assert worker.in_flight == 1
+
+    assert await task == "audio"
+    assert threads and threads[0] != loop_thread
+    await worker.stop()
+
+@pytest.mark.asyncio
+async def test_failing_item_does_not_fail_the_batch():
+    def infer(batch):
+        if "bad" in batch:
+            raise ValueError("corrupt audio")
+        return [item.upper() for item in batch]
+
+    worker = InferenceWorker(infer, max_batch=4, batch_window_ms=50)
+    results = await asyncio.gather(
+        worker.submit("a"), worker.submit("bad"), worker.submit("b"), return_exceptions=True
+    )
+    await worker.stop()
+
+    assert results[0] == "A"
+    assert isinstance(results[1], ValueError)
+    assert results[2] == "B"
+    assert worker.failed == 1
+
+@pytest.mark.asyncio
+async def test_queue_full_raises():
+    release = threading.Event()
+
+    def infer(batch):
+        release.wait(1)
+        return batch
+
+    worker = InferenceWorker(infer, max_batch=1, batch_window_ms=0, max_queue=1)
+    first = asyncio.create_task(worker.submit(1))
+    await asyncio.sleep(0.05)
+    second = asyncio.create_task(worker.submit(2))
+    await asyncio.sleep(0.01)
+    assert worker.queue_depth == 1
+
+    with pytest.raises(asyncio.QueueFull):
+        await worker.submit(3)
+
+    release.set()
+    assert await first == 1
+    assert await second == 2
+    await worker.stop()
+
+@pytest.mark.asyncio
+async def test_short_result_list_does_not_leave_futures_pending():
+    def drops_last(batch):
+        return [item * 2 for item in batch[:-1]] if len(batch) > 1 else [batch[0] * 2]
+
+    worker = InferenceWorker(drops_last, max_batch=3, batch_window_ms=50)
+    results = await asyncio.wait_for(asyncio.gather(*(worker.submit(i) for i in range(3))), 1)
+    assert results == [0, 2, 4]
+
+    worker.infer_batch = lambda batch: []
+    with pytest.raises(RuntimeError, match="0 results for 1 inputs"):
+        await asyncio.wait_for(worker.submit(1), 1)
+    await worker.stop()
+    assert worker.stats()["failed"] == 1
+
+@pytest.mark.asyncio
+async def test_waiting_submit_queues_behind_a_full_queue():
+    release = threading.Event()
+
+    def infer(batch):
+        release.wait(5)
+        return batch
+
+    worker = InferenceWorker(infer, max_batch=1, batch_window_ms=0, max_queue=1)
+    first = asyncio.create_task(worker.submit("a"))
+    await asyncio.sleep(0.05)
+    queued = asyncio.create_task(worker.submit("b"))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(asyncio.QueueFull):
+        await worker.submit("c")
+    waiting = asyncio.create_task(worker.submit("c", wait=True))
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+
+    release.set()
+    assert await asyncio.wait_for(asyncio.gather(first, queued, waiting), 5) == ["a", "b", "c"]
+    await worker.stop()
@@ -0,0 +1,134 @@
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+from onvif_discovery import ONVIFDiscovery, with_rtsp_credentials
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_media(snapshot_uri="http://cam/snap.jpg", rtsp_uri="rtsp://cam/stream"):
+    media = MagicMock()
+    profile = MagicMock()
+    profile.token = "profile_1"
+    profile.Name = "MainStream"
+    media.GetProfiles.return_value = [profile]
+    media.GetSnapshotUri.return_value.Uri = snapshot_uri
+    media.GetStreamUri.return_value.Uri = rtsp_uri
+    return media
+
+def test_uris_are_cached_until_ttl_expires():
+    clock = FakeClock()
+    media = make_media()
+    with patch("onvif_discovery.ONVIFCamera") as mock_camera:
+        mock_camera.return_value.create_media_service.return_value = media
+        discovery = ONVIFDiscovery("10.0.0.1", 80, "user", "pass", ttl=60, timer=clock)
+
+        uris = discovery.get_uris()
+        assert uris.snapshot_uri == "http://cam/snap.jpg"
+        assert uris.rtsp_uri == "rtsp://cam/stream"
+        assert uris.profile_name == "MainStream"
+
+        clock.now = 59
+        assert discovery.get_uris() is uris
+        assert media.GetProfiles.call_count == 1
+
+        # After the TTL the URIs are looked up again, but the client (WSDL parsing) is reused
+        clock.now = 61
+        discovery.get_uris()
+        assert media.GetProfiles.call_count == 2
+        mock_camera.assert_called_once()
+        assert discovery.stats() == {"lookups": 2, "hits": 1, "cached": True}
+
+def test_invalidate_forces_fresh_lookup():
+    media = make_media()
+    with patch("onvif_discovery.ONVIFCamera") as mock_camera:
+        mock_camera.return_value.create_media_service.return_value = media
+        discovery = ONVIFDiscovery("10.0.0.1", 80, "user", "pass", ttl=3600)
+        discovery.get_uris()
+        discovery.invalidate("capture failed")
+        discovery.get_uris()
+        assert media.GetProfiles.call_count == 2
+        mock_camera.assert_called_once()
+
+def test_failed_lookup_rebuilds_client():
+    broken = make_media()
+    broken.GetProfiles.side_effect = ConnectionError("camera offline")
+    with patch("onvif_discovery.ONVIFCamera") as mock_camera:
+        mock_camera.return_value.create_media_service.side_effect = [broken, make_media()]
+        discovery = ONVIFDiscovery("10.0.0.1", 80, "user", "pass")
+        with pytest.raises(ConnectionError):
+            discovery.get_uris()
+        assert discovery.get_uris().rtsp_uri == "rtsp://cam/stream"
+        assert mock_camera.call_count == 2
+
+def test_missing_snapshot_uri_still_returns_stream():
+    media = make_media()
+    media.GetSnapshotUri.side_effect = Exception("not supported")
+    with patch("onvif_discovery.ONVIFCamera") as mock_camera:
+        mock_camera.return_value.create_media_service.return_value = media
+        uris = ONVIFDiscovery("10.0.0.1", 80, "user", "pass").get_uris()
+    assert uris.snapshot_uri is None
+    assert uris.rtsp_uri == "rtsp://cam/stream"
+
+def test_with_rtsp_credentials():
+    assert with_rtsp_credentials("rtsp://cam/stream", "u", "p") == "rtsp://u:p@cam/stream"
+    assert with_rtsp_credentials("rtsp://a:b@cam/stream", "u", "p") == "rtsp://a:b@cam/stream"
+
+def test_missing_uri_is_cached_only_briefly():
+    clock = FakeClock()
+    media = make_media()
+    media.GetStreamUri.side_effect = [Exception("stream service busy"), MagicMock(Uri="rtsp://cam/stream")]
+    with patch("onvif_discovery.ONVIFCamera") as mock_camera:
+        mock_camera.return_value.create_media_service.return_value = media
+        discovery = ONVIFDiscovery("10.0.0.1", 80, "user", "pass", ttl=3600, incomplete_ttl=60, timer=clock)
+
+        assert discovery.get_uris().rtsp_uri is None
+        clock.now = 59
+        assert discovery.get_uris().rtsp_uri is None
+        clock.now = 61
+        assert discovery.get_uris().rtsp_uri == "rtsp://cam/stream"
+        assert media.GetProfiles.call_count == 2
+
+def test_uris_are_shared_through_cache_file(tmp_path):
+    cache_path = tmp_path / "camera_uris.json"
+    media = make_media()
+    with patch("onvif_discovery.ONVIFCamera") as mock_camera:
+        mock_camera.return_value.create_media_service.return_value = media
+        bot = ONVIFDiscovery("10.0.0.1", 80, "user", "pass", ttl=60, cache_path=cache_path, clock=lambda: 1000.0)
+        bot.get_uris()
+
+        # Another process (e.g. tools/get_vlc_link.py) reuses the lookup instead of asking the camera
+        tool = ONVIFDiscovery("10.0.0.1", 80, "user", "pass", ttl=60, cache_path=cache_path, clock=lambda: 1059.0)
+        assert tool.get_uris().rtsp_uri == "rtsp://cam/stream"
+        assert media.GetProfiles.call_count == 1
+        assert tool.stats() == {"lookups": 0, "hits": 1, "cached": True}
+
+        # A different camera, or an expired entry, is looked up again
+        assert ONVIFDiscovery("10.0.0.2", 80, "user", "pass", cache_path=cache_path).get_uris()
+        expired = ONVIFDiscovery("10.0.0.1", 80, "user", "pass", cache_path=cache_path, clock=lambda: 1061.0)
+        expired.get_uris()
+        assert media.GetProfiles.call_count == 3
+
+def test_invalidate_removes_cache_file_entry(tmp_path):
+    cache_path = tmp_path / "camera_uris.json"
+    with patch("onvif_discovery.ONVIFCamera") as mock_camera:
+        mock_camera.return_value.create_media_service.return_value = make_media()
+        discovery = ONVIFDiscovery("10.0.0.1", 80, "user", "pass", cache_path=cache_path)
+        discovery.get_uris()
+        assert "10.0.0.1:80" in json.loads(cache_path.read_text())
+        discovery.invalidate("capture failed")
+    assert json.loads(cache_path.read_text()) == {}
+
+def test_unreadable_cache_file_falls_back_to_camera(tmp_path):
+    cache_path = tmp_path / "camera_uris.json"
+    cache_path.write_text("{not json")
+    media = make_media()
+    with patch("onvif_discovery.ONVIFCamera") as mock_camera:
+        mock_camera.return_value.create_media_service.return_value = media
+        uris = ONVIFDiscovery("10.0.0.1", 80, "user", "pass", cache_path=cache_path).get_uris()
+    assert uris.rtsp_uri == "rtsp://cam/stream"
+    assert media.GetProfiles.call_count == 1
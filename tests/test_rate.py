@@ -56,7 +56,7 @@ async def test_cmd_rate_default(message):
         await cmd_rate(message, command)
         
         # Verify call to API (should request RUB base)
-        mock_get.assert_called_with("https://open.er-api.com/v6/latest/RUB", timeout=10)
+        mock_get.assert_called_with("https://open.er-api.com/v6/latest/RUB")
         
         # Verify response content
         message.answer.assert_called()
@@ -81,7 +81,7 @@ async def test_cmd_rate_custom_pair(message):
         await cmd_rate(message, command)
         
         # Verify call to API (should request USD base)
-        mock_get.assert_called_with("https://open.er-api.com/v6/latest/USD", timeout=10)
+        mock_get.assert_called_with("https://open.er-api.com/v6/latest/USD")
         
         # Verify response
         message.answer.assert_called()
@@ -100,7 +100,7 @@ async def test_cmd_rate_custom_pair_space(message):
         
         await cmd_rate(message, command)
         
-        mock_get.assert_called_with("https://open.er-api.com/v6/latest/USD", timeout=10)
+        mock_get.assert_called_with("https://open.er-api.com/v6/latest/USD")
         assert "Exchange Rate (USD -> EUR)" in message.answer.call_args[0][0]
 
 @pytest.mark.asyncio
@@ -0,0 +1,107 @@
+import sys
+import asyncio
+import pytest
+from unittest.mock import patch
+from rtsp_reader import RTSPFrameReader, split_jpeg_frames
+
+# Stands in for ffmpeg: writes numbered fake JPEG frames at 20 fps, split across writes,
+# until killed. The "-i" URI selects the behaviour.
+FAKE_FFMPEG = """#!{python}
+import sys, time
+uri = sys.argv[sys.argv.index("-i") + 1]
+if uri.endswith("/broken"):
+    sys.stderr.write("Connection refused")
+    sys.exit(1)
+frames = 3 if uri.endswith("/short") else 10 ** 6
+for i in range(frames):
+    frame = b"\\xff\\xd8" + f"frame-{{i}}".encode() + b"\\xff\\xd9"
+    sys.stdout.buffer.write(frame[:5])
+    sys.stdout.buffer.flush()
+    sys.stdout.buffer.write(frame[5:])
+    sys.stdout.buffer.flush()
+    time.sleep(0.05)
+"""
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    script = tmp_path / "ffmpeg"
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    script.chmod(0o755)
+    with patch("rtsp_reader.FFMPEG_BINARY", str(script)):
+        yield script
+
+def test_split_jpeg_frames_keeps_partial_frame():
+    buffer = bytearray(b"junk\xff\xd8one\xff\xd9\xff\xd8two\xff\xd9\xff\xd8thr")
+    assert split_jpeg_frames(buffer) == [b"\xff\xd8one\xff\xd9", b"\xff\xd8two\xff\xd9"]
+    assert buffer == bytearray(b"\xff\xd8thr")
+    buffer.extend(b"ee\xff\xd9")
+    assert split_jpeg_frames(buffer) == [b"\xff\xd8three\xff\xd9"]
+    assert buffer == bytearray()
+
+@pytest.mark.asyncio
+async def test_frames_are_served_from_one_connection(fake_ffmpeg):
+    reader = RTSPFrameReader("rtsp://camera/stream", buffer_frames=3)
+    try:
+        first = await reader.get_frame(timeout=5)
+        assert first.startswith(b"\xff\xd8frame-")
+        await asyncio.sleep(0.3)
+        # Later requests reuse the running process and get a newer frame
+        second = await reader.get_frame(timeout=5)
+        assert second != first
+        assert reader.connects == 1
+        assert len(reader.frames) == 3
+    finally:
+        await reader.stop()
+    assert not reader.running
+
+@pytest.mark.asyncio
+async def test_reader_stops_when_idle(fake_ffmpeg):
+    reader = RTSPFrameReader("rtsp://camera/stream", idle_timeout=0.3)
+    assert await reader.get_frame(timeout=5) is not None
+    await asyncio.sleep(0.6)
+    assert not reader.running
+    assert reader.latest_frame() is None
+
+    # The next request reconnects
+    assert await reader.get_frame(timeout=5) is not None
+    assert reader.connects == 2
+    await reader.stop()
+
+@pytest.mark.asyncio
+async def test_stale_frame_triggers_reconnect(fake_ffmpeg):
+    reader = RTSPFrameReader("rtsp://camera/short")
+    try:
+        assert await reader.get_frame(timeout=5) is not None
+        await asyncio.sleep(0.5)
+        # ffmpeg has exited; the buffered frame is too old, so the reader reconnects
+        assert not reader.running
+        assert await reader.get_frame(max_age=0.1, timeout=5) is not None
+        assert reader.connects == 2
+    finally:
+        await reader.stop()
+
+@pytest.mark.asyncio
+async def test_connection_failure_returns_none(fake_ffmpeg):
+    reader = RTSPFrameReader("rtsp://camera/broken")
+    assert await reader.get_frame(timeout=2) is None
+    assert not reader.running
+    await reader.stop()
+
+@pytest.mark.asyncio
+async def test_request_during_stop_starts_a_new_connection(fake_ffmpeg):
+    reader = RTSPFrameReader("rtsp://camera/stream")
+    try:
+        assert await reader.get_frame(timeout=5) is not None
+        stopping = asyncio.create_task(reader.stop())
+        await asyncio.sleep(0)
+        # The old process is still being torn down, but the reader already reports stopped
+        assert not reader.running
+
+        frame = await asyncio.wait_for(reader.get_frame(timeout=5), 3)
+        await stopping
+        assert frame is not None
+        assert reader.connects == 2
+        # Finishing the old stop() leaves the new connection alone
+        assert reader.running
+    finally:
+        await reader.stop()
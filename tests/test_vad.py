@@ -0,0 +1,71 @@
+import numpy as np
+from vad import detect_speech, speech_chunks
+
+RATE = 16000
+
+def tone(seconds, amplitude=0.3, freq=220.0):
+    t = np.arange(int(seconds * RATE), dtype=np.float32) / RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+def silence(seconds, noise=0.001, seed=0):
+    return (np.random.default_rng(seed).standard_normal(int(seconds * RATE)) * noise).astype(np.float32)
+
+def test_silent_clip_has_no_speech():
+    assert detect_speech(silence(5)) == []
+    assert speech_chunks(silence(5), 30) == []
+    assert speech_chunks(np.zeros(0, dtype=np.float32), 30) == []
+
+def test_trims_leading_and_trailing_silence():
+    audio = np.concatenate([silence(3), tone(2), silence(4, seed=1)])
+    segments = detect_speech(audio, pad_ms=200)
+    assert len(segments) == 1
+    start, end = segments[0]
+    # Speech is 3.0-5.0 s, padded by 0.2 s on each side (within one 30 ms frame)
+    assert abs(start / RATE - 2.8) < 0.05
+    assert abs(end / RATE - 5.2) < 0.05
+
+def test_splits_on_long_pauses_and_bridges_short_ones():
+    audio = np.concatenate([
+        tone(1), silence(0.3), tone(1),      # short pause: one segment
+        silence(2, seed=1), tone(1)          # long pause: new segment
+    ])
+    segments = detect_speech(audio, min_silence_ms=700)
+    assert len(segments) == 2
+    assert segments[0][1] < int(3.0 * RATE) < segments[1][0]
+
+def test_speech_chunks_pack_segments_and_respect_max_length():
+    parts = []
+    for i in range(6):
+        parts += [tone(8), silence(3, seed=i)]
+    audio = np.concatenate(parts)
+    chunks = speech_chunks(audio, max_seconds=20)
+
+    assert all(len(chunk) <= 20 * RATE for chunk in chunks)
+    kept = sum(len(chunk) for chunk in chunks)
+    # Most of the 18 s of silence is dropped, all 48 s of speech is kept
+    assert 48 * RATE <= kept < 52 * RATE
+    assert len(chunks) == 3
+
+def test_long_segment_is_split():
+    chunks = speech_chunks(tone(65), max_seconds=30)
+    assert [round(len(c) / RATE) for c in chunks] == [30, 30, 5]
+
+def test_long_run_is_split_at_quietest_point():
+    from vad import split_at_quiet_points
+    # A short dip at 27 s inside continuous speech is the natural place to cut
+    audio = np.concatenate([tone(27), tone(0.2, amplitude=0.01), tone(20)])
+    pieces = split_at_quiet_points(audio, max_seconds=30)
+
+    assert len(pieces) == 2
+    assert abs(len(pieces[0]) / RATE - 27.1) < 0.1
+    assert sum(len(p) for p in pieces) == len(audio)
+
+def test_speech_chunks_cut_long_speech_at_dips():
+    # 50 s of speech with only a brief 0.2 s dip (bridged by VAD) at 27 s
+    audio = np.concatenate([silence(1), tone(27), tone(0.2, amplitude=0.01), tone(23), silence(1, seed=1)])
+    chunks = speech_chunks(audio, max_seconds=30)
+
+    assert len(chunks) == 2
+    assert all(len(chunk) <= 30 * RATE for chunk in chunks)
+    # The first chunk (starting 0.2 s before the speech) ends inside the dip, not at 30 s
+    assert abs(len(chunks[0]) / RATE - (0.2 + 27.1)) < 0.2
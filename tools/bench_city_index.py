@@ -0,0 +1,65 @@
+import sys
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+# Add project root to path so we can import the index
+sys.path.append(str(Path(__file__).parent.parent))
+
+from city_index import CityIndex
+from tools.populate_cities import fetch_geonames_cities, parse_geonames_cities
+
+def load_cities(file_path: str | None):
+    """Loads the full cities15000 dataset (no population filter) from a local file or Geonames."""
+    if file_path:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return parse_geonames_cities(f.read(), min_population=0)
+    return fetch_geonames_cities(min_population=0)
+
+def linear_scan(cities: list[str], query: str, limit: int = 5):
+    """The previous inline.py implementation."""
+    return [city for city in cities if city.lower().startswith(query.lower())][:limit]
+
+def time_queries(name: str, func, queries: list[str], rounds: int):
+    samples = []
+    for _ in range(rounds):
+        for query in queries:
+            start = time.perf_counter()
+            func(query)
+            samples.append((time.perf_counter() - start) * 1_000_000)
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<14} mean {statistics.mean(samples):>9.1f} us   p50 {statistics.median(samples):>9.1f} us   p95 {p95:>9.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inline city autocompletion")
+    parser.add_argument("--file", help="Path to an extracted cities15000.txt (downloaded if omitted)")
+    parser.add_argument("--queries", type=int, default=500, help="Number of random prefixes")
+    parser.add_argument("--rounds", type=int, default=3, help="Repetitions per query")
+    args = parser.parse_args()
+
+    cities = load_cities(args.file)
+    if not cities:
+        print("No cities loaded.")
+        return
+
+    start = time.perf_counter()
+    index = CityIndex(cities)
+    build_ms = (time.perf_counter() - start) * 1000
+    names = [name for name, _ in cities]
+    print(f"{len(index)} cities, index built in {build_ms:.1f} ms\n")
+
+    # Prefixes of 1-6 characters, as typed keystroke by keystroke
+    rng = random.Random(42)
+    queries = []
+    for _ in range(args.queries):
+        name = rng.choice(names)
+        queries.append(name[:rng.randint(1, min(6, len(name)))])
+
+    time_queries("linear scan", lambda q: linear_scan(names, q), queries, args.rounds)
+    time_queries("CityIndex", lambda q: index.search(q), queries, args.rounds)
+
+if __name__ == "__main__":
+    main()
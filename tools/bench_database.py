@@ -0,0 +1,77 @@
+import sys
+import time
+import sqlite3
+import argparse
+from contextlib import nullcontext
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path so we can import database
+sys.path.append(str(Path(__file__).parent.parent))
+
+import database
+
+LOG_ARGS = (1, "bench_user", "Bench User", -100123, "supergroup", "Bench Group", 1, "/weather Moscow", 12.5, "bench", None)
+
+def legacy_add_interaction_log(*args):
+    """Previous behaviour: connect, insert, commit and close for every row."""
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    conn.execute('''
+        INSERT INTO logs (
+            user_id, username, full_name, chat_id, chat_type, chat_title,
+            message_id, content, duration_ms, bot_version, chat_username
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', args)
+    conn.commit()
+    conn.close()
+
+def legacy_get_user(user_id):
+    """Previous behaviour: connect, select and close for every lookup."""
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    conn.row_factory = sqlite3.Row
+    user = conn.execute('SELECT * FROM users WHERE user_id = ?', (user_id,)).fetchone()
+    conn.close()
+    return user
+
+def measure(name: str, func, count: int):
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<32} {count / elapsed:>10.0f} ops/s")
+
+def run(db_dir: Path, label: str, count: int, persistent: bool):
+    db_path = db_dir / f"{label}.db"
+    with patch("database.DATABASE_PATH", str(db_path)):
+        if persistent:
+            setup_patch = nullcontext()
+        else:
+            # Keep the default rollback journal for the legacy run (journal mode is persistent)
+            setup_patch = patch("database._configure_connection", lambda c: setattr(c, "row_factory", sqlite3.Row))
+        with setup_patch:
+            database.init_db()
+            for user_id in range(100):
+                database.update_user_status(user_id, f"user{user_id}", f"User {user_id}", True)
+            if not persistent:
+                database.close_connections()
+
+        if persistent:
+            measure(f"{label}: log inserts", lambda i: database.add_interaction_log(*LOG_ARGS), count)
+            measure(f"{label}: user lookups", lambda i: database.get_user(i % 100), count)
+        else:
+            measure(f"{label}: log inserts", lambda i: legacy_add_interaction_log(*LOG_ARGS), count)
+            measure(f"{label}: user lookups", lambda i: legacy_get_user(i % 100), count)
+        database.close_connections()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite connection-per-call vs persistent WAL connection")
+    parser.add_argument("--count", type=int, default=5000, help="Operations per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run(Path(tmp), "connect-per-call", args.count, persistent=False)
+        run(Path(tmp), "persistent WAL", args.count, persistent=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import sys
+import asyncio
+import sqlite3
+import argparse
+import tempfile
+import threading
+import statistics
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path so we can import database
+sys.path.append(str(Path(__file__).parent.parent))
+
+import database
+
+LOG_ROW = (1, "bench_user", "Bench User", -100123, "supergroup", "Bench Group", 1, "/weather Moscow", 12.5, "bench", None)
+
+async def measure_lag(label: str, write, batches: int, batch_size: int, lock_ms: int, interval: float = 0.005):
+    """Writes `batches` log batches while a heartbeat task records event-loop scheduling delay."""
+    loop = asyncio.get_running_loop()
+    lags = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            start = loop.time()
+            await asyncio.sleep(interval)
+            lags.append((loop.time() - start - interval) * 1000)
+
+    # Simulate a competing writer holding the database lock
+    locker = sqlite3.connect(database.DATABASE_PATH, check_same_thread=False)
+    locker.execute("BEGIN IMMEDIATE")
+    releaser = threading.Timer(lock_ms / 1000, locker.commit)
+    releaser.start()
+
+    task = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    start = loop.time()
+    for _ in range(batches):
+        await write([LOG_ROW] * batch_size)
+        # Let other handlers (the heartbeat) run between batches, as the dispatcher would
+        await asyncio.sleep(0)
+    elapsed = loop.time() - start
+    done.set()
+    await task
+    releaser.join()
+    locker.close()
+
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    median = statistics.median(lags) if lags else 0.0
+    print(f"{label:<22} {batches * batch_size / elapsed:>10.0f} rows/s   lag p50 {median:>7.2f} ms   p99 {p99:>7.2f} ms   max {max(lags, default=0.0):>7.2f} ms")
+
+async def blocking_write(rows):
+    """Previous behaviour: synchronous database call on the event loop."""
+    database.add_interaction_logs(rows)
+
+async def executor_write(rows):
+    await database.run_db(database.add_interaction_logs, rows)
+
+async def main(batches: int, batch_size: int, lock_ms: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("database.DATABASE_PATH", str(Path(tmp) / "bench.db")):
+            database.init_db()
+            await measure_lag("blocking on loop", blocking_write, batches, batch_size, lock_ms)
+            await measure_lag("run_db executor", executor_write, batches, batch_size, lock_ms)
+            database.close_connections()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure event-loop lag while the database is under write pressure.")
+    parser.add_argument("--batches", type=int, default=200, help="Number of write batches")
+    parser.add_argument("--batch-size", type=int, default=200, help="Rows per batch")
+    parser.add_argument("--lock-ms", type=int, default=300, help="How long a competing writer holds the lock")
+    args = parser.parse_args()
+    asyncio.run(main(args.batches, args.batch_size, args.lock_ms))
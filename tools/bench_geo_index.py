@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+# Add project root to path so we can import geo_index
+sys.path.append(str(Path(__file__).parent.parent))
+
+from geo_index import GeoIndex, haversine_km, grid_cell
+
+def linear_nearest(points, lat, lon, k):
+    """Previous behaviour: compute the distance to every sharing user."""
+    return sorted((haversine_km(lat, lon, p_lat, p_lon), key) for key, (p_lat, p_lon) in points.items())[:k]
+
+def measure(name: str, func, queries):
+    timings = []
+    for lat, lon in queries:
+        start = time.perf_counter()
+        func(lat, lon)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    print(f"{name:<28} p50 {statistics.median(timings):>10.1f} µs   p95 {timings[int(len(timings) * 0.95) - 1]:>10.1f} µs")
+
+def main(users: int, queries: int, cell_degrees: float):
+    rng = random.Random(1)
+    # Users concentrated around a handful of cities, as real circles are
+    centers = [(55.75, 37.62), (59.93, 30.36), (51.5, -0.12), (52.52, 13.40), (40.71, -74.0)]
+    points = {}
+    for key in range(users):
+        c_lat, c_lon = rng.choice(centers)
+        points[key] = (c_lat + rng.gauss(0, 1.0), c_lon + rng.gauss(0, 1.0))
+    sample = [points[rng.randrange(users)] for _ in range(queries)]
+
+    start = time.perf_counter()
+    index = GeoIndex(cell_degrees)
+    for key, (lat, lon) in points.items():
+        index.update(key, lat, lon)
+    print(f"Built index over {users} users in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    measure("linear scan, 10 nearest", lambda lat, lon: linear_nearest(points, lat, lon, 10), sample)
+    measure("grid index, 10 nearest", lambda lat, lon: index.nearest(lat, lon, 10), sample)
+    measure("grid index, within 5 km", lambda lat, lon: index.within(lat, lon, 5), sample)
+    measure("grid index, within 50 km", lambda lat, lon: index.within(lat, lon, 50), sample)
+    bench_sqlite(points, cell_degrees, sample)
+
+def bench_sqlite(points: dict, cell_degrees: float, sample):
+    """Startup cost against a real users table: full-scan rebuild vs loading cells on demand."""
+    os.environ.setdefault("BOT_TOKEN", "bench")
+    with tempfile.TemporaryDirectory() as tmp:
+        import database
+        database.DATABASE_PATH = str(Path(tmp) / "bench.db")
+        database.GEO_CELL_DEGREES = cell_degrees
+        database.init_db()
+        conn = database.get_connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO users (user_id, username, is_sharing, latitude, longitude, geo_cell) VALUES (?, ?, 1, ?, ?, ?)",
+                [(key, f"user{key}", lat, lon, grid_cell(lat, lon, cell_degrees)) for key, (lat, lon) in points.items()]
+            )
+
+        start = time.perf_counter()
+        full = GeoIndex(cell_degrees)
+        for row in conn.execute("SELECT user_id, latitude, longitude FROM users WHERE is_sharing = 1"):
+            full.update(row["user_id"], row["latitude"], row["longitude"])
+        full.nearest(*sample[0], 10)
+        print(f"{'full-scan build + 1st query':<28} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+
+        start = time.perf_counter()
+        lazy = database.load_geo_index()
+        database.get_users_near(*sample[0], limit=10)
+        print(f"{'lazy index, 1st query':<28} {(time.perf_counter() - start) * 1000:>10.1f} ms  ({len(lazy)} users loaded)")
+        measure("lazy index, later queries", lambda lat, lon: database.get_users_near(lat, lon, limit=10), sample)
+        database.close_connections()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark /map near proximity queries.")
+    parser.add_argument("--users", type=int, default=50000, help="Number of sharing users")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries per method")
+    parser.add_argument("--cell-degrees", type=float, default=0.25, help="Grid cell size in degrees")
+    args = parser.parse_args()
+    main(args.users, args.queries, args.cell_degrees)
@@ -0,0 +1,79 @@
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+# Add project root to path so we can import config
+sys.path.append(str(Path(__file__).parent.parent))
+
+import aiohttp
+from aiohttp import web
+from http_client import get_http_session, close_http_session
+
+async def stub_handler(request):
+    """Mimics a small OpenWeatherMap JSON response."""
+    return web.json_response({"name": "Stub", "main": {"temp": 1.0}, "weather": [{"main": "Clear"}]})
+
+async def start_stub_server(port: int):
+    app = web.Application()
+    app.router.add_get("/data/2.5/weather", stub_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    return runner
+
+async def fetch_fresh_session(url: str):
+    """Old behaviour: a new ClientSession (and TCP connection) per request."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as response:
+            return await response.json()
+
+async def fetch_shared_session(url: str):
+    """New behaviour: the pooled application-wide session."""
+    session = get_http_session()
+    async with session.get(url) as response:
+        return await response.json()
+
+async def run_benchmark(name: str, fetch, url: str, total: int, concurrency: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await fetch(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:<16} {total / elapsed:>10.1f} req/s   "
+        f"p50 {statistics.median(latencies):>7.2f} ms   p95 {p95:>7.2f} ms"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request vs shared aiohttp sessions")
+    parser.add_argument("--requests", type=int, default=2000, help="Total number of requests")
+    parser.add_argument("--concurrency", type=int, default=5, help="Concurrent requests (inline mode fires 5)")
+    parser.add_argument("--port", type=int, default=8765, help="Local stub server port")
+    args = parser.parse_args()
+
+    runner = await start_stub_server(args.port)
+    url = f"http://127.0.0.1:{args.port}/data/2.5/weather"
+    try:
+        print(f"{args.requests} requests, concurrency {args.concurrency}, stub at {url}\n")
+        await run_benchmark("fresh session", fetch_fresh_session, url, args.requests, args.concurrency)
+        await run_benchmark("shared session", fetch_shared_session, url, args.requests, args.concurrency)
+    finally:
+        await close_http_session()
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(main())
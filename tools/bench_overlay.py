@@ -0,0 +1,138 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Add project root to path so we can import the renderer
+sys.path.append(str(PROJECT_ROOT))
+
+RESOLUTIONS = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+WEATHER_TEXT = (
+    "Weather in Izhevsk\n"
+    "Temp: 3.2°C\n"
+    "Feels Like: -0.4°C\n"
+    "Condition: Clouds\n"
+    "Humidity: 81%\n"
+    "Wind: 14.4 km/h"
+)
+
+def make_frame(width: int, height: int) -> bytes:
+    """A camera-like JPEG: smooth gradients plus sensor noise, so encoding cost is realistic."""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(23)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([x / width * 200, y / height * 180, (x + y) / (width + height) * 160], axis=-1)
+    noisy = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    output = io.BytesIO()
+    Image.fromarray(noisy, "RGB").save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+def legacy_overlay(image_bytes: bytes, text: str, font_path: str) -> bytes:
+    """The previous renderer: font loaded per call, full-frame RGBA overlay and composite, quality 95."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        try:
+            font = ImageFont.truetype(font_path, 18)
+        except Exception:
+            font = ImageFont.load_default()
+        draw = ImageDraw.Draw(img)
+        bbox = draw.multiline_textbbox((0, 0), text, font=font)
+        tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
+        x = img.width - tw - 15
+        y = 15
+        overlay = Image.new('RGBA', img.size, (255, 255, 255, 0))
+        ImageDraw.Draw(overlay).rectangle([x - 8, y - 8, x + tw + 8, y + th + 8], fill=(0, 0, 0, 128))
+        img = Image.alpha_composite(img.convert('RGBA'), overlay).convert('RGB')
+        ImageDraw.Draw(img).multiline_text((x, y), text, font=font, fill=(255, 255, 255), spacing=4)
+        output = io.BytesIO()
+        img.save(output, format="JPEG", quality=95)
+        return output.getvalue()
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident memory of this process. VmHWM is reset by exec; ru_maxrss (the fallback on
+    non-Linux systems) also counts the parent that forked us.
+    """
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_worker(variant: str, frame_path: str, iterations: int, quality: int, progressive: bool, optimize: bool) -> dict:
+    """Times one renderer on one frame; runs in its own process so peak RSS is per variant."""
+    from config import FONT_PATH
+    from image_overlay import render_overlay
+
+    frame = Path(frame_path).read_bytes()
+    if variant == "legacy":
+        render = lambda: legacy_overlay(frame, WEATHER_TEXT, FONT_PATH)
+    else:
+        render = lambda: render_overlay(frame, WEATHER_TEXT, FONT_PATH, quality=quality, progressive=progressive, optimize=optimize)
+
+    baseline_mb = peak_rss_mb()
+    output = render()  # warm-up (and panel cache fill for the new renderer)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "median_ms": timings[len(timings) // 2] * 1000,
+        "p90_ms": timings[int(len(timings) * 0.9)] * 1000,
+        "peak_mb": peak_rss_mb() - baseline_mb,
+        "output_kb": len(output) / 1024,
+    }
+
+def main(args):
+    env = {**os.environ, "BOT_TOKEN": os.environ.get("BOT_TOKEN", "bench")}
+    settings = f"q{args.quality}{' progressive' if args.progressive else ''}{' optimize' if args.optimize else ''}"
+    print(f"{'frame':<7} {'renderer':<34} {'median ms':>10} {'p90 ms':>8} {'peak MB':>8} {'JPEG KB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for resolution in args.resolutions.split(","):
+            frame_path = Path(tmp) / f"{resolution}.jpg"
+            frame_path.write_bytes(make_frame(*RESOLUTIONS[resolution]))
+            for variant in ("legacy", "cached"):
+                command = [
+                    sys.executable, __file__, "--worker", variant, "--frame", str(frame_path),
+                    "--iterations", str(args.iterations), "--quality", str(args.quality)
+                ]
+                command += ["--progressive"] * args.progressive + ["--optimize"] * args.optimize
+                result = subprocess.run(command, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True)
+                stats = json.loads(result.stdout.strip().splitlines()[-1])
+                label = "legacy (q95, full-frame RGBA)" if variant == "legacy" else f"cached ({settings})"
+                print(
+                    f"{resolution:<7} {label:<34} {stats['median_ms']:>10.1f} {stats['p90_ms']:>8.1f} "
+                    f"{stats['peak_mb']:>8.0f} {stats['output_kb']:>8.0f}"
+                )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the camera weather overlay on 1080p and 4K frames.")
+    parser.add_argument("--resolutions", default="1080p,4k", help="Comma-separated frame sizes (1080p, 4k)")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed overlays per renderer")
+    parser.add_argument("--quality", type=int, default=95, help="JPEG quality for the new renderer")
+    parser.add_argument("--progressive", action="store_true", help="Encode progressive JPEG")
+    parser.add_argument("--optimize", action="store_true", help="Optimize Huffman tables")
+    parser.add_argument("--worker", choices=["legacy", "cached"], help=argparse.SUPPRESS)
+    parser.add_argument("--frame", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.frame, args.iterations, args.quality, args.progressive, args.optimize)))
+    else:
+        main(args)
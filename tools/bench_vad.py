@@ -0,0 +1,82 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+import numpy as np
+
+# Add project root to path so we can import vad
+sys.path.append(str(Path(__file__).parent.parent))
+
+from vad import speech_chunks
+from audio_stream import SAMPLE_RATE
+
+def synthetic_speech(rng: np.random.Generator, seconds: float) -> np.ndarray:
+    """Harmonic signal with a syllable-rate (4 Hz) envelope, loosely resembling voiced speech."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = rng.uniform(100, 250)
+    signal = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi))
+    return (0.1 * signal * envelope).astype(np.float32)
+
+def synthetic_clip(rng: np.random.Generator, silence_ratio: float, seconds: float) -> np.ndarray:
+    """Alternates speech bursts and pauses so that roughly `silence_ratio` of the clip is silent."""
+    parts = []
+    total = 0.0
+    while total < seconds:
+        speech = rng.uniform(2, 8)
+        pause = speech * silence_ratio / (1 - silence_ratio) * rng.uniform(0.5, 1.5)
+        parts += [synthetic_speech(rng, speech), np.zeros(int(pause * SAMPLE_RATE), dtype=np.float32)]
+        total += speech + pause
+    clip = np.concatenate(parts)
+    # Background noise at about -60 dBFS
+    return clip + (rng.standard_normal(len(clip)) * 0.001).astype(np.float32)
+
+def main(clips: int, seconds: float, chunk_seconds: float, rtf: float, use_whisper: bool):
+    rng = np.random.default_rng(7)
+    corpus = [synthetic_clip(rng, rng.uniform(0.1, 0.6), seconds) for _ in range(clips)]
+    # Two fully silent clips, which VAD should skip entirely
+    corpus += [(rng.standard_normal(int(seconds * SAMPLE_RATE)) * 0.001).astype(np.float32) for _ in range(2)]
+
+    asr = None
+    if use_whisper:
+        from handlers.audio import load_pipeline
+        asr = load_pipeline()
+
+    def infer_seconds(chunks):
+        """Measured pipeline time when --whisper is given, otherwise audio length x RTF."""
+        if asr is None:
+            return sum(len(chunk) for chunk in chunks) / SAMPLE_RATE * rtf
+        start = time.perf_counter()
+        for chunk in chunks:
+            asr(chunk)
+        return time.perf_counter() - start
+
+    audio_total = audio_kept = vad_time = infer_full = infer_vad = 0.0
+    skipped = 0
+    for clip in corpus:
+        full_chunks = [clip[i:i + int(chunk_seconds * SAMPLE_RATE)] for i in range(0, len(clip), int(chunk_seconds * SAMPLE_RATE))]
+        start = time.perf_counter()
+        chunks = speech_chunks(clip, chunk_seconds)
+        vad_time += time.perf_counter() - start
+
+        audio_total += len(clip) / SAMPLE_RATE
+        audio_kept += sum(len(chunk) for chunk in chunks) / SAMPLE_RATE
+        skipped += not chunks
+        infer_full += infer_seconds(full_chunks)
+        infer_vad += infer_seconds(chunks)
+
+    label = "measured" if asr is not None else f"estimated at RTF {rtf}"
+    print(f"Corpus: {len(corpus)} clips, {audio_total:.0f} s of audio ({skipped} silent clips skipped)")
+    print(f"VAD cost: {vad_time * 1000:.0f} ms total, {vad_time / audio_total * 60 * 1000:.1f} ms per minute of audio")
+    print(f"Audio fed to Whisper: {audio_total:.0f} s -> {audio_kept:.0f} s ({(1 - audio_kept / audio_total) * 100:.0f}% removed)")
+    print(f"Inference seconds ({label}): {infer_full:.1f} -> {infer_vad:.1f} (saved {infer_full - infer_vad:.1f} s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the VAD pre-pass on a synthetic corpus.")
+    parser.add_argument("--clips", type=int, default=20, help="Number of clips with speech")
+    parser.add_argument("--seconds", type=float, default=60, help="Approximate clip length")
+    parser.add_argument("--chunk-seconds", type=float, default=30, help="Whisper chunk length")
+    parser.add_argument("--rtf", type=float, default=0.15, help="Real-time factor used when not running Whisper")
+    parser.add_argument("--whisper", action="store_true", help="Run the real Whisper pipeline instead of estimating")
+    args = parser.parse_args()
+    main(args.clips, args.seconds, args.chunk_seconds, args.rtf, args.whisper)
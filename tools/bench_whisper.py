@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import argparse
+import itertools
+import subprocess
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Add project root to path so we can import the handler and audio helpers
+sys.path.append(str(PROJECT_ROOT))
+
+# Clip lengths (seconds) of the synthetic fixture set used when --fixtures is not given
+SYNTHETIC_SECONDS = (5, 15, 30, 60)
+
+def load_fixtures(fixtures_dir: str | None) -> list[tuple[str, "np.ndarray"]]:
+    """
+    Returns (name, 16kHz float32 audio) pairs: every audio file in `fixtures_dir` decoded with
+    ffmpeg, or a fixed-seed synthetic set. Synthetic clips give comparable timings but no
+    meaningful text; use real recordings to judge accuracy.
+    """
+    import asyncio
+    import numpy as np
+    from audio_stream import decode_audio_stream
+
+    if fixtures_dir:
+        paths = sorted(p for p in Path(fixtures_dir).iterdir() if p.is_file())
+        if not paths:
+            raise SystemExit(f"No fixtures found in {fixtures_dir}")
+        return [(p.name, asyncio.run(decode_audio_stream(source_path=p))) for p in paths]
+
+    from tools.bench_vad import synthetic_clip
+    rng = np.random.default_rng(19)
+    return [(f"synthetic-{seconds}s", synthetic_clip(rng, 0.2, seconds)[:seconds * 16000]) for seconds in SYNTHETIC_SECONDS]
+
+def run_worker(config: dict, fixtures_dir: str | None, repeats: int, batch: int) -> dict:
+    """Loads one configuration and transcribes the fixtures; runs in its own process so peak RSS is per configuration."""
+    import time
+    import resource
+    from audio_stream import SAMPLE_RATE
+    from handlers.audio import whisper_model_id, whisper_ov_config, build_pipeline
+
+    fixtures = load_fixtures(fixtures_dir)
+    audio_seconds = sum(len(audio) for _, audio in fixtures) / SAMPLE_RATE
+    baseline_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    start = time.perf_counter()
+    asr = build_pipeline(
+        whisper_model_id(config["size"], config["precision"]),
+        [config["device"]],
+        whisper_ov_config(config["hint"], config["streams"], cache_dir="")
+    )
+    load_s = time.perf_counter() - start
+    # The first inference allocates buffers; keep it out of the timings
+    asr(fixtures[0][1])
+
+    sequential = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _, audio in fixtures:
+            asr(audio)
+        sequential.append(time.perf_counter() - start)
+
+    batched = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        asr([audio for _, audio in fixtures], batch_size=batch)
+        batched.append(time.perf_counter() - start)
+
+    return {
+        "load_s": load_s,
+        "rtf": min(sequential) / audio_seconds,
+        "batch_rtf": min(batched) / audio_seconds,
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - baseline_mb,
+        "audio_s": audio_seconds,
+    }
+
+def run_config(config: dict, args) -> dict:
+    """Benchmarks one configuration in a fresh interpreter."""
+    command = [
+        sys.executable, __file__, "--worker", json.dumps(config),
+        "--repeats", str(args.repeats), "--batch", str(args.batch)
+    ]
+    if args.fixtures:
+        command += ["--fixtures", args.fixtures]
+    env = {**os.environ, "BOT_TOKEN": os.environ.get("BOT_TOKEN", "bench")}
+    result = subprocess.run(command, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        error = (result.stderr.strip().splitlines() or ["unknown error"])[-1]
+        return {"error": error}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main(args):
+    configs = [
+        {"size": size, "precision": precision, "device": args.device, "hint": hint, "streams": streams}
+        for size, precision, hint, streams in itertools.product(
+            args.sizes.split(","), args.precisions.split(","), args.hints.split(","), args.streams.split(",")
+        )
+    ]
+    print(f"{'model':<22} {'hint':<11} {'streams':>7} {'load s':>8} {'RTF':>7} {f'RTF x{args.batch}':>8} {'peak MB':>8}")
+    for config in configs:
+        result = run_config(config, args)
+        model = f"{config['size']}-{config['precision']}"
+        streams = config["streams"] or "auto"
+        if "error" in result:
+            print(f"{model:<22} {config['hint']:<11} {streams:>7}  failed: {result['error']}")
+            continue
+        print(
+            f"{model:<22} {config['hint']:<11} {streams:>7} {result['load_s']:>8.1f} "
+            f"{result['rtf']:>7.3f} {result['batch_rtf']:>8.3f} {result['peak_mb']:>8.0f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare Whisper model sizes, precisions and OpenVINO hints by real-time factor and memory.")
+    parser.add_argument("--sizes", default="tiny,base,small", help="Comma-separated model sizes")
+    parser.add_argument("--precisions", default="int8", help="Comma-separated weight precisions (int8, fp16, int4)")
+    parser.add_argument("--hints", default="LATENCY,THROUGHPUT", help="Comma-separated OpenVINO performance hints")
+    parser.add_argument("--streams", default="", help="Comma-separated NUM_STREAMS values (empty = device default)")
+    parser.add_argument("--device", default="CPU", help="OpenVINO device")
+    parser.add_argument("--fixtures", help="Directory of audio files (default: fixed synthetic clips)")
+    parser.add_argument("--repeats", type=int, default=2, help="Timed passes over the fixtures (best is reported)")
+    parser.add_argument("--batch", type=int, default=4, help="Batch size for the batched pass")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(run_worker(json.loads(args.worker), args.fixtures, args.repeats, args.batch)))
+    else:
+        main(args)
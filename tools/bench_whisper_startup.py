@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import handlers.audio as audio
+print(json.dumps({"import_s": time.perf_counter() - start, "state": audio.model_state}))
+"""
+
+# The ML stack is imported separately so that load_s only covers reading and compiling the model
+LOAD_SNIPPET = """
+import json, time
+import handlers.audio as audio
+start = time.perf_counter()
+from transformers import AutoProcessor, pipeline
+from optimum.intel.openvino import OVModelForSpeechSeq2Seq
+stack_s = time.perf_counter() - start
+start = time.perf_counter()
+audio.load_pipeline()
+print(json.dumps({"stack_s": stack_s, "load_s": time.perf_counter() - start, "state": audio.model_state}))
+"""
+
+def run_snippet(snippet: str, cache_dir: str) -> dict:
+    """Runs a snippet in a fresh interpreter, as a bot restart would."""
+    env = {**os.environ, "WHISPER_CACHE_DIR": cache_dir, "BOT_TOKEN": os.environ.get("BOT_TOKEN", "bench")}
+    result = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=PROJECT_ROOT, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main(runs: int, skip_load: bool):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        imports = [run_snippet(IMPORT_SNIPPET, cache_dir)["import_s"] for _ in range(runs)]
+        print(f"import handlers.audio            {min(imports):>8.2f} s (best of {runs})")
+        if skip_load:
+            return
+
+        cold = run_snippet(LOAD_SNIPPET, cache_dir)
+        print(f"import transformers + optimum    {cold['stack_s']:>8.2f} s")
+        print(f"first load, empty CACHE_DIR      {cold['load_s']:>8.2f} s ({cold['state']})")
+        warm = [run_snippet(LOAD_SNIPPET, cache_dir)["load_s"] for _ in range(runs)]
+        print(f"restart load, warm CACHE_DIR     {min(warm):>8.2f} s (best of {runs})")
+        no_cache = run_snippet(LOAD_SNIPPET, "")
+        print(f"restart load, cache disabled     {no_cache['load_s']:>8.2f} s ({no_cache['state']})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure bot cold-start cost of the Whisper handler.")
+    parser.add_argument("--runs", type=int, default=3, help="Repetitions per measurement")
+    parser.add_argument("--skip-load", action="store_true", help="Only measure the module import")
+    args = parser.parse_args()
+    main(args.runs, args.skip_load)
@@ -5,8 +5,8 @@ from pathlib import Path
 # Add project root to path so we can import config
 sys.path.append(str(Path(__file__).parent.parent))
 
-from onvif import ONVIFCamera
-from config import CAMERA_IP, CAMERA_PORT, CAMERA_USER, CAMERA_PASSWORD
+from config import CAMERA_IP, CAMERA_PORT, CAMERA_USER, CAMERA_PASSWORD, CAMERA_URI_CACHE_TTL, CAMERA_URI_CACHE_FILE
+from onvif_discovery import ONVIFDiscovery, with_rtsp_credentials
 
 def get_vlc_link():
     """
@@ -16,38 +16,20 @@ def get_vlc_link():
     print(f"Connecting to camera at {CAMERA_IP}:{CAMERA_PORT}...")
     
     try:
-        # Initialize ONVIF client
-        cam = ONVIFCamera(CAMERA_IP, CAMERA_PORT, CAMERA_USER, CAMERA_PASSWORD)
-        
-        # Create media service
-        media = cam.create_media_service()
-        
-        # Get profiles
-        profiles = media.GetProfiles()
-        if not profiles:
-            print("Error: No media profiles found on the camera.")
+        # Same ONVIF discovery (profile selection, URI lookup) and URI cache file as the /camera handler
+        discovery = ONVIFDiscovery(
+            CAMERA_IP, CAMERA_PORT, CAMERA_USER, CAMERA_PASSWORD,
+            ttl=CAMERA_URI_CACHE_TTL, cache_path=CAMERA_URI_CACHE_FILE
+        )
+        uris = discovery.get_uris()
+        print(f"Using media profile: {uris.profile_name} (Token: {uris.profile_token})")
+
+        if not uris.rtsp_uri:
+            print("Error: The camera did not return an RTSP stream URI.")
             return
-        
-        # Use the first profile (usually the highest resolution)
-        token = profiles[0].token
-        print(f"Using media profile: {profiles[0].Name} (Token: {token})")
-        
-        # Get Stream URI
-        obj = media.create_type('GetStreamUri')
-        obj.ProfileToken = token
-        obj.StreamSetup = {
-            'Stream': 'RTP-Unicast',
-            'Transport': {'Protocol': 'RTSP'}
-        }
-        res = media.GetStreamUri(obj)
-        
-        uri = res.Uri
-        
+
         # Inject credentials for VLC (rtsp://user:pass@ip:port/path)
-        if uri.startswith("rtsp://") and "@" not in uri:
-            vlc_link = uri.replace("rtsp://", f"rtsp://{CAMERA_USER}:{CAMERA_PASSWORD}@")
-        else:
-            vlc_link = uri
+        vlc_link = with_rtsp_credentials(uris.rtsp_uri, CAMERA_USER, CAMERA_PASSWORD)
             
         print("\n" + "="*50)
         print("VLC NETWORK STREAM LINK:")
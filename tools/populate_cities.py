@@ -4,11 +4,46 @@ import zipfile
 import io
 import requests
 
+MIN_POPULATION = 100000
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-def fetch_geonames_cities():
-    """Fetches the cities15000.txt from Geonames, which contains cities > 15k population."""
+def parse_geonames_cities(content: str, min_population: int = MIN_POPULATION):
+    """Parses Geonames TSV content into sorted (name, population) tuples above `min_population`."""
+    cities = []
+    # The file is tab-separated. 
+    # Column 1: geonameid
+    # Column 2: name (standard name)
+    # Column 9: country code
+    # Column 15: population
+    
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+            
+        parts = line.split('\t')
+        if len(parts) >= 15:
+            name = parts[1]
+            country_code = parts[8]
+            try:
+                population = int(parts[14])
+            except ValueError:
+                continue
+                
+            # The user asked for > 100k population to keep the list lean and fast
+            if population > min_population:
+                cities.append((f"{name}, {country_code}", population))
+                
+    # Sort alphabetically for a nicer file
+    cities.sort()
+    return cities
+
+def fetch_geonames_cities(min_population: int = MIN_POPULATION):
+    """
+    Fetches the cities15000.txt from Geonames, which contains cities > 15k population.
+    Returns (name, population) tuples for cities above `min_population`.
+    """
     url = "https://download.geonames.org/export/dump/cities15000.zip"
     logger.info(f"Downloading {url}...")
     
@@ -21,33 +56,7 @@ def fetch_geonames_cities():
             with z.open("cities15000.txt") as f:
                 content = f.read().decode('utf-8')
                 
-        cities = []
-        # The file is tab-separated. 
-        # Column 1: geonameid
-        # Column 2: name (standard name)
-        # Column 9: country code
-        # Column 15: population
-        
-        for line in content.splitlines():
-            if not line.strip():
-                continue
-                
-            parts = line.split('\t')
-            if len(parts) >= 15:
-                name = parts[1]
-                country_code = parts[8]
-                try:
-                    population = int(parts[14])
-                except ValueError:
-                    continue
-                    
-                # The user asked for > 100k population to keep the list lean and fast
-                if population > 100000:
-                    cities.append(f"{name}, {country_code}")
-                    
-        # Sort alphabetically for a nicer file
-        cities.sort()
-        return cities
+        return parse_geonames_cities(content, min_population)
 
     except Exception as e:
         logger.exception(f"Failed to fetch or parse Geonames data: {e}")
@@ -67,8 +76,9 @@ def main():
     output_path = "cities.txt"
     try:
         with open(output_path, "w", encoding="utf-8") as f:
-            for city in cities:
-                f.write(f"{city}\n")
+            # Population is stored after a tab so inline search can rank results
+            for city, population in cities:
+                f.write(f"{city}\t{population}\n")
         logger.info(f"Wrote {len(cities)} cities to {output_path}")
     except Exception as e:
         logger.error(f"Failed to write to {output_path}: {e}")
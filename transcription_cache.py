@@ -0,0 +1,56 @@
+import logging
+import threading
+from config import TRANSCRIPTION_CACHE_PATH
+from database import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Paths whose schema has been created in this process
+_initialized: set[str] = set()
+_init_lock = threading.Lock()
+
+def _connection():
+    path = str(TRANSCRIPTION_CACHE_PATH)
+    if path not in _initialized:
+        with _init_lock:
+            if path not in _initialized:
+                # SQLite cannot create the file before its directory exists
+                TRANSCRIPTION_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+                conn = get_connection(path)
+                with conn:
+                    conn.execute('''
+                        CREATE TABLE IF NOT EXISTS transcriptions (
+                            key TEXT PRIMARY KEY,
+                            text TEXT NOT NULL,
+                            model TEXT,
+                            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                        )
+                    ''')
+                _initialized.add(path)
+    return get_connection(path)
+
+def file_key(file_unique_id: str) -> str:
+    """Cache key for a Telegram file; forwarded copies keep the same file_unique_id."""
+    return f"file:{file_unique_id}"
+
+def content_key(sha256_hex: str) -> str:
+    """Cache key for the downloaded bytes, for re-uploads of the same file."""
+    return f"sha256:{sha256_hex}"
+
+def get_cached_transcription(*keys: str, model: str) -> str | None:
+    """Returns the text cached by `model` for the first key that is present."""
+    conn = _connection()
+    for key in keys:
+        row = conn.execute('SELECT text FROM transcriptions WHERE key = ? AND model = ?', (key, model)).fetchone()
+        if row is not None:
+            return row['text']
+    return None
+
+def store_transcription(keys: list[str], text: str, model: str):
+    """Stores the text under every given key in one transaction."""
+    conn = _connection()
+    with conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO transcriptions (key, text, model) VALUES (?, ?, ?)',
+            [(key, text, model) for key in keys]
+        )
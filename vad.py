@@ -0,0 +1,116 @@
+import numpy as np
+from audio_stream import SAMPLE_RATE
+
+FRAME_MS = 30
+# Long audio is cut at the quietest frame within this many seconds before the chunk limit
+SPLIT_SEARCH_SECONDS = 5.0
+# Frames within this many dB of the quietest one count as equally quiet
+SPLIT_TIE_DB = 1.0
+
+def frame_energy_db(audio: np.ndarray, frame_samples: int) -> np.ndarray:
+    """Returns the RMS energy of consecutive frames in dBFS (the last partial frame is dropped)."""
+    frames = len(audio) // frame_samples
+    if frames == 0:
+        return np.empty(0, dtype=np.float32)
+    shaped = audio[:frames * frame_samples].reshape(frames, frame_samples)
+    power = np.einsum("ij,ij->i", shaped, shaped) / frame_samples
+    return 10 * np.log10(power + 1e-10)
+
+def _runs(mask: np.ndarray) -> list[tuple[int, int]]:
+    """Returns [start, end) index pairs of consecutive True values."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+def detect_speech(
+    audio: np.ndarray,
+    margin_db: float = 12.0,
+    min_db: float = -50.0,
+    min_speech_ms: int = 150,
+    min_silence_ms: int = 700,
+    pad_ms: int = 200
+) -> list[tuple[int, int]]:
+    """
+    Energy-based voice activity detection over 16kHz float32 audio.
+    A frame counts as speech when it is `margin_db` above the clip's noise floor (10th percentile
+    frame energy), capped at 30 dB below the loudest frame and never below `min_db` dBFS.
+    Pauses shorter than `min_silence_ms` are bridged, blips shorter than `min_speech_ms` dropped,
+    and each segment is padded by `pad_ms`. Returns [start, end) sample ranges.
+    """
+    frame_samples = SAMPLE_RATE * FRAME_MS // 1000
+    energy = frame_energy_db(audio, frame_samples)
+    if len(energy) == 0 or energy.max() < min_db:
+        return []
+
+    noise_floor = np.percentile(energy, 10)
+    threshold = max(min_db, min(noise_floor + margin_db, energy.max() - 30))
+    speech = energy > threshold
+
+    # Bridge short pauses inside speech
+    min_silence = max(1, min_silence_ms // FRAME_MS)
+    runs = _runs(speech)
+    for (_, prev_end), (next_start, _) in zip(runs, runs[1:]):
+        if next_start - prev_end < min_silence:
+            speech[prev_end:next_start] = True
+
+    min_speech = max(1, min_speech_ms // FRAME_MS)
+    pad = pad_ms * SAMPLE_RATE // 1000
+    segments = []
+    for start, end in _runs(speech):
+        if end - start < min_speech:
+            continue
+        seg_start = max(0, start * frame_samples - pad)
+        seg_end = min(len(audio), end * frame_samples + pad)
+        if segments and seg_start <= segments[-1][1]:
+            segments[-1] = (segments[-1][0], seg_end)
+        else:
+            segments.append((seg_start, seg_end))
+    return segments
+
+def split_at_quiet_points(audio: np.ndarray, max_seconds: float, search_seconds: float = SPLIT_SEARCH_SECONDS) -> list[np.ndarray]:
+    """
+    Splits audio into pieces of at most `max_seconds` (views, no copies), cutting each one at
+    the quietest frame in its last `search_seconds` so words are not cut in half at fixed offsets.
+    Among equally quiet frames (within SPLIT_TIE_DB) the latest is used, keeping pieces as long
+    as possible.
+    """
+    max_samples = int(max_seconds * SAMPLE_RATE)
+    if len(audio) <= max_samples:
+        return [audio]
+    frame_samples = SAMPLE_RATE * FRAME_MS // 1000
+    search_samples = min(int(search_seconds * SAMPLE_RATE), max_samples // 2)
+
+    pieces = []
+    start = 0
+    while len(audio) - start > max_samples:
+        window_start = start + max_samples - search_samples
+        energy = frame_energy_db(audio[window_start:start + max_samples], frame_samples)
+        if len(energy) == 0:
+            cut = start + max_samples
+        else:
+            quietest = int(np.flatnonzero(energy <= energy.min() + SPLIT_TIE_DB)[-1])
+            cut = window_start + quietest * frame_samples + frame_samples // 2
+        pieces.append(audio[start:cut])
+        start = cut
+    pieces.append(audio[start:])
+    return pieces
+
+def speech_chunks(audio: np.ndarray, max_seconds: float, **vad_options) -> list[np.ndarray]:
+    """
+    Drops silence and packs the remaining speech segments, in order, into chunks of at most
+    `max_seconds`. Segments longer than that are split at their quietest points.
+    Returns an empty list for clips without speech.
+    """
+    max_samples = int(max_seconds * SAMPLE_RATE)
+    chunks = []
+    current, current_len = [], 0
+    for start, end in detect_speech(audio, **vad_options):
+        for piece in split_at_quiet_points(audio[start:end], max_seconds):
+            if current and current_len + len(piece) > max_samples:
+                chunks.append(current[0] if len(current) == 1 else np.concatenate(current))
+                current, current_len = [], 0
+            current.append(piece)
+            current_len += len(piece)
+    if current:
+        chunks.append(current[0] if len(current) == 1 else np.concatenate(current))
+    return chunks